@@ -5,3 +5,7 @@ class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
 
+    def ready(self):
+        from .fuel_stations import get_fuel_stations
+
+        get_fuel_stations()  # load the station index at startup, not on the first plan
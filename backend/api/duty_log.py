@@ -0,0 +1,124 @@
+# backend/api/duty_log.py
+
+import functools
+import json
+from array import array
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+# Order matters: the index is the status code stored in DutyLog
+DUTY_STATUSES = ("Off Duty", "Sleeper Berth", "Driving", "On Duty (not driving)")
+OFF_DUTY, SLEEPER_BERTH, DRIVING, ON_DUTY = range(len(DUTY_STATUSES))
+STATUS_CODES = {status: code for code, status in enumerate(DUTY_STATUSES)}
+
+
+@functools.cache
+def _segment_json(status, minutes):
+    # At most len(DUTY_STATUSES) * 1441 distinct segments in a day
+    return json.dumps({"type": DUTY_STATUSES[status], "hours": round(minutes / 60, 2)})
+
+
+class DutyLog:
+    """
+    One day of duty segments stored as parallel arrays of status codes and
+    whole minutes. It reads like the list of ``{"type", "hours"}`` dicts it
+    replaces; the dicts are only built when a segment is accessed or the log
+    is serialized.
+    """
+
+    __slots__ = ("_minutes", "_statuses")
+
+    def __init__(self, segments=()):
+        self._statuses = array("B")
+        self._minutes = array("H")
+        for segment in segments:
+            self.append(segment["type"], segment["hours"])
+
+    @classmethod
+    def from_arrays(cls, statuses, minutes):
+        """Builds a log from sequences of status codes and minutes."""
+        log = cls()
+        log._statuses = array("B", statuses)
+        log._minutes = array("H", minutes)
+        if len(log._statuses) != len(log._minutes):
+            raise ValueError("statuses and minutes must have the same length.")
+        return log
+
+    @classmethod
+    def coerce(cls, value):
+        """
+        Returns ``value`` as a DutyLog if it is a list of duty segments with
+        known statuses, otherwise returns it unchanged.
+        """
+        if isinstance(value, cls) or not isinstance(value, list):
+            return value
+        try:
+            return cls(value)
+        except (KeyError, TypeError, ValueError, OverflowError):
+            return value
+
+    def append(self, status, hours):
+        """Appends a segment, rounding ``hours`` to whole minutes."""
+        if status not in STATUS_CODES:
+            raise ValueError(f"Unknown duty status: {status!r}")
+        self._statuses.append(STATUS_CODES[status])
+        self._minutes.append(round(hours * 60))
+
+    @property
+    def statuses(self):
+        """Read-only view of the status codes (no copy)."""
+        return memoryview(self._statuses).toreadonly()
+
+    @property
+    def minutes(self):
+        """Read-only view of the segment lengths in minutes (no copy)."""
+        return memoryview(self._minutes).toreadonly()
+
+    @property
+    def total_hours(self):
+        return sum(self._minutes) / 60
+
+    def __len__(self):
+        return len(self._statuses)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return {
+            "type": DUTY_STATUSES[self._statuses[index]],
+            "hours": round(self._minutes[index] / 60, 2),
+        }
+
+    def __iter__(self):
+        for status, minutes in zip(self._statuses, self._minutes, strict=True):
+            yield {"type": DUTY_STATUSES[status], "hours": round(minutes / 60, 2)}
+
+    def __eq__(self, other):
+        if isinstance(other, DutyLog):
+            return self._statuses == other._statuses and self._minutes == other._minutes
+        if isinstance(other, list):
+            return self.tolist() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"DutyLog({self.tolist()!r})"
+
+    def tolist(self):
+        """Returns the log in its JSON shape: a list of segment dicts."""
+        return list(self)
+
+    def to_json(self):
+        """Serializes straight to the list-of-dicts JSON without building dicts."""
+        return "[" + ", ".join(map(_segment_json, self._statuses, self._minutes)) + "]"
+
+
+class DutyLogEncoder(DjangoJSONEncoder):
+    """JSON encoder that writes DutyLog objects in their list-of-dicts shape."""
+
+    def default(self, o):
+        if isinstance(o, DutyLog):
+            return o.tolist()
+        return super().default(o)
@@ -0,0 +1,153 @@
+# backend/api/fuel_stations.py
+
+import csv
+import logging
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+import numpy as np
+
+from .geometry import EARTH_RADIUS_MILES, SPATIAL_CELL_DEGREES, radius_bbox
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FUEL_STATIONS = {
+    "PATH": None,  # no dataset: stops are not snapped
+    "MAX_DETOUR_MILES": 3.0,  # farthest a station may be from the route
+}
+
+# Accepted CSV headers for the coordinates (case-insensitive)
+LAT_COLUMNS = ("lat", "latitude")
+LON_COLUMNS = ("lon", "lng", "long", "longitude")
+
+
+class FuelStationIndex:
+    """
+    Fuel stations bucketed into a grid of ``cell``-degree cells. Stations
+    are sorted by cell key (row-major, so each grid row of a query box is
+    one contiguous slice found with ``searchsorted``); a lookup only
+    measures the stations in the cells around the query points.
+    """
+
+    def __init__(self, stations, max_detour_miles=3.0, cell=SPATIAL_CELL_DEGREES):
+        """``stations`` is a list of dicts with float ``lat`` and ``lon`` keys."""
+        self.max_detour_miles = float(max_detour_miles)
+        self.cell = cell
+        self._row_width = int(np.ceil(360 / cell)) + 1
+        points = np.array([[s["lat"], s["lon"]] for s in stations], dtype=np.float64).reshape(-1, 2)
+        keys = self._keys(points)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.points = points[order]
+        self.stations = [stations[i] for i in order.tolist()]
+
+    @classmethod
+    def from_csv(cls, path, **kwargs):
+        """
+        Loads a CSV with a header row. It needs latitude and longitude
+        columns (see LAT_COLUMNS / LON_COLUMNS); every other column, such as
+        name or address, is kept on the station. Rows without valid
+        coordinates are skipped.
+        """
+        stations = []
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            columns = {name.strip().lower(): name for name in reader.fieldnames or ()}
+            lat_key = next((columns[c] for c in LAT_COLUMNS if c in columns), None)
+            lon_key = next((columns[c] for c in LON_COLUMNS if c in columns), None)
+            if lat_key is None or lon_key is None:
+                raise ValueError(f"{path} has no latitude/longitude columns.")
+            for row in reader:
+                try:
+                    lat, lon = float(row[lat_key]), float(row[lon_key])
+                except (TypeError, ValueError):
+                    continue
+                if -90 <= lat <= 90 and -180 <= lon <= 180:
+                    extra = {k: v for k, v in row.items() if k not in (lat_key, lon_key) and k}
+                    stations.append({**extra, "lat": lat, "lon": lon})
+        return cls(stations, **kwargs)
+
+    @classmethod
+    def from_settings(cls):
+        """The index for ``settings.FUEL_STATIONS``, or None without a dataset."""
+        options = {**DEFAULT_FUEL_STATIONS, **getattr(settings, "FUEL_STATIONS", {})}
+        path = options["PATH"]
+        if not path or not Path(path).exists():
+            return None
+        index = cls.from_csv(path, max_detour_miles=options["MAX_DETOUR_MILES"])
+        logger.info("Loaded %d fuel stations from %s", len(index), path)
+        return index
+
+    def __len__(self):
+        return len(self.stations)
+
+    def _keys(self, points):
+        rows = np.floor((points[:, 0] + 90) / self.cell).astype(np.int64)
+        cols = np.floor((points[:, 1] + 180) / self.cell).astype(np.int64)
+        return rows * self._row_width + cols
+
+    def _in_box(self, min_lat, min_lon, max_lat, max_lon):
+        """Indices of the stations in the grid cells overlapping a box."""
+        lo, hi = self._keys(np.array([[min_lat, min_lon], [max_lat, max_lon]]))
+        width = self._row_width
+        rows = np.arange(lo // width, hi // width + 1) * width
+        starts = np.searchsorted(self.keys, rows + lo % width, side="left")
+        ends = np.searchsorted(self.keys, rows + hi % width, side="right")
+        counts = ends - starts
+        if not counts.sum():
+            return np.empty(0, dtype=np.int64)
+        return np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+    def nearest(self, points, max_miles=None):
+        """
+        For each ``[lat, lon]`` in ``points``, the index into ``stations`` of
+        the nearest station within ``max_miles`` (default: the detour limit)
+        and its great-circle distance. Points with no station in range get
+        index -1 and distance ``inf``.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        max_miles = self.max_detour_miles if max_miles is None else max_miles
+        found = np.full(len(points), -1, dtype=np.int64)
+        distances = np.full(len(points), np.inf)
+        if not len(points) or not len(self.stations):
+            return found, distances
+
+        # One box around every query point, padded by the search radius
+        box_lo = radius_bbox(*points.min(axis=0), max_miles)[:2]
+        box_hi = radius_bbox(*points.max(axis=0), max_miles)[2:]
+        candidates = self._in_box(*box_lo, *box_hi)
+        if not len(candidates):
+            return found, distances
+
+        lat1, lon1 = np.radians(points).T[:, :, np.newaxis]
+        lat2, lon2 = np.radians(self.points[candidates]).T[:, np.newaxis, :]
+        h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        miles = 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+        best = miles.argmin(axis=1)
+        best_miles = miles[np.arange(len(points)), best]
+        in_range = best_miles <= max_miles
+        found[in_range] = candidates[best[in_range]]
+        distances[in_range] = best_miles[in_range]
+        return found, distances
+
+
+_fuel_stations = None
+_fuel_stations_loaded = False
+_fuel_stations_lock = threading.Lock()
+
+
+def get_fuel_stations():
+    """
+    Returns the process-wide FuelStationIndex configured by
+    ``settings.FUEL_STATIONS``, or None if no dataset is configured.
+    """
+    global _fuel_stations, _fuel_stations_loaded
+    if not _fuel_stations_loaded:
+        with _fuel_stations_lock:
+            if not _fuel_stations_loaded:
+                _fuel_stations = FuelStationIndex.from_settings()
+                _fuel_stations_loaded = True
+    return _fuel_stations
@@ -0,0 +1,332 @@
+# backend/api/geometry.py
+
+import numpy as np
+
+
+EARTH_RADIUS_MILES = 3958.761
+
+
+def cumulative_miles(route):
+    """
+    Returns the cumulative haversine distance (miles) at every vertex of a
+    ``[[lat, lon], ...]`` route, computed in one vectorized pass.
+    """
+    points = np.radians(np.asarray(route, dtype=np.float64).reshape(-1, 2))
+    cum = np.zeros(len(points), dtype=np.float64)
+    if len(points) < 2:
+        return cum
+
+    lat, lon = points[:, 0], points[:, 1]
+    h = (
+        np.sin(np.diff(lat) / 2) ** 2
+        + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2
+    )
+    segments = 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+    np.cumsum(segments, out=cum[1:])
+    return cum
+
+
+class RouteProfile:
+    """
+    A route polyline together with its cumulative mileage, so position lookups
+    are a binary search instead of a walk along the vertices.
+
+    ``pack()`` stores both arrays compactly (int32 microdegrees and float32
+    miles) and ``unpack()`` maps them back without copying or recomputing
+    anything, so a saved route's profile costs O(1) to load.
+    """
+
+    # Microdegrees, the same resolution as a precision-6 polyline
+    PACKED_COORD_SCALE = 1e-6
+
+    def __init__(self, route, cum_miles=None, coord_scale=1.0):
+        # Points are kept in units of coord_scale degrees (packed: int32)
+        self.points = np.asarray(route, dtype=np.float64 if coord_scale == 1.0 else None).reshape(-1, 2)
+        self.coord_scale = coord_scale
+        self.cum_miles = cumulative_miles(self.points) if cum_miles is None else cum_miles
+
+    def pack(self):
+        """``(points, miles)`` as little-endian bytes for ``unpack``."""
+        points = np.rint(self.points * (self.coord_scale / self.PACKED_COORD_SCALE)).astype("<i4")
+        return points.tobytes(), np.asarray(self.cum_miles, dtype="<f4").tobytes()
+
+    @classmethod
+    def unpack(cls, points, miles):
+        """A read-only profile over bytes from ``pack`` (e.g. a stored TripRouteProfile)."""
+        return cls(
+            np.frombuffer(points, dtype="<i4").reshape(-1, 2),
+            cum_miles=np.frombuffer(miles, dtype="<f4"),
+            coord_scale=cls.PACKED_COORD_SCALE,
+        )
+
+    @property
+    def total_miles(self):
+        return float(self.cum_miles[-1]) if len(self.cum_miles) else 0.0
+
+    def coords_at_miles(self, miles):
+        """Interpolates ``[lat, lon]`` for each mile marker in ``miles``."""
+        miles = np.atleast_1d(np.asarray(miles, dtype=np.float64))
+        if len(self.points) == 0:
+            return np.empty((len(miles), 2))
+        if len(self.points) == 1:
+            return np.repeat(self.points * self.coord_scale, len(miles), axis=0)
+
+        cum = self.cum_miles
+        miles = np.clip(miles, 0.0, cum[-1])
+        upper = np.clip(np.searchsorted(cum, miles, side="left"), 1, len(cum) - 1)
+        lower = upper - 1
+        span = cum[upper] - cum[lower]
+        t = np.divide(
+            miles - cum[lower], span, out=np.zeros_like(miles), where=span > 0
+        )
+        start = self.points[lower] * self.coord_scale
+        end = self.points[upper] * self.coord_scale
+        return start + (end - start) * t[:, np.newaxis]
+
+    def coord_at_mile(self, mile):
+        """Returns ``[lat, lon]`` at ``mile`` along the route, or None if empty."""
+        if len(self.points) == 0:
+            return None
+        return self.coords_at_miles(mile)[0].tolist()
+
+    def locate(self, lat, lon, near_mile=None, window_miles=50.0):
+        """
+        Projects ``(lat, lon)`` onto the nearest segment of the route. Returns
+        ``(mile, [lat, lon] on the route, miles off the route)``, or None if
+        the route is empty.
+
+        With ``near_mile`` (e.g. a truck's last known position) only the
+        segments within ``window_miles`` of it are searched, found by binary
+        search, so following a trip costs O(log n) plus the window instead
+        of a pass over the whole route.
+        """
+        if len(self.points) == 0:
+            return None
+        lo, hi = 0, len(self.points)
+        if near_mile is not None:
+            lo, hi = np.searchsorted(self.cum_miles, [near_mile - window_miles, near_mile + window_miles])
+            lo, hi = max(int(lo) - 1, 0), min(int(hi) + 1, len(self.points))
+        points = self.points[lo:hi] * self.coord_scale
+        cum = np.asarray(self.cum_miles[lo:hi], dtype=np.float64)
+        if len(points) == 1:
+            return float(cum[0]), points[0].tolist(), distance_to_route(lat, lon, points)
+
+        # Same local projection as distance_to_route, centred on the query
+        xy = np.column_stack(
+            [(points[:, 1] - lon) * np.cos(np.radians(lat)), points[:, 0] - lat]
+        ) * MILES_PER_DEGREE
+        start, delta = xy[:-1], np.diff(xy, axis=0)
+        length2 = (delta**2).sum(axis=1)
+        t = np.divide(-(start * delta).sum(axis=1), length2, out=np.zeros(len(delta)), where=length2 > 0)
+        t = np.clip(t, 0.0, 1.0)
+        offsets = np.hypot(*(start + delta * t[:, np.newaxis]).T)
+        best = int(np.argmin(offsets))
+        mile = cum[best] + (cum[best + 1] - cum[best]) * t[best]
+        coord = points[best] + (points[best + 1] - points[best]) * t[best]
+        return float(mile), coord.tolist(), float(offsets[best])
+
+
+def encode_polyline(points, precision=5):
+    """
+    Encodes ``[[lat, lon], ...]`` as a Google/OpenRouteService polyline.
+    Raises ``ValueError`` unless ``points`` is a list of finite, in-range
+    ``[lat, lon]`` pairs.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError("Expected a list of [lat, lon] pairs.")
+    # Anything larger would overflow the int64 deltas
+    if not (np.isfinite(points).all() and (np.abs(points) <= (90.0, 180.0)).all()):
+        raise ValueError("Coordinates must be finite latitudes and longitudes.")
+    scaled = np.rint(points * 10**precision)
+    deltas = np.diff(scaled.astype(np.int64), axis=0, prepend=0).ravel().tolist()
+
+    chunks = []
+    for value in deltas:
+        value = ~(value << 1) if value < 0 else value << 1
+        while value >= 0x20:
+            chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+
+def decode_polyline(encoded, precision=5):
+    """Decodes a Google/OpenRouteService polyline into ``[[lat, lon], ...]``."""
+    values = []
+    value = shift = 0
+    for char in encoded:
+        byte = ord(char) - 63
+        value |= (byte & 0x1F) << shift
+        shift += 5
+        if byte < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+
+    coords = np.cumsum(np.asarray(values, dtype=np.int64).reshape(-1, 2), axis=0)
+    return (coords / 10**precision).tolist()
+
+
+def simplify_route(points, tolerance):
+    """
+    Douglas-Peucker simplification of ``[[lat, lon], ...]``: drops every
+    vertex closer than ``tolerance`` degrees to the simplified line. Each
+    split point is found with one vectorized distance pass over its span.
+    Returns the kept points as an ``(n, 2)`` array.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(points) < 3:
+        return points
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    spans = [(0, len(points) - 1)]
+    while spans:
+        start, end = spans.pop()
+        if end - start < 2:
+            continue
+        first, last = points[start], points[end]
+        inner = points[start + 1 : end] - first
+        d_lat, d_lon = last - first
+        length = np.hypot(d_lat, d_lon)
+        if length > 0:
+            distances = np.abs(d_lat * inner[:, 1] - d_lon * inner[:, 0]) / length
+        else:
+            distances = np.hypot(inner[:, 0], inner[:, 1])
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            spans.append((start, split))
+            spans.append((split, end))
+    return points[keep]
+
+
+# Map zoom levels that get a precomputed simplified route
+ROUTE_LEVEL_ZOOMS = (4, 7, 10, 13)
+
+
+def zoom_tolerance(zoom):
+    """Degrees covered by one 256px-tile pixel at a web map ``zoom`` level."""
+    return 360.0 / (256 * 2**zoom)
+
+
+def route_levels(points, precision=5):
+    """
+    Simplifies ``points`` once per zoom in ROUTE_LEVEL_ZOOMS at a one-pixel
+    tolerance. Returns ``(zoom, tolerance, encoded polyline, vertex count)``
+    tuples, coarsest first.
+    """
+    levels = []
+    for zoom in ROUTE_LEVEL_ZOOMS:
+        tolerance = zoom_tolerance(zoom)
+        simplified = simplify_route(points, tolerance)
+        levels.append(
+            (zoom, tolerance, encode_polyline(simplified, precision), len(simplified))
+        )
+    return levels
+
+
+# Edge of a spatial index cell in degrees, about 17 miles of latitude
+SPATIAL_CELL_DEGREES = 0.25
+MILES_PER_DEGREE = EARTH_RADIUS_MILES * np.pi / 180
+
+
+def densify(points, step):
+    """
+    Adds evenly spaced vertices to every segment of ``[[lat, lon], ...]`` so
+    consecutive vertices are at most ``step`` degrees apart on each axis.
+    Returns an ``(n, 2)`` array.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(points) < 2:
+        return points
+    deltas = np.diff(points, axis=0)
+    counts = np.maximum(np.ceil(np.abs(deltas).max(axis=1) / step), 1).astype(np.int64)
+    segment = np.repeat(np.arange(len(deltas)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    t = (offsets / counts[segment])[:, np.newaxis]
+    return np.vstack([points[segment] + deltas[segment] * t, points[-1:]])
+
+
+def route_cells(points, cell=SPATIAL_CELL_DEGREES):
+    """
+    Unique ``(lat_index, lon_index)`` grid cells (``floor(degrees / cell)``)
+    that ``[[lat, lon], ...]`` passes through, as an ``(n, 2)`` int array.
+    Segments are sampled every half cell, so a segment cutting the corner of
+    a cell may miss it; ``cell_range`` pads queries by a cell to cover that.
+    """
+    samples = densify(points, cell / 2)
+    if not len(samples):
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.floor(samples / cell).astype(np.int64), axis=0)
+
+
+def cell_range(min_lat, min_lon, max_lat, max_lon, cell=SPATIAL_CELL_DEGREES):
+    """
+    ``(lat_lo, lat_hi, lon_lo, lon_hi)`` inclusive cell index ranges covering
+    a bounding box, padded by one cell on every side (see ``route_cells``).
+    """
+    return (
+        int(np.floor(min_lat / cell)) - 1,
+        int(np.floor(max_lat / cell)) + 1,
+        int(np.floor(min_lon / cell)) - 1,
+        int(np.floor(max_lon / cell)) + 1,
+    )
+
+
+def radius_bbox(lat, lon, miles):
+    """``(min_lat, min_lon, max_lat, max_lon)`` around a circle of ``miles``."""
+    d_lat = miles / MILES_PER_DEGREE
+    d_lon = min(miles / (MILES_PER_DEGREE * max(float(np.cos(np.radians(lat))), 1e-6)), 180.0)
+    return lat - d_lat, lon - d_lon, lat + d_lat, lon + d_lon
+
+
+def distance_to_route(lat, lon, points):
+    """
+    Miles from ``(lat, lon)`` to the nearest point of ``[[lat, lon], ...]``
+    (a single point counts as a route), in an equirectangular projection
+    centred on ``(lat, lon)``: accurate to well under 1% within a few hundred
+    miles. Returns ``inf`` for an empty route.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if not len(points):
+        return np.inf
+    xy = np.column_stack(
+        [
+            (points[:, 1] - lon) * np.cos(np.radians(lat)),
+            points[:, 0] - lat,
+        ]
+    ) * MILES_PER_DEGREE
+    if len(xy) == 1:
+        return float(np.hypot(*xy[0]))
+    start, delta = xy[:-1], np.diff(xy, axis=0)
+    length2 = (delta**2).sum(axis=1)
+    t = np.divide(-(start * delta).sum(axis=1), length2, out=np.zeros(len(delta)), where=length2 > 0)
+    nearest = start + delta * np.clip(t, 0.0, 1.0)[:, np.newaxis]
+    return float(np.hypot(nearest[:, 0], nearest[:, 1]).min())
+
+
+def route_intersects_bbox(points, min_lat, min_lon, max_lat, max_lon):
+    """
+    Whether any vertex or segment of ``[[lat, lon], ...]`` touches the box
+    (Liang-Barsky clipping of every segment at once).
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    inside = (
+        (points[:, 0] >= min_lat) & (points[:, 0] <= max_lat)
+        & (points[:, 1] >= min_lon) & (points[:, 1] <= max_lon)
+    )
+    if inside.any() or len(points) < 2:
+        return bool(inside.any())
+    start, delta = points[:-1], np.diff(points, axis=0)
+    p = np.stack([-delta[:, 0], delta[:, 0], -delta[:, 1], delta[:, 1]])
+    q = np.stack(
+        [start[:, 0] - min_lat, max_lat - start[:, 0], start[:, 1] - min_lon, max_lon - start[:, 1]]
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = q / p
+    t0 = np.where(p < 0, ratio, 0.0).max(axis=0)
+    t1 = np.where(p > 0, ratio, 1.0).min(axis=0)
+    parallel_outside = ((p == 0) & (q < 0)).any(axis=0)
+    return bool(((t0 <= t1) & ~parallel_outside).any())
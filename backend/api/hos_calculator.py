@@ -2,28 +2,101 @@
 
 import math
 
+from .duty_log import DutyLog
+
+
+class RollingCycle:
+    """
+    The 70-hour/8-day on-duty window, kept as a ring buffer of daily totals.
+    Rolling to the next day drops the oldest day in O(1), and 34 consecutive
+    hours off duty restart the window.
+    """
+
+    __slots__ = ("_days", "_off_duty_streak", "_today", "_used", "max_hours")
+
+    WINDOW_DAYS = 8
+    RESTART_HOURS = 34.0
+
+    def __init__(self, used_hours=0.0, history=None, max_hours=70.0):
+        """
+        ``history`` lists the on-duty totals of previous days, oldest first.
+        Without it, ``used_hours`` is booked on the previous day, which keeps
+        the hours in the window for as long as they could possibly count.
+        """
+        if history is None:
+            history = [used_hours]
+        history = [float(hours) for hours in history][-(self.WINDOW_DAYS - 1) :]
+
+        self.max_hours = float(max_hours)
+        self._days = [0.0] * self.WINDOW_DAYS
+        self._days[self.WINDOW_DAYS - len(history) :] = history
+        self._today = 0
+        self._used = sum(history)
+        self._off_duty_streak = 0.0
+
+    @property
+    def used(self):
+        """On-duty hours inside the current 8-day window."""
+        return self._used
+
+    @property
+    def remaining(self):
+        return max(0.0, self.max_hours - self._used)
+
+    def add_on_duty(self, hours):
+        self._days[self._today] += hours
+        self._used += hours
+        self._off_duty_streak = 0.0
+
+    def add_off_duty(self, hours):
+        """Adds off-duty time; returns True if it completed a 34-hour restart."""
+        self._off_duty_streak += hours
+        if self._off_duty_streak >= self.RESTART_HOURS:
+            self.restart()
+            return True
+        return False
+
+    def next_day(self):
+        """Moves the window forward one day, dropping the oldest day's hours."""
+        self._today = (self._today + 1) % self.WINDOW_DAYS
+        self._used = max(0.0, self._used - self._days[self._today])
+        self._days[self._today] = 0.0
+
+    def restart(self):
+        self._days = [0.0] * self.WINDOW_DAYS
+        self._used = 0.0
+
 
 class HOSCalculator:
     """
     Calculates driver Hours of Service (HOS) based on FMCSA regulations.
     """
 
-    def __init__(self, current_cycle_hours):
+    # FMCSA Limits (Property-carrying)
+    MAX_DRIVING_HOURS = 11.0
+    MAX_ON_DUTY_HOURS = 14.0
+    MAX_CYCLE_HOURS = 70.0
+    REST_BREAK_REQUIRED_AFTER = 8.0
+    REST_BREAK_MIN_DURATION = 0.5  # 30 minutes
+
+    def __init__(self, current_cycle_hours, cycle_history=None):
         # All hours are in floating-point format
         self.current_driving_hours = 0.0
         self.current_on_duty_hours = 0.0
         self.current_off_duty_hours = 0.0
-        self.current_cycle_hours = float(current_cycle_hours)
-        self.daily_log = []
+        self.cycle = RollingCycle(
+            float(current_cycle_hours),
+            history=cycle_history,
+            max_hours=self.MAX_CYCLE_HOURS,
+        )
+        self.daily_log = DutyLog()
         self.is_rest_break_taken = False
         self.on_duty_since_last_break = 0.0
 
-        # FMCSA Limits (Property-carrying)
-        self.MAX_DRIVING_HOURS = 11.0
-        self.MAX_ON_DUTY_HOURS = 14.0
-        self.MAX_CYCLE_HOURS = 70.0
-        self.REST_BREAK_REQUIRED_AFTER = 8.0
-        self.REST_BREAK_MIN_DURATION = 0.5  # 30 minutes
+    @property
+    def current_cycle_hours(self):
+        """On-duty hours in the rolling 8-day window."""
+        return self.cycle.used
 
     def add_driving_time(self, hours):
         """Adds driving time and updates all relevant counters."""
@@ -31,58 +104,76 @@ class HOSCalculator:
         on_duty_hours_left = self.MAX_ON_DUTY_HOURS - self.current_on_duty_hours
         cycle_hours_left = self.MAX_CYCLE_HOURS - self.current_cycle_hours
 
-        hours_to_drive = min(
-            hours, driving_hours_left, on_duty_hours_left, cycle_hours_left
+        # A limit already overrun by on-duty time leaves nothing to drive
+        hours_to_drive = max(
+            0.0, min(hours, driving_hours_left, on_duty_hours_left, cycle_hours_left)
         )
 
         if hours_to_drive > 0:
             self.current_driving_hours += hours_to_drive
             self.current_on_duty_hours += hours_to_drive
-            self.current_cycle_hours += hours_to_drive
+            self.cycle.add_on_duty(hours_to_drive)
             self.on_duty_since_last_break += hours_to_drive
-            self.daily_log.append(
-                {"type": "Driving", "hours": round(hours_to_drive, 2)}
-            )
+            self.daily_log.append("Driving", hours_to_drive)
 
         return hours - hours_to_drive
 
+    def add_on_duty_time(self, hours):
+        """Adds on-duty (not driving) time, e.g. loading or fueling."""
+        self.current_on_duty_hours += hours
+        self.cycle.add_on_duty(hours)
+        self.daily_log.append("On Duty (not driving)", hours)
+
     def take_rest_break(self):
         """Adds a 30-minute rest break to the log."""
         if not self.is_rest_break_taken:
-            self.daily_log.append(
-                {"type": "Off Duty", "hours": self.REST_BREAK_MIN_DURATION}
-            )
+            self.daily_log.append("Off Duty", self.REST_BREAK_MIN_DURATION)
             self.is_rest_break_taken = True
             self.current_off_duty_hours += self.REST_BREAK_MIN_DURATION
+            self.cycle.add_off_duty(self.REST_BREAK_MIN_DURATION)
             self.on_duty_since_last_break = 0.0
             return True
         return False
 
     def end_day_with_rest(self):
         """Fills the remaining time in a day with rest to reach 24 hours."""
-        total_daily_hours = (
-            self.current_driving_hours
-            + self.current_on_duty_hours
-            + self.current_off_duty_hours
-        )
+        # Driving time is already counted in current_on_duty_hours
+        total_daily_hours = self.current_on_duty_hours + self.current_off_duty_hours
         remaining_hours = 24.0 - total_daily_hours
 
         if remaining_hours > 0:
-            self.daily_log.append(
-                {"type": "Sleeper Berth", "hours": round(remaining_hours, 2)}
-            )
+            self.daily_log.append("Sleeper Berth", remaining_hours)
+            self.current_off_duty_hours += remaining_hours
+            self.cycle.add_off_duty(remaining_hours)
             return True
         return False
 
+    def take_restart(self):
+        """
+        Spends whole days off duty until a 34-hour restart resets the cycle.
+        Call at the start of a day; returns the logs of the days taken off.
+        """
+        days_off = []
+        while True:
+            self.daily_log.append("Off Duty", 24.0)
+            self.current_off_duty_hours += 24.0
+            days_off.append(self.daily_log)
+            restarted = self.cycle.add_off_duty(24.0)
+            self.reset_for_new_day()
+            if restarted:
+                return days_off
+
     def reset_for_new_day(self):
         """Resets daily counters for the next 24-hour period."""
+        self.cycle.next_day()
         self.current_driving_hours = 0.0
         self.current_on_duty_hours = 0.0
         self.current_off_duty_hours = 0.0
         self.is_rest_break_taken = False
         self.on_duty_since_last_break = 0.0
+        # Start a fresh log so logs already returned by get_log() are kept intact
+        self.daily_log = DutyLog()
 
     def get_log(self):
-        """Returns the current daily log."""
+        """Returns the current daily log as a compact DutyLog."""
         return self.daily_log
-
@@ -0,0 +1,251 @@
+# backend/api/log_sheet.py
+
+import functools
+import hashlib
+import struct
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+import numpy as np
+
+from .duty_log import DUTY_STATUSES, DutyLog
+
+
+# Bump when the drawing changes so cached sheets are rendered again
+RENDER_VERSION = 1
+
+DEFAULT_LOG_SHEET_CACHE = {
+    "ALIAS": "default",  # entry in settings.CACHES
+    "TIMEOUT": 7 * 24 * 60 * 60,  # seconds; sheets never change for a given log
+}
+
+FORMATS = {"svg": "image/svg+xml", "png": "image/png"}
+
+# Layout in pixels, shared by both formats
+LABEL_WIDTH = 120
+HOUR_WIDTH = 32
+TOTAL_WIDTH = 72
+HEADER_HEIGHT = 24
+ROW_HEIGHT = 36
+GRID_LEFT = LABEL_WIDTH
+GRID_RIGHT = GRID_LEFT + 24 * HOUR_WIDTH
+WIDTH = GRID_RIGHT + TOTAL_WIDTH
+HEIGHT = HEADER_HEIGHT + len(DUTY_STATUSES) * ROW_HEIGHT + 12
+MINUTES_PER_DAY = 24 * 60
+
+# PNG palette indices
+WHITE, LIGHT, DARK, INK = range(4)
+PALETTE = bytes([255, 255, 255, 209, 213, 219, 75, 85, 99, 29, 78, 216])
+COLORS = {LIGHT: "#d1d5db", DARK: "#4b5563", INK: "#1d4ed8"}
+
+# Row labels drawn with the PNG's 3x5 pixel font
+SHORT_LABELS = ("OFF", "SB", "D", "ON")
+GLYPHS = {
+    "0": ("111", "101", "101", "101", "111"),
+    "1": ("010", "110", "010", "010", "111"),
+    "2": ("111", "001", "111", "100", "111"),
+    "3": ("111", "001", "111", "001", "111"),
+    "4": ("101", "101", "111", "001", "001"),
+    "5": ("111", "100", "111", "001", "111"),
+    "6": ("111", "100", "111", "101", "111"),
+    "7": ("111", "001", "001", "001", "001"),
+    "8": ("111", "101", "111", "101", "111"),
+    "9": ("111", "101", "111", "001", "111"),
+    ".": ("000", "000", "000", "000", "010"),
+    "B": ("110", "101", "110", "101", "110"),
+    "D": ("110", "101", "101", "101", "110"),
+    "F": ("111", "100", "110", "100", "100"),
+    "N": ("101", "111", "111", "101", "101"),
+    "O": ("111", "101", "101", "101", "111"),
+    "S": ("111", "100", "111", "001", "111"),
+}
+GLYPH_SCALE = 2
+
+
+def minute_x(minute):
+    return GRID_LEFT + round(min(minute, MINUTES_PER_DAY) * HOUR_WIDTH / 60)
+
+
+def row_top(status):
+    return HEADER_HEIGHT + status * ROW_HEIGHT
+
+
+def row_center(status):
+    return row_top(status) + ROW_HEIGHT // 2
+
+
+def duty_path(log):
+    """
+    ``(x, y)`` vertices of the duty-status line: two per segment, at its
+    start and end on its status row. Anything past midnight is clipped.
+    """
+    points = []
+    start = 0
+    for status, minutes in zip(log.statuses, log.minutes, strict=True):
+        y = row_center(status)
+        points.append((minute_x(start), y))
+        start += minutes
+        points.append((minute_x(start), y))
+    return points
+
+
+def status_totals(log):
+    """Hours per status, in DUTY_STATUSES order."""
+    totals = [0] * len(DUTY_STATUSES)
+    for status, minutes in zip(log.statuses, log.minutes, strict=True):
+        totals[status] += minutes
+    return [minutes / 60 for minutes in totals]
+
+
+@functools.cache
+def svg_grid():
+    """The static part of an SVG sheet: labels, hour lines and ticks."""
+    parts = [f'<rect width="{WIDTH}" height="{HEIGHT}" fill="#fff"/>']
+    bottom = row_top(len(DUTY_STATUSES))
+    for status, label in enumerate(DUTY_STATUSES):
+        top = row_top(status)
+        parts.append(
+            f'<rect x="{GRID_LEFT}" y="{top}" width="{GRID_RIGHT - GRID_LEFT}" '
+            f'height="{ROW_HEIGHT}" fill="none" stroke="{COLORS[DARK]}"/>'
+        )
+        parts.append(f'<text x="6" y="{row_center(status) + 4}">{label}</text>')
+    for quarter in range(1, 24 * 4):
+        x = minute_x(quarter * 15)
+        if quarter % 4 == 0:
+            parts.append(f'<line x1="{x}" y1="{HEADER_HEIGHT}" x2="{x}" y2="{bottom}" stroke="{COLORS[DARK]}"/>')
+            continue
+        tick = ROW_HEIGHT // (3 if quarter % 2 == 0 else 5)
+        for status in range(len(DUTY_STATUSES)):
+            top = row_top(status)
+            parts.append(f'<line x1="{x}" y1="{top}" x2="{x}" y2="{top + tick}" stroke="{COLORS[LIGHT]}"/>')
+    for hour in range(25):
+        parts.append(f'<text x="{minute_x(hour * 60)}" y="{HEADER_HEIGHT - 8}" text-anchor="middle">{hour % 24}</text>')
+    parts.append(f'<text x="{GRID_RIGHT + TOTAL_WIDTH // 2}" y="{HEADER_HEIGHT - 8}" text-anchor="middle">Total</text>')
+    return "".join(parts)
+
+
+def render_svg(log):
+    points = " ".join(f"{x},{y}" for x, y in duty_path(log))
+    totals = "".join(
+        f'<text x="{WIDTH - 8}" y="{row_center(status) + 4}" text-anchor="end">{hours:.2f}</text>'
+        for status, hours in enumerate(status_totals(log))
+    )
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH}" height="{HEIGHT}" '
+        f'viewBox="0 0 {WIDTH} {HEIGHT}" font-family="sans-serif" font-size="12">'
+        f"{svg_grid()}"
+        f'<polyline points="{points}" fill="none" stroke="{COLORS[INK]}" stroke-width="3"/>'
+        f"{totals}</svg>"
+    ).encode()
+
+
+def draw_text(pixels, x, y, text, color=DARK):
+    """Draws ``text`` with its top-left corner at ``(x, y)``; unknown characters are skipped."""
+    for char in text:
+        glyph = GLYPHS.get(char)
+        if glyph is not None:
+            mask = np.array([[bit == "1" for bit in row] for row in glyph])
+            mask = mask.repeat(GLYPH_SCALE, axis=0).repeat(GLYPH_SCALE, axis=1)
+            area = pixels[y : y + mask.shape[0], x : x + mask.shape[1]]
+            area[mask[: area.shape[0], : area.shape[1]]] = color
+        x += 4 * GLYPH_SCALE
+
+
+def text_width(text):
+    return len(text) * 4 * GLYPH_SCALE - GLYPH_SCALE
+
+
+@functools.cache
+def png_grid():
+    """The static part of a PNG sheet as palette indices, rendered once (read-only)."""
+    pixels = np.full((HEIGHT, WIDTH), WHITE, dtype=np.uint8)
+    bottom = row_top(len(DUTY_STATUSES))
+    for quarter in range(1, 24 * 4):
+        x = minute_x(quarter * 15)
+        if quarter % 4 == 0:
+            pixels[HEADER_HEIGHT:bottom, x] = DARK
+            continue
+        tick = ROW_HEIGHT // (3 if quarter % 2 == 0 else 5)
+        for status in range(len(DUTY_STATUSES)):
+            top = row_top(status)
+            pixels[top : top + tick, x] = LIGHT
+    for status, label in enumerate(SHORT_LABELS):
+        top = row_top(status)
+        pixels[top, GRID_LEFT:GRID_RIGHT + 1] = DARK
+        draw_text(pixels, 8, row_center(status) - 5, label)
+    pixels[bottom, GRID_LEFT:GRID_RIGHT + 1] = DARK
+    pixels[HEADER_HEIGHT:bottom, [GRID_LEFT, GRID_RIGHT]] = DARK
+    for hour in range(25):
+        label = str(hour % 24)
+        draw_text(pixels, minute_x(hour * 60) - text_width(label) // 2, 6, label)
+    pixels.setflags(write=False)
+    return pixels
+
+
+def encode_png(pixels, palette=PALETTE):
+    """Encodes a 2-D array of palette indices as an 8-bit indexed PNG."""
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    height, width = pixels.shape
+    scanlines = np.zeros((height, width + 1), dtype=np.uint8)  # filter byte 0 per row
+    scanlines[:, 1:] = pixels
+    return b"".join(
+        [
+            b"\x89PNG\r\n\x1a\n",
+            chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)),
+            chunk(b"PLTE", palette),
+            chunk(b"IDAT", zlib.compress(scanlines.tobytes(), 6)),
+            chunk(b"IEND", b""),
+        ]
+    )
+
+
+def render_png(log):
+    pixels = png_grid().copy()
+    previous = None
+    path = duty_path(log)
+    for (x0, y), (x1, _) in zip(path[::2], path[1::2], strict=True):
+        pixels[y - 1 : y + 2, x0 : x1 + 1] = INK
+        if previous is not None and previous != y:
+            pixels[min(previous, y) - 1 : max(previous, y) + 2, x0 - 1 : x0 + 2] = INK
+        previous = y
+    for status, hours in enumerate(status_totals(log)):
+        label = f"{hours:.2f}"
+        draw_text(pixels, WIDTH - 8 - text_width(label), row_center(status) - 5, label, INK)
+    return encode_png(pixels)
+
+
+RENDERERS = {"svg": render_svg, "png": render_png}
+
+
+def sheet_digest(log, fmt):
+    """Content hash of the sheet ``log`` renders to in ``fmt``."""
+    key = f"{RENDER_VERSION}|{fmt}|{log.to_json()}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def render_log_sheet(log, fmt="svg"):
+    """
+    Renders a DutyLog as a 24-hour ELD grid sheet (``fmt`` is "svg" or
+    "png") and returns ``(content, digest)``. Sheets are cached under the
+    digest of the log's segments, so a log is only drawn once however many
+    daily logs or requests share it; the grid itself is drawn once per
+    process.
+    """
+    if fmt not in RENDERERS:
+        raise ValueError(f"Unknown log sheet format: {fmt}.")
+    if not isinstance(log, DutyLog):
+        raise ValueError("Daily log has no duty segments to draw.")
+    options = {**DEFAULT_LOG_SHEET_CACHE, **getattr(settings, "LOG_SHEET_CACHE", {})}
+    cache = caches[options["ALIAS"]]
+    digest = sheet_digest(log, fmt)
+    key = f"log-sheet:{digest}"
+    content = cache.get(key)
+    if content is None:
+        content = RENDERERS[fmt](log)
+        cache.set(key, content, timeout=options["TIMEOUT"])
+    return content, digest
@@ -0,0 +1,383 @@
+# backend/api/planner.py
+
+import numpy as np
+
+from .duty_log import DRIVING, OFF_DUTY, ON_DUTY, SLEEPER_BERTH, DutyLog
+from .geometry import RouteProfile
+from .hos_calculator import HOSCalculator, RollingCycle
+
+
+# Planning assumptions (match the client-side planner)
+AVERAGE_SPEED_MPH = 55.0
+FUEL_INTERVAL_MILES = 1000.0
+FUEL_STOP_HOURS = 0.5
+PICKUP_DROPOFF_HOURS = 1.0
+
+# Snapping stops to fuel stations (see plan_trip's ``stations``): how far
+# back along the route from where a stop falls due to look for a station,
+# sampled every SNAP_SAMPLE_MILES
+FUEL_SNAP_WINDOW_MILES = 100.0
+REST_SNAP_WINDOW_MILES = 30.0
+SNAP_SAMPLE_MILES = 1.0
+
+# Longest trip the planner schedules (several coast-to-coast runs);
+# the schedule loop runs once per stop, so the distance has to be bounded
+MAX_TRIP_MILES = 20_000.0
+# Most trips plan_trips_batch takes in one call
+MAX_BATCH_TRIPS = 10_000
+
+# Anything below this is float noise left over from hour arithmetic
+_EPSILON = 1e-6
+
+
+def check_trip_numbers(total_miles, cycle_hours_used):
+    """
+    Raises ValueError unless ``total_miles`` (a number or an array) is
+    within 0..MAX_TRIP_MILES and ``cycle_hours_used`` within the 70-hour
+    cycle. NaN and infinity fail both checks.
+    """
+    miles = np.asarray(total_miles, dtype=np.float64)
+    cycle = np.asarray(cycle_hours_used, dtype=np.float64)
+    if not ((miles >= 0) & (miles <= MAX_TRIP_MILES)).all():
+        raise ValueError(f"total_miles must be between 0 and {MAX_TRIP_MILES:g}.")
+    if not ((cycle >= 0) & (cycle <= HOSCalculator.MAX_CYCLE_HOURS)).all():
+        raise ValueError(f"Cycle hours must be between 0 and {HOSCalculator.MAX_CYCLE_HOURS:g}.")
+
+
+def snap_to_station(stations, profile, scale, due_mile, window, min_mile=0.0):
+    """
+    Finds the stop nearest to ``due_mile`` (never past it) in the last
+    ``window`` miles before it, and after ``min_mile``, that has a station
+    within the index's detour limit of the route. All samples are looked up
+    in one batch. Returns ``(mile, station dict, detour miles)``, or None.
+    """
+    start = max(min_mile + _EPSILON, due_mile - window)
+    if due_mile <= start:
+        return None
+    miles = np.arange(due_mile, start, -SNAP_SAMPLE_MILES)  # latest first
+    found, detours = stations.nearest(profile.coords_at_miles(miles * scale))
+    hits = np.flatnonzero(found >= 0)
+    if not len(hits):
+        return None
+    first = hits[0]
+    return float(miles[first]), stations.stations[found[first]], float(detours[first])
+
+
+def plan_trip(
+    route,
+    current_cycle_hours,
+    total_miles=None,
+    pickup_location="",
+    dropoff_location="",
+    cycle_history=None,
+    stations=None,
+):
+    """
+    Builds the stops and daily logs for a ``[[lat, lon], ...]`` route (or a
+    RouteProfile, e.g. a saved trip's) using HOSCalculator. Stop coordinates
+    are resolved in a single vectorized lookup against the route's
+    cumulative mileage once the schedule is known.
+
+    ``cycle_history`` optionally lists the driver's on-duty hours for the
+    previous days (oldest first) so they roll out of the 8-day window on
+    the right day; see RollingCycle.
+
+    With a FuelStationIndex as ``stations``, fuel and rest stops are moved
+    back along the route to the last point near a real station before they
+    fall due (see snap_to_station), and the schedule is driven to those
+    points, so the logs stay within the HOS and fuel-range limits. Snapped
+    stops carry the ``station`` and its ``detour_miles``.
+
+    Raises ValueError for distances or cycle hours outside check_trip_numbers'
+    bounds.
+    """
+    profile = route if isinstance(route, RouteProfile) else RouteProfile(route)
+    if total_miles is None:
+        total_miles = profile.total_miles
+    total_miles = float(total_miles)
+    check_trip_numbers(total_miles, current_cycle_hours)
+    if cycle_history is not None:
+        check_trip_numbers(0.0, cycle_history)
+    # Stop miles come from driving time; scale them onto the polyline's length
+    scale = profile.total_miles / total_miles if total_miles > 0 else 0.0
+    if len(profile.points) < 2:
+        stations = None
+
+    calc = HOSCalculator(current_cycle_hours, cycle_history=cycle_history)
+    daily_logs = []
+    stops = []  # (mile, stop) pairs; coords are filled in at the end
+
+    def add_stop(mile, name, location, details, kind, snapped=None):
+        stop = {
+            "name": name,
+            "location": location,
+            "details": details,
+            "kind": kind,
+            "mile": round(mile, 1),
+        }
+        if snapped is not None:
+            stop["station"] = snapped[1]
+            stop["detour_miles"] = round(snapped[2], 2)
+        stops.append((mile, stop))
+
+    def next_fuel_stop(due_mile, after_mile):
+        """``(mile, snapped)`` of the fuel stop for a tank that runs dry at ``due_mile``."""
+        if stations is None or due_mile >= total_miles:
+            return due_mile, None
+        snapped = snap_to_station(stations, profile, scale, due_mile, FUEL_SNAP_WINDOW_MILES, after_mile)
+        return (snapped[0], snapped) if snapped else (due_mile, None)
+
+    add_stop(0.0, "Pickup", pickup_location, "1 hour for pickup", "pickup")
+    calc.add_on_duty_time(PICKUP_DROPOFF_HOURS)
+
+    remaining_hours = total_miles / AVERAGE_SPEED_MPH
+    driven_miles = 0.0
+    next_fuel_at, fuel_station = next_fuel_stop(FUEL_INTERVAL_MILES, 0.0)
+
+    while remaining_hours > _EPSILON:
+        hours_to_break = calc.REST_BREAK_REQUIRED_AFTER - calc.on_duty_since_last_break
+        hours_to_fuel = (next_fuel_at - driven_miles) / AVERAGE_SPEED_MPH
+        chunk = min(remaining_hours, hours_to_break, hours_to_fuel)
+        rest_station = None
+        if stations is not None:
+            hours_to_limit = min(
+                calc.MAX_DRIVING_HOURS - calc.current_driving_hours,
+                calc.MAX_ON_DUTY_HOURS - calc.current_on_duty_hours,
+                calc.cycle.remaining,
+            )
+            if 0 < hours_to_limit < chunk:
+                # The day ends in this stretch: stop at the last station before it
+                day_end = driven_miles + hours_to_limit * AVERAGE_SPEED_MPH
+                rest_station = snap_to_station(
+                    stations, profile, scale, day_end, REST_SNAP_WINDOW_MILES, driven_miles
+                )
+                if rest_station is not None:
+                    chunk = (rest_station[0] - driven_miles) / AVERAGE_SPEED_MPH
+        if chunk > 0:
+            driven = chunk - calc.add_driving_time(chunk)
+            remaining_hours -= driven
+            driven_miles += driven * AVERAGE_SPEED_MPH
+        if remaining_hours <= _EPSILON:
+            break
+
+        if driven_miles >= next_fuel_at - _EPSILON:
+            add_stop(
+                next_fuel_at,
+                "Fuel",
+                f"Fuel stop at mile {round(next_fuel_at)}",
+                "30 minutes fuel/check",
+                "fuel",
+                fuel_station,
+            )
+            calc.add_on_duty_time(FUEL_STOP_HOURS)
+            next_fuel_at, fuel_station = next_fuel_stop(next_fuel_at + FUEL_INTERVAL_MILES, next_fuel_at)
+            continue
+
+        if (
+            rest_station is None
+            and calc.on_duty_since_last_break >= calc.REST_BREAK_REQUIRED_AFTER
+            and calc.take_rest_break()
+        ):
+            continue
+
+        # A daily or cycle limit stopped the driving: close out the day
+        calc.end_day_with_rest()
+        daily_logs.append(calc.get_log())
+        day = len(daily_logs)
+        add_stop(
+            driven_miles,
+            f"Rest Stop (Day {day})",
+            f"End of driving day {day}",
+            "Off-duty until the next driving window",
+            "rest",
+            rest_station,
+        )
+        calc.reset_for_new_day()
+        if calc.cycle.remaining <= _EPSILON:
+            # Nothing rolled out of the 8-day window: take a 34-hour restart
+            daily_logs.extend(calc.take_restart())
+
+    add_stop(total_miles, "Dropoff", dropoff_location, "1 hour for drop-off", "dropoff")
+    calc.add_on_duty_time(PICKUP_DROPOFF_HOURS)
+    calc.end_day_with_rest()
+    daily_logs.append(calc.get_log())
+
+    coords = profile.coords_at_miles([mile * scale for mile, _ in stops])
+    for (_, stop), coord in zip(stops, coords.tolist(), strict=True):
+        if "station" in stop:
+            coord = [stop["station"]["lat"], stop["station"]["lon"]]
+        stop["coords"] = coord if len(profile.points) else None
+
+    return {
+        "total_miles": round(total_miles, 1),
+        "stops": [stop for _, stop in stops],
+        "daily_logs": daily_logs,
+    }
+
+
+def plan_trips_batch(total_miles, cycle_hours_used):
+    """
+    Plans the daily logs for many trips at once.
+
+    Follows the same schedule as ``plan_trip`` (pickup, 30-minute break, fuel
+    stops, daily limits, rolling 8-day cycle with 34-hour restarts, dropoff),
+    but every step is applied to all trips still on the road as NumPy array
+    operations, so the Python-level loop runs once per schedule step rather
+    than once per trip.
+    Returns one list of daily DutyLogs per trip, in input order.
+
+    Raises ValueError for more than MAX_BATCH_TRIPS trips or numbers outside
+    check_trip_numbers' bounds.
+    """
+    miles = np.asarray(total_miles, dtype=np.float64)
+    cycle_used = np.array(cycle_hours_used, dtype=np.float64)
+    if miles.ndim != 1 or miles.shape != cycle_used.shape:
+        raise ValueError(
+            "total_miles and cycle_hours_used must be flat lists of equal length."
+        )
+    if len(miles) > MAX_BATCH_TRIPS:
+        raise ValueError(f"At most {MAX_BATCH_TRIPS} trips per batch.")
+    check_trip_numbers(miles, cycle_used)
+
+    n = len(miles)
+    every_trip = np.arange(n)
+    remaining = miles / AVERAGE_SPEED_MPH
+    driven_miles = np.zeros(n)
+    next_fuel_at = np.full(n, FUEL_INTERVAL_MILES)
+    driving = np.zeros(n)
+    on_duty = np.zeros(n)
+    off_duty = np.zeros(n)
+    since_break = np.zeros(n)
+    break_taken = np.zeros(n, dtype=bool)
+    day = np.zeros(n, dtype=np.int64)
+
+    # RollingCycle per trip: one ring buffer row each, with the prior hours
+    # booked on the day before the trip starts
+    window_days = RollingCycle.WINDOW_DAYS
+    cycle_window = np.zeros((n, window_days))
+    cycle_window[:, -1] = cycle_used
+    off_duty_streak = np.zeros(n)
+
+    # (trip, day, status code, minutes) arrays, appended in chronological order
+    records = []
+
+    def record(idx, status, hours):
+        if len(idx):
+            minutes = np.broadcast_to(np.rint(np.asarray(hours) * 60), idx.shape)
+            records.append((idx, day[idx], np.full(len(idx), status), minutes))
+
+    def book_on_duty(idx, hours):
+        cycle_window[idx, day[idx] % window_days] += hours
+        cycle_used[idx] += hours
+        off_duty_streak[idx] = 0.0
+
+    def book_off_duty(idx, hours):
+        """Returns a mask of the trips whose off-duty stretch was a restart."""
+        off_duty_streak[idx] += hours
+        restarted = off_duty_streak[idx] >= RollingCycle.RESTART_HOURS
+        cycle_window[idx[restarted]] = 0.0
+        cycle_used[idx[restarted]] = 0.0
+        return restarted
+
+    def next_day(idx):
+        day[idx] += 1
+        slot = day[idx] % window_days
+        cycle_used[idx] = np.maximum(0.0, cycle_used[idx] - cycle_window[idx, slot])
+        cycle_window[idx, slot] = 0.0
+
+    def add_on_duty_time(idx, hours):
+        on_duty[idx] += hours
+        book_on_duty(idx, hours)
+        record(idx, ON_DUTY, hours)
+
+    def end_day_with_rest(idx):
+        rest = 24.0 - on_duty[idx] - off_duty[idx]
+        has_rest = rest > 0
+        record(idx[has_rest], SLEEPER_BERTH, rest[has_rest])
+        book_off_duty(idx[has_rest], rest[has_rest])
+
+    add_on_duty_time(every_trip, PICKUP_DROPOFF_HOURS)
+
+    while True:
+        idx = np.flatnonzero(remaining > _EPSILON)
+        if not len(idx):
+            break
+
+        chunk = np.minimum.reduce(
+            [
+                remaining[idx],
+                HOSCalculator.REST_BREAK_REQUIRED_AFTER - since_break[idx],
+                (next_fuel_at[idx] - driven_miles[idx]) / AVERAGE_SPEED_MPH,
+                HOSCalculator.MAX_DRIVING_HOURS - driving[idx],
+                HOSCalculator.MAX_ON_DUTY_HOURS - on_duty[idx],
+                HOSCalculator.MAX_CYCLE_HOURS - cycle_used[idx],
+            ]
+        )
+        drove = chunk > 0
+        d_idx, hours = idx[drove], chunk[drove]
+        driving[d_idx] += hours
+        on_duty[d_idx] += hours
+        book_on_duty(d_idx, hours)
+        since_break[d_idx] += hours
+        remaining[d_idx] -= hours
+        driven_miles[d_idx] += hours * AVERAGE_SPEED_MPH
+        record(d_idx, DRIVING, hours)
+
+        idx = idx[remaining[idx] > _EPSILON]
+
+        needs_fuel = driven_miles[idx] >= next_fuel_at[idx] - _EPSILON
+        f_idx = idx[needs_fuel]
+        add_on_duty_time(f_idx, FUEL_STOP_HOURS)
+        next_fuel_at[f_idx] += FUEL_INTERVAL_MILES
+        idx = idx[~needs_fuel]
+
+        needs_break = (
+            since_break[idx] >= HOSCalculator.REST_BREAK_REQUIRED_AFTER
+        ) & ~break_taken[idx]
+        b_idx = idx[needs_break]
+        record(b_idx, OFF_DUTY, HOSCalculator.REST_BREAK_MIN_DURATION)
+        break_taken[b_idx] = True
+        off_duty[b_idx] += HOSCalculator.REST_BREAK_MIN_DURATION
+        book_off_duty(b_idx, HOSCalculator.REST_BREAK_MIN_DURATION)
+        since_break[b_idx] = 0.0
+        idx = idx[~needs_break]
+
+        # Whatever is left hit a daily or cycle limit: close out the day
+        end_day_with_rest(idx)
+        next_day(idx)
+        driving[idx] = on_duty[idx] = off_duty[idx] = since_break[idx] = 0.0
+        break_taken[idx] = False
+
+        # Nothing rolled out of the 8-day window: whole days off until restart
+        resting = idx[HOSCalculator.MAX_CYCLE_HOURS - cycle_used[idx] <= _EPSILON]
+        while len(resting):
+            record(resting, OFF_DUTY, 24.0)
+            restarted = book_off_duty(resting, 24.0)
+            next_day(resting)
+            resting = resting[~restarted]
+
+    add_on_duty_time(every_trip, PICKUP_DROPOFF_HOURS)
+    end_day_with_rest(every_trip)
+
+    if not records:
+        return [[] for _ in range(n)]
+    trip_col, day_col, status_col, minutes_col = (
+        np.concatenate(column) for column in zip(*records, strict=True)
+    )
+    order = np.argsort(trip_col, kind="stable")
+    trip_col, day_col = trip_col[order], day_col[order]
+    statuses = status_col[order].tolist()
+    minutes = minutes_col[order].astype(np.int64).tolist()
+
+    # Each (trip, day) run of segments becomes one DutyLog
+    starts = np.flatnonzero(
+        np.r_[True, (trip_col[1:] != trip_col[:-1]) | (day_col[1:] != day_col[:-1])]
+    )
+    ends = np.r_[starts[1:], len(trip_col)]
+
+    logs = [[] for _ in range(n)]
+    for trip, start, end in zip(
+        trip_col[starts].tolist(), starts.tolist(), ends.tolist(), strict=True
+    ):
+        logs[trip].append(DutyLog.from_arrays(statuses[start:end], minutes[start:end]))
+    return logs
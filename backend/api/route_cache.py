@@ -0,0 +1,164 @@
+# backend/api/route_cache.py
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+DEFAULT_ROUTE_CACHE = {
+    "MAX_ENTRIES": 512,
+    "TTL": 24 * 60 * 60,  # seconds
+    "PATH": None,  # no disk tier
+    "PRECISION": 4,  # decimal places, ~11 m
+}
+
+
+class RouteCache:
+    """
+    Two-tier cache for routing responses: a bounded in-process LRU in front of
+    an SQLite file that every worker process on the host shares. Entries
+    expire ``ttl`` seconds after they were stored, in both tiers.
+    """
+
+    # Expired disk rows are purged once every this many writes
+    PURGE_EVERY = 100
+
+    def __init__(self, max_entries=512, ttl=86400, path=None, precision=4):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = str(path) if path else None
+        self.precision = precision
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS route_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+
+    @classmethod
+    def from_settings(cls):
+        options = {**DEFAULT_ROUTE_CACHE, **getattr(settings, "ROUTE_CACHE", {})}
+        return cls(
+            max_entries=options["MAX_ENTRIES"],
+            ttl=options["TTL"],
+            path=options["PATH"],
+            precision=options["PRECISION"],
+        )
+
+    def quantize(self, point):
+        """Rounds a ``{"lat", "lng"}`` dict to the cache's grid as ``(lat, lng)``."""
+        return (
+            round(float(point["lat"]), self.precision),
+            round(float(point["lng"]), self.precision),
+        )
+
+    def key(self, origin, destination):
+        """Cache key for an origin/destination pair of ``{"lat", "lng"}`` dicts."""
+        return ";".join(
+            f"{lat},{lng}" for lat, lng in map(self.quantize, (origin, destination))
+        )
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call is safe across threads and forks
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """Returns the cached value for ``key``, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+        if self.path:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM route_cache "
+                    "WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+            if row is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(key, row[0], row[1])
+                return row[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self._writes += 1
+            purge = self._writes % self.PURGE_EVERY == 0
+
+        if self.path:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO route_cache (key, value, expires_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, value, expires_at),
+                )
+                if purge:
+                    conn.execute(
+                        "DELETE FROM route_cache WHERE expires_at <= ?", (time.time(),)
+                    )
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM route_cache")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+            }
+
+
+_route_cache = None
+_route_cache_lock = threading.Lock()
+
+
+def get_route_cache():
+    """Returns the process-wide RouteCache configured by ``settings.ROUTE_CACHE``."""
+    global _route_cache
+    if _route_cache is None:
+        with _route_cache_lock:
+            if _route_cache is None:
+                _route_cache = RouteCache.from_settings()
+    return _route_cache
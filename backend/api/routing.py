@@ -0,0 +1,117 @@
+# backend/api/routing.py
+
+import asyncio
+import itertools
+import json
+import math
+
+from django.conf import settings
+
+from .geometry import decode_polyline
+from .route_cache import get_route_cache
+from .upstream import get_upstream_client
+
+
+METERS_PER_MILE = 1609.344
+
+# One upstream call per leg, all in flight at once
+MAX_WAYPOINTS = 25
+
+
+def check_waypoints(waypoints):
+    """
+    Returns ``waypoints`` as ``{"lat", "lng"}`` dicts of floats. Raises
+    ``ValueError`` unless there are 2 to MAX_WAYPOINTS of them, each with a
+    finite latitude in [-90, 90] and longitude in [-180, 180].
+    """
+    if not isinstance(waypoints, list) or not 2 <= len(waypoints) <= MAX_WAYPOINTS:
+        raise ValueError(f"Send 2 to {MAX_WAYPOINTS} waypoints.")
+    checked = []
+    for waypoint in waypoints:
+        try:
+            lat, lng = waypoint["lat"], waypoint["lng"]
+        except (KeyError, TypeError):
+            raise ValueError("Each waypoint needs a lat and a lng.") from None
+        if not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in (lat, lng)):
+            raise ValueError("Waypoint lat and lng must be numbers.")
+        if not (math.isfinite(lat) and math.isfinite(lng) and -90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValueError("Waypoint lat and lng are out of range.")
+        checked.append({"lat": float(lat), "lng": float(lng)})
+    return checked
+
+
+def fetch_directions(origin, destination):
+    """
+    Returns the OpenRouteService directions JSON (text) for one leg between
+    two ``{"lat", "lng"}`` points, from the route cache when possible.
+    Raises ``requests.RequestException`` if the upstream call fails.
+    """
+    # Same lane requested recently: skip the upstream call
+    route_cache = get_route_cache()
+    cache_key = route_cache.key(origin, destination)
+    cached = route_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # OpenRouteService API endpoint
+    url = f"{settings.OPENROUTESERVICE_URL}/v2/directions/driving-car"
+    headers = {
+        "Accept": "application/json",
+        "Authorization": settings.OPENROUTESERVICE_API_KEY,
+        "Content-Type": "application/json",
+    }
+    # Route the quantized points so every request sharing a key gets the
+    # same answer
+    origin_lat, origin_lng = route_cache.quantize(origin)
+    dest_lat, dest_lng = route_cache.quantize(destination)
+    body = {"coordinates": [[origin_lng, origin_lat], [dest_lng, dest_lat]]}
+
+    # Make request over the shared keep-alive pool (timeouts + retries)
+    response = get_upstream_client().post(url, headers=headers, data=json.dumps(body))
+    response.raise_for_status()
+
+    route_cache.set(cache_key, response.text)
+    return response.text
+
+
+def parse_directions(text):
+    """
+    Extracts ``(points, distance_meters, duration_seconds)`` from a directions
+    response, with points as ``[[lat, lon], ...]``.
+    """
+    route = json.loads(text)["routes"][0]
+    summary = route.get("summary", {})
+    return (
+        decode_polyline(route["geometry"]),
+        summary.get("distance", 0.0),
+        summary.get("duration", 0.0),
+    )
+
+
+async def fetch_route(waypoints):
+    """
+    Routes through ``waypoints`` (``{"lat", "lng"}`` dicts), fetching every
+    leg concurrently, and merges the legs into one route.
+    """
+    texts = await asyncio.gather(
+        *(
+            asyncio.to_thread(fetch_directions, origin, destination)
+            for origin, destination in itertools.pairwise(waypoints)
+        )
+    )
+
+    route, legs = [], []
+    for text in texts:
+        points, distance, duration = parse_directions(text)
+        # Each leg starts where the previous one ended
+        route.extend(points[1:] if route else points)
+        legs.append({"distance_meters": distance, "duration_seconds": duration})
+
+    distance = sum(leg["distance_meters"] for leg in legs)
+    return {
+        "route": route,
+        "total_miles": round(distance / METERS_PER_MILE, 1),
+        "distance_meters": distance,
+        "duration_seconds": sum(leg["duration_seconds"] for leg in legs),
+        "legs": legs,
+    }
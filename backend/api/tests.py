@@ -1,4 +1,771 @@
-from django.test import TestCase
+import json
+import math
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import ClassVar
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
 
+import requests
+
+from .duty_log import DutyLog
+from .fuel_stations import FuelStationIndex
+from .geometry import (
+    RouteProfile,
+    cumulative_miles,
+    decode_polyline,
+    distance_to_route,
+    encode_polyline,
+    route_cells,
+    route_intersects_bbox,
+    route_levels,
+    simplify_route,
+)
+from .hos_calculator import RollingCycle
+from .log_sheet import (
+    HEIGHT,
+    INK,
+    RENDERERS,
+    WIDTH,
+    minute_x,
+    render_log_sheet,
+    row_center,
+)
+from .planner import MAX_BATCH_TRIPS, plan_trip, plan_trips_batch
+from .route_cache import RouteCache
+from .routing import MAX_WAYPOINTS
+from .upstream import UpstreamClient
+
+
+# Roughly 69 miles per degree of latitude along a meridian
+STRAIGHT_ROUTE = [[30.0 + i * 0.01, -97.0] for i in range(3001)]
+# ~20k vertices, 15 degrees of longitude with bends and road-scale jitter
+WIGGLY_ROUTE = [
+    [35.0 + 2 * math.sin(i / 3000) + 0.0001 * math.sin(i), -105.0 + i * 0.00075]
+    for i in range(20000)
+]
+
+
+class RouteProfileTest(SimpleTestCase):
+    def test_cumulative_miles_is_monotonic_from_zero(self):
+        cum = cumulative_miles(STRAIGHT_ROUTE)
+
+        self.assertEqual(cum[0], 0.0)
+        self.assertTrue((cum[1:] > cum[:-1]).all())
+        self.assertAlmostEqual(cum[-1], 2072.3, delta=1.0)
+
+    def test_coords_at_miles_interpolates_between_vertices(self):
+        profile = RouteProfile([[0.0, 0.0], [1.0, 0.0]])
+        half = profile.total_miles / 2
+
+        lat, lon = profile.coord_at_mile(half)
+
+        self.assertAlmostEqual(lat, 0.5)
+        self.assertAlmostEqual(lon, 0.0)
+
+    def test_coords_at_miles_clamps_to_route_ends(self):
+        profile = RouteProfile(STRAIGHT_ROUTE)
+
+        coords = profile.coords_at_miles([-5.0, profile.total_miles + 5.0])
+
+        self.assertEqual(coords[0].tolist(), STRAIGHT_ROUTE[0])
+        self.assertEqual(coords[1].tolist(), STRAIGHT_ROUTE[-1])
+
+    def test_packed_profile_round_trips(self):
+        profile = RouteProfile(WIGGLY_ROUTE)
+        points, miles = profile.pack()
+
+        unpacked = RouteProfile.unpack(points, miles)
+
+        self.assertEqual(len(points) + len(miles), len(WIGGLY_ROUTE) * 12)
+        self.assertAlmostEqual(unpacked.total_miles, profile.total_miles, places=2)
+        for mile in (0.0, 123.4, profile.total_miles / 2, profile.total_miles):
+            for a, b in zip(unpacked.coord_at_mile(mile), profile.coord_at_mile(mile), strict=True):
+                self.assertAlmostEqual(a, b, places=4)
+
+    def test_locate_projects_onto_the_route(self):
+        profile = RouteProfile(STRAIGHT_ROUTE)
+        lat, lon = profile.coord_at_mile(500.0)
+
+        mile, coords, offset = profile.locate(lat, lon + 0.02)
+
+        self.assertAlmostEqual(mile, 500.0, delta=0.01)
+        self.assertAlmostEqual(coords[1], -97.0)
+        self.assertAlmostEqual(offset, 0.02 * 69.1 * math.cos(math.radians(lat)), delta=0.05)
+
+    def test_locate_near_mile_searches_only_the_window(self):
+        # Out and back: both legs pass the query point
+        route = STRAIGHT_ROUTE[:1001] + STRAIGHT_ROUTE[999::-1]
+        profile = RouteProfile.unpack(*RouteProfile(route).pack())
+
+        outbound, _, _ = profile.locate(33.0, -97.0, near_mile=200.0)
+        inbound, _, _ = profile.locate(33.0, -97.0, near_mile=1200.0)
+
+        self.assertAlmostEqual(outbound, 207.2, delta=0.5)
+        self.assertAlmostEqual(inbound, profile.total_miles - 207.2, delta=0.5)
+
+
+class PolylineTest(SimpleTestCase):
+    def test_matches_reference_encoding(self):
+        points = [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]
+
+        self.assertEqual(encode_polyline(points), "_p~iF~ps|U_ulLnnqC_mqNvxq`@")
+        self.assertEqual(decode_polyline("_p~iF~ps|U_ulLnnqC_mqNvxq`@"), points)
+
+    def test_rejects_anything_but_finite_coordinate_pairs(self):
+        for points in ([38.5, -120.2], [[38.5, -120.2, 0.0]], [[float("nan"), 0.0]], [[0.0, 1e300]]):
+            with self.subTest(points=points), self.assertRaises(ValueError):
+                encode_polyline(points)
+
+
+class SimplifyRouteTest(SimpleTestCase):
+    def test_drops_collinear_vertices_and_keeps_corners(self):
+        route = [[0, 0], [0.001, 1], [0, 2], [1, 2], [2, 2.001]]
+
+        simplified = simplify_route(route, 0.01)
+
+        self.assertEqual(simplified.tolist(), [[0, 0], [0, 2], [2, 2.001]])
+
+    def test_levels_get_coarser_as_zoom_drops(self):
+        counts = [count for _, _, _, count in route_levels(WIGGLY_ROUTE)]
+
+        self.assertEqual(counts, sorted(counts))
+        self.assertLess(counts[0], len(WIGGLY_ROUTE) // 100)
+
+
+class SpatialGeometryTest(SimpleTestCase):
+    def test_route_cells_cover_long_segments(self):
+        cells = route_cells([[30.1, -97.1], [31.2, -97.1]])
+
+        self.assertEqual(cells.tolist(), [[lat, -389] for lat in range(120, 125)])
+
+    def test_distance_to_route_measures_to_the_segment(self):
+        # Half a degree of longitude east of a north-south segment
+        distance = distance_to_route(30.5, -97.0, [[30.0, -97.5], [31.0, -97.5]])
+
+        self.assertAlmostEqual(distance, 29.77, delta=0.05)
+
+    def test_route_intersects_bbox_without_a_vertex_inside(self):
+        box = (-0.1, -0.1, 0.1, 0.1)
+
+        self.assertTrue(route_intersects_bbox([[0.0, -1.0], [0.0, 1.0]], *box))
+        self.assertFalse(route_intersects_bbox([[1.0, -1.0], [1.0, 1.0]], *box))
+        self.assertFalse(route_intersects_bbox([], *box))
+
+
+class DutyLogTest(SimpleTestCase):
+    segments: ClassVar[list] = [
+        {"type": "On Duty (not driving)", "hours": 1.0},
+        {"type": "Driving", "hours": 6.82},
+        {"type": "Sleeper Berth", "hours": 16.18},
+    ]
+
+    def test_round_trips_segments_in_whole_minutes(self):
+        log = DutyLog(self.segments)
+
+        self.assertEqual(log.minutes.tolist(), [60, 409, 971])
+        self.assertEqual(log.tolist(), self.segments)
+        self.assertEqual(log[1], {"type": "Driving", "hours": 6.82})
+
+    def test_to_json_matches_json_dumps(self):
+        log = DutyLog(self.segments)
+
+        self.assertEqual(log.to_json(), json.dumps(self.segments))
+
+    def test_unknown_status_is_rejected(self):
+        with self.assertRaises(ValueError):
+            DutyLog([{"type": "Yard Move", "hours": 1.0}])
+
+        self.assertEqual(
+            DutyLog.coerce([{"type": "Yard Move"}]), [{"type": "Yard Move"}]
+        )
+
+
+class RollingCycleTest(SimpleTestCase):
+    def test_history_rolls_out_of_the_window(self):
+        cycle = RollingCycle(history=[10.0] * 7)
+        cycle.add_on_duty(5.0)
+
+        self.assertEqual(cycle.used, 75.0)
+        self.assertEqual(cycle.remaining, 0.0)
+        cycle.next_day()
+        self.assertEqual(cycle.used, 65.0)
+        for _ in range(6):
+            cycle.next_day()
+        self.assertEqual(cycle.used, 5.0)
+        cycle.next_day()
+        self.assertEqual(cycle.used, 0.0)
+
+    def test_scalar_hours_are_kept_for_seven_days(self):
+        cycle = RollingCycle(60.0)
+
+        for _ in range(6):
+            cycle.next_day()
+        self.assertEqual(cycle.used, 60.0)
+        cycle.next_day()
+        self.assertEqual(cycle.used, 0.0)
+
+    def test_34_hours_off_restarts_the_cycle(self):
+        cycle = RollingCycle(65.0)
+
+        self.assertFalse(cycle.add_off_duty(20.0))
+        self.assertEqual(cycle.used, 65.0)
+        self.assertTrue(cycle.add_off_duty(14.0))
+        self.assertEqual(cycle.used, 0.0)
+
+    def test_on_duty_time_breaks_the_off_duty_stretch(self):
+        cycle = RollingCycle(65.0)
+
+        cycle.add_off_duty(20.0)
+        cycle.add_on_duty(1.0)
+
+        self.assertFalse(cycle.add_off_duty(20.0))
+
+
+class PlanTripTest(SimpleTestCase):
+    def test_unbounded_numbers_are_rejected(self):
+        for miles, cycle in ((float("inf"), 0), (float("nan"), 0), (1e9, 0), (-1, 0), (500, 71), (500, float("nan"))):
+            with self.subTest(miles=miles, cycle=cycle), self.assertRaises(ValueError):
+                plan_trip(STRAIGHT_ROUTE[:10], cycle, total_miles=miles)
+
+    def test_daily_logs_cover_24_hours(self):
+        plan = plan_trip(STRAIGHT_ROUTE, 0)
+
+        for day in plan["daily_logs"]:
+            self.assertAlmostEqual(sum(seg["hours"] for seg in day), 24.0, places=1)
+
+    def test_driving_respects_daily_limit(self):
+        plan = plan_trip(STRAIGHT_ROUTE, 0)
+
+        for day in plan["daily_logs"]:
+            driving = sum(seg["hours"] for seg in day if seg["type"] == "Driving")
+            self.assertLessEqual(driving, 11.0 + 1e-6)
+
+    def test_stops_include_fuel_and_rest_with_coords(self):
+        plan = plan_trip(STRAIGHT_ROUTE, 0, pickup_location="A", dropoff_location="B")
+        kinds = [stop["kind"] for stop in plan["stops"]]
+
+        self.assertEqual(kinds[0], "pickup")
+        self.assertEqual(kinds[-1], "dropoff")
+        self.assertEqual(kinds.count("fuel"), 2)
+        self.assertIn("rest", kinds)
+        for stop in plan["stops"]:
+            self.assertEqual(len(stop["coords"]), 2)
+
+    def test_long_plan_never_exceeds_70_hours_in_8_days(self):
+        plan = plan_trip([[0.0, 0.0]], 40, total_miles=15000)
+        on_duty = [
+            sum(
+                seg["hours"]
+                for seg in day
+                if seg["type"] in ("Driving", "On Duty (not driving)")
+            )
+            for day in plan["daily_logs"]
+        ]
+
+        self.assertGreater(len(on_duty), 30)
+        since_restart = 0
+        for today in range(len(on_duty)):
+            # A full day off completes a 34-hour restart and clears the window
+            since_restart = 0 if on_duty[today] == 0 else since_restart + 1
+            window = on_duty[max(0, today - 7, today - since_restart + 1) : today + 1]
+            self.assertLessEqual(sum(window), 70.1)
+
+    def test_exhausted_cycle_inserts_restart_day(self):
+        plan = plan_trip(STRAIGHT_ROUTE, 69.5)
+
+        self.assertIn([{"type": "Off Duty", "hours": 24.0}], plan["daily_logs"])
+
+
+def mile_north(mile, lon=-97.0):
+    """Point ``mile`` miles up STRAIGHT_ROUTE's meridian."""
+    return {"lat": 30.0 + mile / 69.09, "lon": lon}
+
+
+class FuelStationIndexTest(SimpleTestCase):
+    def test_nearest_within_detour_limit(self):
+        index = FuelStationIndex(
+            [{"name": "A", **mile_north(10, -97.01)}, {"name": "B", **mile_north(50)}, {"name": "C", "lat": 45.0, "lon": 10.0}],
+            max_detour_miles=2.0,
+        )
+
+        found, miles = index.nearest([[30.0 + 10 / 69.09, -97.0], [30.0 + 30 / 69.09, -97.0]])
+
+        self.assertEqual(index.stations[found[0]]["name"], "A")
+        self.assertAlmostEqual(miles[0], 0.6, delta=0.05)
+        self.assertEqual(found[1], -1)
+        self.assertEqual(miles[1], math.inf)
+
+    def test_from_csv_keeps_extra_columns_and_skips_bad_rows(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "stations.csv"
+            path.write_text("Name,Latitude,Longitude,City\nPilot,35.1,-97.2,Norman\nBroken,,-97,X\n")
+            index = FuelStationIndex.from_csv(path)
+
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.stations[0], {"Name": "Pilot", "City": "Norman", "lat": 35.1, "lon": -97.2})
+
+
+class PlanTripSnappingTest(SimpleTestCase):
+    stations = FuelStationIndex(
+        [{"name": "Fuel 950", **mile_north(950, -97.02)}, {"name": "Rest 590", **mile_north(590, -96.99)}]
+    )
+
+    def test_fuel_and_rest_stops_move_back_to_stations(self):
+        plan = plan_trip(STRAIGHT_ROUTE, 0, stations=self.stations)
+        fuel = [stop for stop in plan["stops"] if stop["kind"] == "fuel"]
+        rest = [stop for stop in plan["stops"] if stop["kind"] == "rest"]
+
+        self.assertEqual(fuel[0]["station"]["name"], "Fuel 950")
+        # The last route point with the station inside the 3-mile detour limit
+        self.assertAlmostEqual(fuel[0]["mile"], 950, delta=3.0)
+        self.assertLessEqual(fuel[0]["detour_miles"], 3.0)
+        self.assertEqual(fuel[0]["coords"], [fuel[0]["station"]["lat"], fuel[0]["station"]["lon"]])
+        self.assertNotIn("station", fuel[1])  # next tank is due at ~1950 miles
+        self.assertAlmostEqual(fuel[1]["mile"], fuel[0]["mile"] + 1000, delta=0.1)
+        self.assertEqual(rest[0]["station"]["name"], "Rest 590")
+        self.assertLess(rest[0]["mile"], 605)
+
+    def test_snapped_plan_still_respects_hos_limits(self):
+        plan = plan_trip(STRAIGHT_ROUTE, 0, stations=self.stations)
+
+        for day in plan["daily_logs"]:
+            self.assertAlmostEqual(sum(seg["hours"] for seg in day), 24.0, places=1)
+            driving = sum(seg["hours"] for seg in day if seg["type"] == "Driving")
+            self.assertLessEqual(driving, 11.0 + 1e-6)
+        self.assertAlmostEqual(
+            sum(seg["hours"] for day in plan["daily_logs"] for seg in day if seg["type"] == "Driving"),
+            plan["total_miles"] / 55.0,
+            delta=0.05,
+        )
+
+
+class PlanTripsBatchTest(SimpleTestCase):
+    def test_non_finite_trips_are_rejected(self):
+        with self.assertRaises(ValueError):
+            plan_trips_batch([500.0, float("inf")], [0.0, 0.0])
+
+    def test_matches_single_trip_planner(self):
+        trips = [(0, 0), (420, 0), (1800, 25), (3500, 60), (900, 69.5)]
+
+        batch = plan_trips_batch([m for m, _ in trips], [c for _, c in trips])
+
+        for (miles, cycle), logs in zip(trips, batch, strict=True):
+            expected = plan_trip([[0.0, 0.0]], cycle, total_miles=miles)["daily_logs"]
+            self.assertEqual(len(logs), len(expected))
+            for day, expected_day in zip(logs, expected, strict=True):
+                self.assertEqual(
+                    [seg["type"] for seg in day], [seg["type"] for seg in expected_day]
+                )
+                for seg, expected_seg in zip(day, expected_day, strict=True):
+                    self.assertAlmostEqual(
+                        seg["hours"], expected_seg["hours"], places=1
+                    )
+
+    def test_rejects_mismatched_lengths(self):
+        with self.assertRaises(ValueError):
+            plan_trips_batch([100, 200], [0])
+
+
+class PlanTripViewTest(TestCase):
+    def test_returns_plan(self):
+        response = self.client.post(
+            reverse("plan_trip"),
+            data=json.dumps({"route": STRAIGHT_ROUTE[:100], "current_cycle_hours": 10}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("daily_logs", response.json())
+
+    def test_missing_route_returns_400(self):
+        response = self.client.post(
+            reverse("plan_trip"), data="{}", content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_finite_or_out_of_range_numbers_return_400(self):
+        bodies = [
+            '{"route": [[40, -100], [41, -100]], "total_miles": Infinity}',
+            '{"route": [[40, -100], [41, -100]], "total_miles": 1e9}',
+            '{"route": [[40, -100], [41, -100]], "current_cycle_hours": NaN}',
+            '{"route": [[40, -100], [41, -100]], "current_cycle_hours": 80}',
+        ]
+        for body in bodies:
+            with self.subTest(body=body):
+                response = self.client.post(reverse("plan_trip"), data=body, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+
+    def test_non_object_body_returns_400(self):
+        for body in ("[]", "1", '"x"'):
+            with self.subTest(body=body):
+                response = self.client.post(reverse("plan_trip"), data=body, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+
+
+class PlanTripsViewTest(TestCase):
+    def test_returns_logs_per_trip(self):
+        response = self.client.post(
+            reverse("plan_trips"),
+            data=json.dumps({"trips": [[500, 0], [2500, 30]]}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["daily_logs"]), 2)
+
+    def test_non_object_body_returns_400(self):
+        for body in ("[]", "1", '"x"'):
+            with self.subTest(body=body):
+                response = self.client.post(reverse("plan_trips"), data=body, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+
+    def test_malformed_pairs_return_400(self):
+        response = self.client.post(
+            reverse("plan_trips"),
+            data=json.dumps({"trips": [[500, 0, 1]]}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_unbounded_batches_return_400(self):
+        bodies = [
+            '{"trips": [[500, 0], [Infinity, 0]]}',
+            '{"trips": [[1e9, 0]]}',
+            '{"trips": [[500, -1]]}',
+            json.dumps({"trips": [[500, 0]] * (MAX_BATCH_TRIPS + 1)}),
+        ]
+        for body in bodies:
+            with self.subTest(body=body[:40]):
+                response = self.client.post(reverse("plan_trips"), data=body, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+
+
+class RouteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "routes.sqlite3"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_key_quantizes_coordinates(self):
+        cache = RouteCache(precision=3)
+
+        self.assertEqual(
+            cache.key({"lat": 40.71281, "lng": -74.00601}, {"lat": 1, "lng": 2}),
+            cache.key({"lat": 40.71279, "lng": -74.00599}, {"lat": 1, "lng": 2}),
+        )
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = RouteCache(max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+
+        self.assertEqual(cache.get("a"), "1")
+        self.assertIsNone(cache.get("b"))
+
+    def test_disk_tier_is_shared_between_instances(self):
+        RouteCache(path=self.path).set("lane", '{"routes": []}')
+        other_worker = RouteCache(path=self.path)
+
+        self.assertEqual(other_worker.get("lane"), '{"routes": []}')
+        self.assertEqual(other_worker.get("lane"), '{"routes": []}')
+        self.assertEqual(other_worker.stats()["disk_hits"], 1)
+        self.assertEqual(other_worker.stats()["memory_hits"], 1)
+
+    def test_entries_expire_after_ttl(self):
+        cache = RouteCache(ttl=60, path=self.path)
+        cache.set("lane", "{}")
+
+        with mock.patch("api.route_cache.time.time", return_value=time.time() + 61):
+            self.assertIsNone(cache.get("lane"))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+
+class FakeORSServer:
+    """
+    Local stand-in for OpenRouteService. Replies come from a queue of
+    ``(status, body, delay)`` tuples, then fall back to ``default``.
+    """
+
+    def __init__(self, replies=(), default=(200, '{"routes": []}', 0)):
+        self.replies = list(replies)
+        self.default = default
+        self.requests = []  # (path, client port) per request
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                fake.requests.append((self.path, self.client_address[1]))
+                status, body, delay = (
+                    fake.replies.pop(0) if fake.replies else fake.default
+                )
+                time.sleep(delay)
+                data = body.encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client timed out and hung up
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(
+            target=self.httpd.serve_forever, args=(0.05,), daemon=True
+        ).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class UpstreamClientTest(SimpleTestCase):
+    def make_server(self, replies=()):
+        server = FakeORSServer(replies)
+        self.addCleanup(server.close)
+        return server
+
+    def test_reuses_pooled_connection(self):
+        server = self.make_server()
+        client = UpstreamClient()
+
+        for _ in range(3):
+            client.post(server.url + "/v2/directions/driving-car", data="{}")
+
+        self.assertEqual(len({port for _, port in server.requests}), 1)
+        self.assertEqual(client.stats()["new_connections"], 1)
+
+    def test_splits_connect_and_response_time(self):
+        server = self.make_server([(200, "{}", 0.05)])
+        client = UpstreamClient()
+
+        response = client.post(server.url, data="{}")
+
+        self.assertGreater(response.connect_seconds, 0)
+        self.assertGreaterEqual(response.response_seconds, 0.05)
+
+    def test_retries_retryable_status(self):
+        server = self.make_server([(503, "{}", 0), (200, '{"ok": 1}', 0)])
+        client = UpstreamClient(backoff=0)
+
+        response = client.post(server.url, data="{}")
+
+        self.assertEqual(response.json(), {"ok": 1})
+        self.assertEqual(client.stats()["retries"], 1)
+
+    def test_retries_are_bounded(self):
+        server = self.make_server([(503, "{}", 0)] * 5)
+        client = UpstreamClient(max_retries=2, backoff=0)
+
+        response = client.post(server.url, data="{}")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(server.requests), 3)
+
+    def test_read_timeout_raises_after_retries(self):
+        server = self.make_server([(200, "{}", 0.5)] * 2)
+        client = UpstreamClient(read_timeout=0.1, max_retries=1, backoff=0)
+
+        with self.assertRaises(requests.Timeout):
+            client.post(server.url, data="{}")
+        self.assertEqual(client.stats()["errors"], 2)
+
+
+class CalculateTripViewTest(TestCase):
+    def setUp(self):
+        self.server = FakeORSServer([(200, '{"routes": [1]}', 0)])
+        self.addCleanup(self.server.close)
+        self.route_cache = RouteCache()
+        for name, value in (
+            ("get_route_cache", self.route_cache),
+            ("get_upstream_client", UpstreamClient(backoff=0)),
+        ):
+            patcher = mock.patch(f"api.routing.{name}", return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def post(self):
+        with override_settings(OPENROUTESERVICE_URL=self.server.url):
+            return self.client.post(
+                reverse("calculate_trip"),
+                data=json.dumps(
+                    {
+                        "origin": {"lat": 40.7128, "lng": -74.006},
+                        "destination": {"lat": 38.9072, "lng": -77.0369},
+                    }
+                ),
+                content_type="application/json",
+            )
+
+    def test_repeated_lane_is_served_from_cache(self):
+        first = self.post()
+        second = self.post()
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.server.requests[0][0], "/v2/directions/driving-car")
+        self.assertEqual(first.json(), {"routes": [1]})
+        self.assertEqual(second.json(), {"routes": [1]})
+        self.assertEqual(self.route_cache.stats()["memory_hits"], 1)
+
+    def test_upstream_failure_returns_500(self):
+        self.server.replies = [(502, "{}", 0)] * 3
+
+        response = self.post()
+
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("OpenRouteService error", response.json()["error"])
+
+
+class RouteTripViewTest(TestCase):
+    leg = json.dumps(
+        {
+            "routes": [
+                {
+                    "summary": {"distance": 16093.44, "duration": 600.0},
+                    "geometry": encode_polyline(
+                        [[40.0, -75.0], [40.1, -75.1], [40.2, -75.2]]
+                    ),
+                }
+            ]
+        }
+    )
+
+    def setUp(self):
+        self.server = FakeORSServer(default=(200, self.leg, 0.3))
+        self.addCleanup(self.server.close)
+        for name, value in (
+            ("get_route_cache", RouteCache()),
+            ("get_upstream_client", UpstreamClient(backoff=0)),
+        ):
+            patcher = mock.patch(f"api.routing.{name}", return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def post(self, waypoints):
+        with override_settings(OPENROUTESERVICE_URL=self.server.url):
+            return self.client.post(
+                reverse("route_trip"),
+                data=json.dumps({"waypoints": waypoints}),
+                content_type="application/json",
+            )
+
+    def test_fetches_legs_concurrently_and_merges_them(self):
+        waypoints = [{"lat": 40.0 + i, "lng": -75.0} for i in range(4)]
+
+        start = time.perf_counter()
+        response = self.post(waypoints)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(self.server.requests), 3)
+        # Three 0.3 s legs back to back would take at least 0.9 s
+        self.assertLess(elapsed, 0.75)
+        self.assertEqual(len(data["legs"]), 3)
+        self.assertEqual(len(data["route"]), 7)
+        self.assertAlmostEqual(data["total_miles"], 30.0)
+        self.assertEqual(data["duration_seconds"], 1800.0)
+
+    def test_requires_two_waypoints(self):
+        response = self.post([{"lat": 40.0, "lng": -75.0}])
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_object_body_returns_400(self):
+        response = self.client.post(reverse("route_trip"), data="[]", content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_unexpected_upstream_response_returns_502(self):
+        waypoints = [{"lat": 40.0, "lng": -75.0}, {"lat": 41.0, "lng": -75.0}]
+        for body in ('{"routes": []}', "{}", '{"routes": [{"summary": {}}]}', "not json"):
+            with self.subTest(body=body):
+                self.server.default = (200, body, 0)
+                with mock.patch("api.routing.get_route_cache", return_value=RouteCache()):
+                    response = self.post(waypoints)
+                self.assertEqual(response.status_code, 502)
+
+    def test_invalid_waypoints_return_400_without_routing(self):
+        too_many = [{"lat": 40.0, "lng": -75.0}] * (MAX_WAYPOINTS + 1)
+        for waypoints in (
+            too_many,
+            [{"lat": 40.0}, {"lat": 41.0, "lng": -75.0}],
+            [{"lat": "40", "lng": -75.0}, {"lat": 41.0, "lng": -75.0}],
+            [{"lat": 91.0, "lng": -75.0}, {"lat": 41.0, "lng": -75.0}],
+            [40.0, -75.0],
+        ):
+            with self.subTest(waypoints=waypoints[:2]):
+                self.assertEqual(self.post(waypoints).status_code, 400)
+        self.assertEqual(self.server.requests, [])
+
+
+class LogSheetTest(SimpleTestCase):
+    # Off duty until 06:00, driving until 17:00, then sleeper berth
+    log = DutyLog.from_arrays([0, 2, 1], [360, 660, 420])
+
+    def decode_png(self, content):
+        self.assertEqual(content[:8], b"\x89PNG\r\n\x1a\n")
+        width, height = int.from_bytes(content[16:20], "big"), int.from_bytes(content[20:24], "big")
+        data, pos = b"", 8
+        while pos < len(content):
+            length = int.from_bytes(content[pos : pos + 4], "big")
+            if content[pos + 4 : pos + 8] == b"IDAT":
+                data += content[pos + 8 : pos + 8 + length]
+            pos += length + 12
+        raw = zlib.decompress(data)
+        rows = [raw[y * (width + 1) + 1 : (y + 1) * (width + 1)] for y in range(height)]
+        return width, height, rows
+
+    def test_png_draws_the_duty_line_on_its_rows(self):
+        content, _ = render_log_sheet(self.log, "png")
+
+        width, height, rows = self.decode_png(content)
+        self.assertEqual((width, height), (WIDTH, HEIGHT))
+        noon = minute_x(12 * 60)
+        self.assertEqual(rows[row_center(2)][noon], INK)  # driving
+        self.assertNotEqual(rows[row_center(0)][noon], INK)
+        self.assertEqual(rows[row_center(1)][minute_x(20 * 60)], INK)  # sleeper
+
+    def test_svg_has_one_vertex_pair_per_segment(self):
+        content, _ = render_log_sheet(self.log, "svg")
+
+        svg = content.decode()
+        points = svg.split('<polyline points="')[1].split('"')[0].split()
+        self.assertEqual(len(points), 6)
+        self.assertIn("Sleeper Berth", svg)
+        self.assertIn(">11.00<", svg)  # driving total
+
+    def test_sheets_are_rendered_once_per_content(self):
+        log = DutyLog.from_arrays([3, 2], [61, 1379])
+        render = mock.Mock(return_value=b"<svg/>")
+
+        with mock.patch.dict(RENDERERS, {"svg": render}):
+            first = render_log_sheet(log, "svg")
+            second = render_log_sheet(DutyLog(log.tolist()), "svg")
+
+        self.assertEqual(first, second)
+        render.assert_called_once()
+
+    def test_rejects_non_duty_logs(self):
+        with self.assertRaises(ValueError):
+            render_log_sheet({"day": 1}, "png")
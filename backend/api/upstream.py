@@ -0,0 +1,195 @@
+# backend/api/upstream.py
+
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPSTREAM = {
+    "POOL_SIZE": 10,
+    "CONNECT_TIMEOUT": 3.05,  # seconds
+    "READ_TIMEOUT": 15.0,  # seconds
+    "MAX_RETRIES": 2,
+    "BACKOFF": 0.25,  # seconds, doubled per retry before jitter
+    "MAX_BACKOFF": 4.0,  # seconds
+}
+
+# Time spent in connect() (TCP + TLS) by the current thread's request
+_timing = threading.local()
+
+
+class _TimedConnectMixin:
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _timing.connect_seconds = (
+                getattr(_timing, "connect_seconds", 0.0) + time.perf_counter() - start
+            )
+
+
+class _TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class UpstreamClient:
+    """
+    Shared HTTP client for outbound routing calls.
+
+    Keeps a pool of keep-alive connections per host, applies connect/read
+    timeouts to every call, and retries connection errors, timeouts and
+    retryable statuses a bounded number of times with full-jitter exponential
+    backoff. Only use it for idempotent calls: POSTs are retried too.
+
+    Each response gets ``connect_seconds`` (TCP + TLS handshakes; 0 when a
+    pooled connection was reused) and ``response_seconds`` (the rest of the
+    round trip) attributes, and the totals are available from ``stats()``.
+    """
+
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(
+        self,
+        pool_size=10,
+        connect_timeout=3.05,
+        read_timeout=15.0,
+        max_retries=2,
+        backoff=0.25,
+        max_backoff=4.0,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        adapter = _TimedHTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "retries": 0,
+            "errors": 0,
+            "new_connections": 0,
+            "connect_seconds": 0.0,
+            "response_seconds": 0.0,
+        }
+
+    @classmethod
+    def from_settings(cls):
+        options = {**DEFAULT_UPSTREAM, **getattr(settings, "UPSTREAM", {})}
+        return cls(
+            pool_size=options["POOL_SIZE"],
+            connect_timeout=options["CONNECT_TIMEOUT"],
+            read_timeout=options["READ_TIMEOUT"],
+            max_retries=options["MAX_RETRIES"],
+            backoff=options["BACKOFF"],
+            max_backoff=options["MAX_BACKOFF"],
+        )
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            final_attempt = attempt == self.max_retries
+            _timing.connect_seconds = 0.0
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(start, error=True)
+                if final_attempt:
+                    raise
+                logger.warning("Upstream %s %s failed: %s", method, url, e)
+            else:
+                self._record(start, response=response)
+                if response.status_code not in self.RETRY_STATUSES or final_attempt:
+                    return response
+                logger.warning(
+                    "Upstream %s %s returned %s", method, url, response.status_code
+                )
+
+            with self._lock:
+                self._stats["retries"] += 1
+            time.sleep(self._backoff_delay(attempt))
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def _backoff_delay(self, attempt):
+        # Full jitter keeps retrying workers from hitting upstream in lockstep
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))  # noqa: S311
+
+    def _record(self, start, response=None, error=False):
+        total = time.perf_counter() - start
+        connect = min(_timing.connect_seconds, total)
+        if response is not None:
+            response.connect_seconds = connect
+            response.response_seconds = total - connect
+        logger.debug(
+            "Upstream call: connect %.1f ms, response %.1f ms",
+            connect * 1000,
+            (total - connect) * 1000,
+        )
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["errors"] += int(error)
+            self._stats["new_connections"] += int(connect > 0)
+            self._stats["connect_seconds"] += connect
+            self._stats["response_seconds"] += total - connect
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+_upstream_client = None
+_upstream_client_lock = threading.Lock()
+
+
+def get_upstream_client():
+    """Returns the process-wide UpstreamClient configured by ``settings.UPSTREAM``."""
+    global _upstream_client
+    if _upstream_client is None:
+        with _upstream_client_lock:
+            if _upstream_client is None:
+                _upstream_client = UpstreamClient.from_settings()
+    return _upstream_client
@@ -6,6 +6,11 @@ from . import views
 
 urlpatterns = [
     path("calculate-trip/", views.calculate_trip, name="calculate_trip"),
+    path("route-trip/", views.route_trip, name="route_trip"),
+    path("route-cache/stats/", views.route_cache_stats, name="route_cache_stats"),
+    path("upstream/stats/", views.upstream_stats, name="upstream_stats"),
+    path("plan-trip/", views.plan_trip, name="plan_trip"),
+    path("plan-trips/", views.plan_trips, name="plan_trips"),
     path("save-trip/", views.save_trip, name="save_trip"),
     path("trip-history/", views.trip_history, name="trip_history"),
     path("delete-trip/<int:trip_id>/", views.delete_trip, name="delete_trip"),
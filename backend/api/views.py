@@ -2,11 +2,19 @@
 
 import json
 
+import numpy as np
 import requests
-from django.conf import settings
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 
+from .duty_log import DutyLogEncoder
+from .fuel_stations import get_fuel_stations
+from .planner import MAX_BATCH_TRIPS, check_trip_numbers, plan_trips_batch
+from .planner import plan_trip as build_trip_plan
+from .route_cache import get_route_cache
+from .routing import check_waypoints, fetch_directions, fetch_route
+from .upstream import get_upstream_client
+
 
 @csrf_exempt  # disable CSRF for API testing
 def calculate_trip(request):
@@ -23,25 +31,8 @@ def calculate_trip(request):
                     {"error": "Missing origin or destination."}, status=400
                 )
 
-            # OpenRouteService API endpoint
-            url = "https://api.openrouteservice.org/v2/directions/driving-car"
-            headers = {
-                "Accept": "application/json",
-                "Authorization": settings.OPENROUTESERVICE_API_KEY,
-                "Content-Type": "application/json",
-            }
-            body = {
-                "coordinates": [
-                    [origin["lng"], origin["lat"]],
-                    [destination["lng"], destination["lat"]],
-                ]
-            }
-
-            # Make request
-            response = requests.post(url, headers=headers, data=json.dumps(body))
-            response.raise_for_status()
-
-            return JsonResponse(response.json(), safe=False)
+            directions = fetch_directions(origin, destination)
+            return HttpResponse(directions, content_type="application/json")
 
         except json.JSONDecodeError:
             return JsonResponse({"error": "Invalid JSON in request body."}, status=400)
@@ -55,6 +46,137 @@ def calculate_trip(request):
     return JsonResponse({"error": "Invalid request method."}, status=405)
 
 
+@csrf_exempt
+async def route_trip(request):
+    if request.method == "POST":
+        try:
+            data = json.loads(request.body)
+            if not isinstance(data, dict):
+                return JsonResponse({"error": "Expected a JSON object."}, status=400)
+
+            try:
+                waypoints = check_waypoints(data.get("waypoints"))
+            except ValueError as e:
+                return JsonResponse({"error": str(e)}, status=400)
+
+            # All legs are fetched at once: latency is the slowest leg's
+            try:
+                route = await fetch_route(waypoints)
+            except (KeyError, IndexError, TypeError, json.JSONDecodeError) as e:
+                return JsonResponse(
+                    {"error": f"Unexpected OpenRouteService response: {e!r}"}, status=502
+                )
+            return JsonResponse(route)
+
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON in request body."}, status=400)
+        except requests.exceptions.RequestException as e:
+            return JsonResponse(
+                {"error": f"OpenRouteService error: {e!s}"}, status=500
+            )
+        except Exception as e:  # noqa: BLE001
+            return JsonResponse({"error": f"Unexpected error: {e!s}"}, status=500)
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+def route_cache_stats(request):
+    return JsonResponse(get_route_cache().stats())
+
+
+def upstream_stats(request):
+    return JsonResponse(get_upstream_client().stats())
+
+
+@csrf_exempt
+def plan_trip(request):
+    if request.method == "POST":
+        try:
+            data = json.loads(request.body)
+            if not isinstance(data, dict):
+                return JsonResponse({"error": "Expected a JSON object."}, status=400)
+
+            route = data.get("route")
+            if not route:
+                return JsonResponse({"error": "Missing route."}, status=400)
+
+            # json.loads accepts Infinity and NaN; the planner loops per stop
+            current_cycle_hours = float(data.get("current_cycle_hours") or 0.0)
+            total_miles = data.get("total_miles")
+            if total_miles is not None:
+                total_miles = float(total_miles)
+            check_trip_numbers(total_miles or 0.0, current_cycle_hours)
+
+            plan = build_trip_plan(
+                route,
+                current_cycle_hours,
+                total_miles=total_miles,
+                pickup_location=data.get("pickup_location", ""),
+                dropoff_location=data.get("dropoff_location", ""),
+                cycle_history=data.get("cycle_history"),
+                stations=get_fuel_stations() if data.get("snap_stops", True) else None,
+            )
+            return JsonResponse(plan, encoder=DutyLogEncoder)
+
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON in request body."}, status=400)
+        except (TypeError, ValueError) as e:
+            return JsonResponse({"error": f"Invalid trip input: {e!s}"}, status=400)
+        except Exception as e:  # noqa: BLE001
+            return JsonResponse({"error": f"Unexpected error: {e!s}"}, status=500)
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+@csrf_exempt
+def plan_trips(request):
+    if request.method == "POST":
+        try:
+            data = json.loads(request.body)
+            if not isinstance(data, dict):
+                return JsonResponse({"error": "Expected a JSON object."}, status=400)
+
+            # [[total_miles, cycle_hours_used], ...]
+            trips = data.get("trips")
+            if not isinstance(trips, list):
+                return JsonResponse({"error": "Missing trips."}, status=400)
+            if not trips:
+                return JsonResponse({"daily_logs": []})
+            if len(trips) > MAX_BATCH_TRIPS:
+                return JsonResponse(
+                    {"error": f"At most {MAX_BATCH_TRIPS} trips per request."}, status=400
+                )
+
+            pairs = np.asarray(trips, dtype=np.float64)
+            if pairs.ndim != 2 or pairs.shape[1] != 2:
+                return JsonResponse(
+                    {"error": "Each trip must be [total_miles, cycle_hours_used]."},
+                    status=400,
+                )
+            if not np.isfinite(pairs).all():
+                return JsonResponse({"error": "Trip numbers must be finite."}, status=400)
+            check_trip_numbers(pairs[:, 0], pairs[:, 1])
+
+            daily_logs = plan_trips_batch(pairs[:, 0], pairs[:, 1])
+            # Write the DutyLogs' JSON directly instead of building dicts
+            body = ", ".join(
+                "[" + ", ".join(log.to_json() for log in logs) + "]"
+                for logs in daily_logs
+            )
+            return HttpResponse(
+                '{"daily_logs": [' + body + "]}", content_type="application/json"
+            )
+
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON in request body."}, status=400)
+        except (TypeError, ValueError) as e:
+            return JsonResponse({"error": f"Invalid trip input: {e!s}"}, status=400)
+        except Exception as e:  # noqa: BLE001
+            return JsonResponse({"error": f"Unexpected error: {e!s}"}, status=500)
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
 @csrf_exempt
 def save_trip(request):
     if request.method == "POST":
@@ -69,4 +191,3 @@ def trip_history(request):
 @csrf_exempt
 def delete_trip(request, trip_id):
     return JsonResponse({"message": f"Trip {trip_id} deleted"})
-
@@ -1,3 +1,4 @@
-celery_app = None
-__all__ = ("celery_app",)
+from .celery import app as celery_app
+
 
+__all__ = ("celery_app",)
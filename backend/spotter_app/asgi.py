@@ -1,6 +1,6 @@
 import os
-from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "spotter_app.settings")
-application = get_asgi_application()
 
+# HTTP plus the websocket routes (spotter_app/routing.py)
+from .routing import application  # noqa: E402,F401
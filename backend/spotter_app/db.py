@@ -0,0 +1,60 @@
+# backend/spotter_app/db.py
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+# Applied to every new SQLite connection (see configure_sqlite)
+SQLITE_PRAGMAS = {
+    # Readers don't block the writer and vice versa; persists in the file
+    "journal_mode": "WAL",
+    # Durable at every checkpoint; safe with WAL and much cheaper than FULL
+    "synchronous": "NORMAL",
+    # Wait for a lock instead of failing with "database is locked"
+    "busy_timeout": 20000,  # ms
+    "cache_size": -32000,  # KiB (negative), ~32 MB page cache per connection
+    "temp_store": "MEMORY",
+    "mmap_size": 256 * 1024 * 1024,  # bytes
+    "foreign_keys": "ON",
+}
+
+# Alias of the read-only connection to the same database file
+READ_ALIAS = "replica"
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Applies SQLITE_PRAGMAS when Django opens an SQLite connection."""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in SQLITE_PRAGMAS.items():
+            if name == "journal_mode" and connection.alias == READ_ALIAS:
+                continue  # needs write access; the default connection sets it
+            cursor.execute(f"PRAGMA {name} = {value}")
+        if connection.alias == READ_ALIAS:
+            cursor.execute("PRAGMA query_only = ON")
+
+
+class ReadReplicaRouter:
+    """
+    Sends reads to the read-only ``replica`` connection and writes to
+    ``default``. With WAL the replica sees every committed write. Reads made
+    inside a transaction on ``default`` stay there so they see its own
+    uncommitted rows.
+    """
+
+    def db_for_read(self, model, **hints):
+        if transaction.get_connection("default").in_atomic_block:
+            return "default"
+        return READ_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # both aliases are the same database
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
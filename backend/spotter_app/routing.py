@@ -1,12 +1,18 @@
-import chat.routing
 from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.security.websocket import AllowedHostsOriginValidator
 from django.core.asgi import get_asgi_application
 
+# Sets Django up before the consumers import any models
+django_asgi_app = get_asgi_application()
+
+import trips.routing  # noqa: E402
+
+
 application = ProtocolTypeRouter(
     {
-        "http": get_asgi_application(),
-        "websocket": AuthMiddlewareStack(URLRouter(chat.routing.websocket_urlpatterns)),
+        "http": django_asgi_app,
+        # Browsers send cookies cross-site: only accept pages from ALLOWED_HOSTS
+        "websocket": AllowedHostsOriginValidator(AuthMiddlewareStack(URLRouter(trips.routing.websocket_urlpatterns))),
     }
 )
-
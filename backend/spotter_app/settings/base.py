@@ -9,6 +9,7 @@ ALLOWED_HOSTS = ["localhost", "127.0.0.1", "[::1]"]
 APPEND_SLASH = True
 
 INSTALLED_APPS = [
+    "daphne",  # runserver serves ASGI, websockets included
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -18,6 +19,7 @@ INSTALLED_APPS = [
     "rest_framework",
     "corsheaders",
     "webpack_loader",
+    "api",
     "trips",
     "users",
 ]
@@ -37,12 +39,29 @@ ROOT_URLCONF = "spotter_app.urls"
 WSGI_APPLICATION = "spotter_app.wsgi.application"
 ASGI_APPLICATION = "spotter_app.asgi.application"
 
+# SQLite profile (spotter_app/db.py): WAL and tuned pragmas on every
+# connection, connections kept across requests, BEGIN IMMEDIATE so writers
+# queue on the lock instead of failing to upgrade it, and reads routed to a
+# read-only connection to the same file.
+DATABASE_PATH = BASE_DIR / "db.sqlite3"  # backend/db.sqlite3
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": str(BASE_DIR / "db.sqlite3"),  # backend/db.sqlite3
-    }
+        "NAME": str(DATABASE_PATH),
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "600")),  # seconds
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"timeout": 20, "transaction_mode": "IMMEDIATE"},
+    },
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": f"file:{DATABASE_PATH.as_posix()}?mode=ro",
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "600")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"timeout": 20, "uri": True},
+        "TEST": {"MIRROR": "default"},
+    },
 }
+DATABASE_ROUTERS = ["spotter_app.db.ReadReplicaRouter"]
 
 TEMPLATES = [
     {
@@ -70,3 +89,104 @@ WEBPACK_LOADER = {
 STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 CORS_ALLOW_ALL_ORIGINS = True
+
+OPENROUTESERVICE_API_KEY = os.getenv("OPENROUTESERVICE_API_KEY", "")
+OPENROUTESERVICE_URL = os.getenv(
+    "OPENROUTESERVICE_URL", "https://api.openrouteservice.org"
+)
+
+# OpenRouteService directions cache (api/route_cache.py): in-process LRU plus
+# an SQLite file shared by all workers on the host
+ROUTE_CACHE = {
+    "MAX_ENTRIES": int(os.getenv("ROUTE_CACHE_MAX_ENTRIES", "512")),
+    "TTL": int(os.getenv("ROUTE_CACHE_TTL", str(24 * 60 * 60))),  # seconds
+    "PATH": str(BASE_DIR / "route_cache.sqlite3"),
+    "PRECISION": 4,  # coordinate decimal places in the cache key, ~11 m
+}
+
+# Shared pooled client for outbound routing calls (api/upstream.py)
+UPSTREAM = {
+    "POOL_SIZE": 10,
+    "CONNECT_TIMEOUT": 3.05,  # seconds
+    "READ_TIMEOUT": 15.0,  # seconds
+    "MAX_RETRIES": 2,
+    "BACKOFF": 0.25,  # seconds, doubled per retry before jitter
+    "MAX_BACKOFF": 4.0,  # seconds
+}
+
+# Fuel-station dataset that planned fuel and rest stops snap to
+# (api/fuel_stations.py): a CSV with lat/lon columns, loaded at startup.
+# Without the file stops stay at their interpolated positions.
+FUEL_STATIONS = {
+    "PATH": os.getenv("FUEL_STATIONS_CSV", str(BASE_DIR / "fuel_stations.csv")),
+    "MAX_DETOUR_MILES": float(os.getenv("FUEL_STATION_MAX_DETOUR", "3")),
+}
+
+# Rendered GET responses of the trip and driver read endpoints (trips/cache.py).
+# "locmem" is per process; use "file" to share entries and invalidations
+# between workers on one host.
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "locmem")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": (
+        {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv(
+                "RESPONSE_CACHE_DIR", str(BASE_DIR / "response_cache")
+            ),
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        }
+        if RESPONSE_CACHE_BACKEND == "file"
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "responses",
+            "OPTIONS": {"MAX_ENTRIES": 2000},
+        }
+    ),
+    "log_sheets": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "log_sheets",
+        "OPTIONS": {"MAX_ENTRIES": 5000},  # ~10 KB per PNG sheet
+    },
+}
+RESPONSE_CACHE = {
+    "ALIAS": "responses",
+    "TIMEOUT": int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300")),  # seconds
+}
+
+# Rendered ELD log sheets (api/log_sheet.py), keyed by content hash
+LOG_SHEET_CACHE = {
+    "ALIAS": "log_sheets",
+    "TIMEOUT": int(os.getenv("LOG_SHEET_CACHE_TIMEOUT", str(7 * 24 * 60 * 60))),  # seconds
+}
+
+# Fleet HOS availability snapshot (trips/availability.py); Driver saves
+# refresh it, so the timeout only bounds staleness from bulk updates
+FLEET_AVAILABILITY = {
+    "ALIAS": "default",
+    "TIMEOUT": int(os.getenv("FLEET_AVAILABILITY_TIMEOUT", "10")),  # seconds
+}
+
+# Channels (spotter_app/routing.py): websocket push to dispatch boards. The
+# in-memory layer only reaches clients of the same process, as in local and
+# test runs; set CHANNEL_REDIS_URL (needs channels-redis) to serve them from
+# several ASGI workers.
+CHANNEL_REDIS_URL = os.getenv("CHANNEL_REDIS_URL")
+CHANNEL_LAYERS = {
+    "default": (
+        {"BACKEND": "channels_redis.core.RedisChannelLayer", "CONFIG": {"hosts": [CHANNEL_REDIS_URL]}}
+        if CHANNEL_REDIS_URL
+        else {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+    ),
+}
+
+# Celery (spotter_app/celery.py). Without CELERY_BROKER_URL tasks run eagerly
+# in the calling process on the in-memory broker, as in local and test runs;
+# point it at a real broker (e.g. redis://localhost:6379/0) and start
+# `celery -A spotter_app worker` to take them off the web workers.
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "memory://")
+CELERY_TASK_ALWAYS_EAGER = CELERY_BROKER_URL == "memory://"
+CELERY_TASK_IGNORE_RESULT = True  # job state lives in the database
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1  # jobs are long; don't hoard them
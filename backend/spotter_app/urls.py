@@ -39,4 +39,5 @@ urlpatterns = [
         name="redoc",
     ),
     path("api/trips/", include("trips.urls")),
+    path("api/", include("api.urls")),
 ]
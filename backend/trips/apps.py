@@ -5,3 +5,7 @@ class TripsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "trips"
 
+    def ready(self):
+        from spotter_app import db  # noqa: F401  (SQLite connection pragmas)
+
+        from . import signals  # noqa: F401
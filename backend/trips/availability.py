@@ -0,0 +1,146 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+import numpy as np
+from api.hos_calculator import HOSCalculator
+
+from .models import Driver
+
+
+DEFAULT_FLEET_AVAILABILITY = {
+    "ALIAS": "default",  # entry in settings.CACHES
+    "TIMEOUT": 10,  # seconds; Driver saves also drop it (trips/signals.py)
+}
+CACHE_KEY = "fleet-availability"
+
+# Driver columns in the snapshot, read in one query
+DRIVER_COLUMNS = (
+    "id", "name", "employee_id", "current_location",
+    "current_cycle_hours", "current_driving_hours", "current_on_duty_hours",
+)
+TEXT_COLUMNS = ("name", "employee_id", "current_location")
+REMAINING_COLUMNS = ("remaining_drive_hours", "remaining_on_duty_hours", "remaining_cycle_hours")
+ORDERING_FIELDS = ("name", "employee_id", *REMAINING_COLUMNS)
+
+HOURS_LIMITS = {
+    "drive": HOSCalculator.MAX_DRIVING_HOURS,
+    "on_duty": HOSCalculator.MAX_ON_DUTY_HOURS,
+    "cycle": HOSCalculator.MAX_CYCLE_HOURS,
+}
+
+
+def _cache():
+    options = {**DEFAULT_FLEET_AVAILABILITY, **getattr(settings, "FLEET_AVAILABILITY", {})}
+    return caches[options["ALIAS"]], options["TIMEOUT"]
+
+
+def remaining_hours(driving, on_duty, cycle):
+    """
+    Hours left before the 11-hour driving, 14-hour on-duty and 70-hour
+    cycle limits, for arrays of the hours used. Each limit caps the ones
+    before it: no one can drive past the end of their on-duty window or
+    cycle.
+    """
+    cycle_left = np.clip(HOSCalculator.MAX_CYCLE_HOURS - cycle, 0.0, None)
+    on_duty_left = np.clip(np.minimum(HOSCalculator.MAX_ON_DUTY_HOURS - on_duty, cycle_left), 0.0, None)
+    drive_left = np.clip(np.minimum(HOSCalculator.MAX_DRIVING_HOURS - driving, on_duty_left), 0.0, None)
+    return drive_left, on_duty_left, cycle_left
+
+
+def fleet_snapshot():
+    """
+    Every driver's DRIVER_COLUMNS and REMAINING_COLUMNS as arrays in ``pk``
+    order, plus ``generated_at``. Built from one query and kept in the cache
+    for ``FLEET_AVAILABILITY["TIMEOUT"]`` seconds.
+    """
+    cache, timeout = _cache()
+    snapshot = cache.get(CACHE_KEY)
+    if snapshot is not None:
+        return snapshot
+
+    rows = list(Driver.objects.order_by("pk").values_list(*DRIVER_COLUMNS))
+    columns = list(zip(*rows, strict=True)) if rows else [()] * len(DRIVER_COLUMNS)
+    snapshot = {"generated_at": timezone.now()}
+    for name, values in zip(DRIVER_COLUMNS, columns, strict=True):
+        snapshot[name] = np.array(values, dtype=str if name in TEXT_COLUMNS else np.float64)
+    snapshot["id"] = snapshot["id"].astype(np.int64)
+    remaining = remaining_hours(
+        snapshot["current_driving_hours"], snapshot["current_on_duty_hours"], snapshot["current_cycle_hours"]
+    )
+    snapshot.update(zip(REMAINING_COLUMNS, remaining, strict=True))
+    cache.set(CACHE_KEY, snapshot, timeout=timeout)
+    return snapshot
+
+
+def driver_availability(driver):
+    """One Driver's row as in ``fleet_availability``, from the instance."""
+    row = {name: getattr(driver, name) for name in DRIVER_COLUMNS}
+    remaining = remaining_hours(
+        np.float64(driver.current_driving_hours),
+        np.float64(driver.current_on_duty_hours),
+        np.float64(driver.current_cycle_hours),
+    )
+    row.update((name, round(float(value), 2)) for name, value in zip(REMAINING_COLUMNS, remaining, strict=True))
+    return row
+
+
+def invalidate_fleet_availability():
+    cache, _ = _cache()
+    cache.delete(CACHE_KEY)
+
+
+def fleet_availability(
+    min_drive_hours=None,
+    min_on_duty_hours=None,
+    min_cycle_hours=None,
+    location=None,
+    search=None,
+    ordering="-remaining_drive_hours",
+    limit=None,
+):
+    """
+    Filters and sorts the fleet snapshot. Returns ``(generated_at, count,
+    rows)`` where ``count`` is the number of matching drivers and ``rows``
+    the first ``limit`` of them as dicts.
+
+    ``search`` is a case-insensitive substring of the name or employee id;
+    ``ordering`` is one of ORDERING_FIELDS, prefixed with ``-`` for
+    descending. Ties keep ``pk`` order.
+    """
+    snapshot = fleet_snapshot()
+    mask = np.ones(len(snapshot["id"]), dtype=bool)
+    for column, minimum in zip(REMAINING_COLUMNS, (min_drive_hours, min_on_duty_hours, min_cycle_hours), strict=True):
+        if minimum is not None:
+            mask &= snapshot[column] >= minimum
+    if location is not None:
+        mask &= snapshot["current_location"] == location
+    if search:
+        needle = search.lower()
+        mask &= (np.char.find(np.char.lower(snapshot["name"]), needle) >= 0) | (
+            np.char.find(np.char.lower(snapshot["employee_id"]), needle) >= 0
+        )
+    matches = np.flatnonzero(mask)
+
+    field = ordering.lstrip("-")
+    if field not in ORDERING_FIELDS:
+        raise ValueError(f"Unknown ordering: {ordering}.")
+    keys = snapshot[field][matches]
+    descending = ordering.startswith("-")
+    if descending and field in REMAINING_COLUMNS:
+        order = np.argsort(-keys, kind="stable")
+    else:
+        order = np.argsort(keys, kind="stable")
+        if descending:
+            order = order[::-1]
+    selected = matches[order][:limit]
+
+    columns = {name: snapshot[name][selected] for name in (*DRIVER_COLUMNS, *REMAINING_COLUMNS)}
+    for name in REMAINING_COLUMNS:
+        columns[name] = np.round(columns[name], 2)
+    names = list(columns)
+    rows = [
+        dict(zip(names, values, strict=True))
+        for values in zip(*(columns[name].tolist() for name in names), strict=True)
+    ]
+    return snapshot["generated_at"], len(matches), rows
@@ -0,0 +1,127 @@
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+
+DEFAULT_RESPONSE_CACHE = {
+    "ALIAS": "default",  # entry in settings.CACHES
+    "TIMEOUT": 300,  # seconds
+}
+
+# Response headers stored with the cached body
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Vary", "Allow")
+
+
+class ResponseCache:
+    """
+    Rendered GET responses kept in a Django cache, grouped into scopes such
+    as ``"trips"`` or ``"trip:42"``.
+
+    Every scope has a generation token stored in the same cache, and it is
+    part of the key of every response in that scope. Invalidating a scope
+    replaces its token, so all of its responses become unreachable at once
+    and expire on their own; nothing has to enumerate them. With the file
+    backend the tokens are shared by every worker process on the host.
+    """
+
+    def __init__(self, alias="default", timeout=300):
+        self.alias = alias
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_settings(cls):
+        options = {**DEFAULT_RESPONSE_CACHE, **getattr(settings, "RESPONSE_CACHE", {})}
+        return cls(alias=options["ALIAS"], timeout=options["TIMEOUT"])
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _generations(self, scopes):
+        keys = [f"response-scope:{scope}" for scope in scopes]
+        tokens = self.cache.get_many(keys)
+        for key in keys:
+            if key not in tokens:
+                # add() keeps a token another process set first
+                self.cache.add(key, uuid.uuid4().hex, timeout=None)
+                tokens[key] = self.cache.get(key)
+        return [tokens[key] for key in keys]
+
+    def key(self, request, scopes):
+        """Cache key for a GET ``request`` whose response depends on ``scopes``."""
+        # Host and scheme too: responses carry absolute links (pagination)
+        variant = hashlib.sha256(
+            "|".join(
+                (request.scheme, request.get_host(), request.get_full_path(), request.headers.get("Accept", ""))
+            ).encode()
+        ).hexdigest()
+        return "response:" + ":".join([*self._generations(scopes), variant])
+
+    def get(self, key):
+        """Returns the cached HttpResponse for ``key``, or None on a miss."""
+        entry = self.cache.get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        content, headers = entry
+        response = HttpResponse(content)
+        for name, value in headers.items():
+            response.headers[name] = value
+        return response
+
+    def set(self, key, response):
+        """Stores a rendered 200 ``response``."""
+        headers = {
+            name: response.headers[name]
+            for name in CACHED_HEADERS
+            if name in response.headers
+        }
+        self.cache.set(key, (response.content, headers), timeout=self.timeout)
+
+    def invalidate(self, *scopes):
+        self.cache.set_many(
+            {f"response-scope:{scope}": uuid.uuid4().hex for scope in scopes},
+            timeout=None,
+        )
+        with self._lock:
+            self.invalidations += 1
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Returns the process-wide ResponseCache configured by ``settings.RESPONSE_CACHE``."""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache.from_settings()
+    return _response_cache
+
+
+def invalidate_trips(*trip_ids):
+    """Invalidates the trip list and the given trips' detail responses."""
+    get_response_cache().invalidate("trips", *(f"trip:{pk}" for pk in trip_ids))
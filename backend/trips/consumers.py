@@ -0,0 +1,111 @@
+import uuid
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .availability import fleet_availability
+from .models import Driver, PlanningJob, Trip
+from .push import (
+    FLEET_GROUP,
+    driver_event,
+    driver_group,
+    job_event,
+    job_group,
+    progress_events,
+    trip_event,
+    trip_group,
+)
+
+
+class DispatchConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Live trip and HOS updates for dispatch boards, instead of polling the
+    REST API. Clients send
+
+        {"action": "subscribe", "trips": [ids], "drivers": [ids], "jobs": [ids], "fleet": true}
+
+    (any subset of the keys) and get the current state of each right away,
+    then every change as it is saved (see trips.push): ``trip.updated``,
+    ``trip.deleted``, ``trip.progress``, ``driver.hos`` and ``job.status``
+    events. ``"fleet": true`` follows every driver, starting from a
+    ``drivers.snapshot`` of the whole fleet. ``"unsubscribe"`` takes the
+    same keys.
+    """
+
+    max_subscriptions = 1000
+
+    async def connect(self):
+        self.subscriptions = set()
+        await self.accept()
+
+    async def disconnect(self, code):
+        for group in self.subscriptions:
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get("action") if isinstance(content, dict) else None
+        if action not in ("subscribe", "unsubscribe"):
+            await self.send_json({"type": "error", "detail": "Expected a subscribe or unsubscribe action."})
+            return
+        try:
+            targets = self.parse_targets(content)
+        except (TypeError, ValueError):
+            await self.send_json({"type": "error", "detail": "trips and drivers take lists of ids, jobs of UUIDs."})
+            return
+        groups = self.target_groups(targets)
+
+        if action == "unsubscribe":
+            for group in groups & self.subscriptions:
+                await self.channel_layer.group_discard(group, self.channel_name)
+            self.subscriptions -= groups
+        else:
+            groups -= self.subscriptions
+            if len(self.subscriptions) + len(groups) > self.max_subscriptions:
+                await self.send_json({"type": "error", "detail": f"At most {self.max_subscriptions} subscriptions."})
+                return
+            # Join before reading the state, so no change falls in between
+            for group in groups:
+                await self.channel_layer.group_add(group, self.channel_name)
+            self.subscriptions |= groups
+            for event in await database_sync_to_async(self.snapshot)(targets):
+                await self.send_json(event)
+        await self.send_json({"type": f"{action}d", "subscriptions": sorted(self.subscriptions)})
+
+    @staticmethod
+    def parse_targets(content):
+        return {
+            "trips": [int(pk) for pk in content.get("trips", [])],
+            "drivers": [int(pk) for pk in content.get("drivers", [])],
+            "jobs": [str(uuid.UUID(str(pk))) for pk in content.get("jobs", [])],
+            "fleet": content.get("fleet") is True,
+        }
+
+    @staticmethod
+    def target_groups(targets):
+        groups = {
+            *map(trip_group, targets["trips"]),
+            *map(driver_group, targets["drivers"]),
+            *map(job_group, targets["jobs"]),
+        }
+        if targets["fleet"]:
+            groups.add(FLEET_GROUP)
+        return groups
+
+    @staticmethod
+    def snapshot(targets):
+        """The current state of the targets, as the events a change would push."""
+        events = []
+        progress = progress_events(targets["trips"])
+        for trip in Trip.objects.filter(pk__in=targets["trips"]):
+            events.append(trip_event(trip))
+            if trip.pk in progress:
+                events.append(progress[trip.pk])
+        events.extend(driver_event(driver) for driver in Driver.objects.filter(pk__in=targets["drivers"]))
+        events.extend(job_event(job) for job in PlanningJob.objects.filter(pk__in=targets["jobs"]))
+        if targets["fleet"]:
+            generated_at, _, drivers = fleet_availability(ordering="name")
+            events.append({"type": "drivers.snapshot", "generated_at": generated_at.isoformat(), "drivers": drivers})
+        return events
+
+    async def push_event(self, message):
+        await self.send_json(message["event"])
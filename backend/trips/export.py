@@ -0,0 +1,98 @@
+import io
+import zipfile
+from datetime import timedelta
+
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from api.duty_log import DutyLog, DutyLogEncoder
+from api.log_sheet import render_log_sheet
+
+from .models import DailyLog, Trip
+
+
+# Rows fetched per database round trip while exporting
+EXPORT_CHUNK_SIZE = 500
+
+
+def trip_record(trip):
+    """The export shape of a trip: its columns plus its daily logs."""
+    return {
+        "id": trip.pk,
+        "client_id": trip.client_id,
+        "created_at": trip.created_at,
+        "payload": trip.payload,
+        "daily_logs": [
+            {"id": log.pk, "log_data": log.log_data} for log in trip.daily_logs.all()
+        ],
+    }
+
+
+def iter_trips_ndjson(chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields every trip with its daily logs as one NDJSON line, oldest first.
+    Trips are read ``chunk_size`` at a time with their daily logs prefetched
+    per chunk, so memory use does not grow with the table.
+    """
+    encoder = DutyLogEncoder(separators=(",", ":"))
+    trips = Trip.objects.order_by("pk").prefetch_related("daily_logs")
+    for trip in trips.iterator(chunk_size=chunk_size):
+        yield encoder.encode(trip_record(trip)) + "\n"
+
+
+class _ZipStream(io.RawIOBase):
+    """Unseekable sink for ZipFile whose output is collected with ``take()``."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_log_sheets_zip(start, end, fmt="png", chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields a ZIP archive of rendered log sheets (see api.log_sheet) for every
+    daily log of the trips created between the dates ``start`` and ``end``
+    (inclusive), one member per day:
+    ``<trip date>-trip-<id>/day-<n>-<log date>.<fmt>``. A trip's nth log
+    (by id) is dated n - 1 days after the trip was created.
+
+    Members are yielded as soon as they are written, so neither the archive
+    nor the trip list is held in memory. Logs without duty segments are
+    skipped.
+    """
+    stream = _ZipStream()
+    trips = (
+        Trip.objects.filter(created_at__date__range=(start, end))
+        .order_by("created_at", "pk")
+        .prefetch_related(Prefetch("daily_logs", queryset=DailyLog.objects.order_by("pk")))
+    )
+    # PNG is already deflated
+    compression = zipfile.ZIP_STORED if fmt == "png" else zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(stream, "w", compression=compression) as archive:
+        for trip in trips.iterator(chunk_size=chunk_size):
+            created = timezone.localtime(trip.created_at)
+            folder = f"{created:%Y-%m-%d}-trip-{trip.pk}"
+            for day, log in enumerate(trip.daily_logs.all()):
+                if not isinstance(log.log_data, DutyLog):
+                    continue
+                content, _ = render_log_sheet(log.log_data, fmt)
+                date = created + timedelta(days=day)
+                info = zipfile.ZipInfo(
+                    f"{folder}/day-{day + 1}-{date:%Y-%m-%d}.{fmt}",
+                    date_time=created.timetuple()[:6],
+                )
+                info.compress_type = compression
+                archive.writestr(info, content)
+                yield stream.take()
+    yield stream.take()  # central directory
@@ -0,0 +1,132 @@
+import math
+
+from django.db import models
+
+from api.duty_log import DutyLog, DutyLogEncoder
+from api.geometry import decode_polyline, encode_polyline
+
+
+# Decimal places kept in stored routes: 6 matches the GeoJSON from Mapbox
+ROUTE_PRECISION = 6
+
+
+def compact_payload(payload):
+    """
+    Returns ``payload`` with its ``"route"`` list of ``[lat, lon]`` pairs
+    replaced by an encoded ``"route_polyline"``. Anything else is returned
+    unchanged.
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get("route"), list):
+        return payload
+    try:
+        points = encode_polyline(payload["route"], ROUTE_PRECISION)
+    except (TypeError, ValueError):
+        return payload  # not a list of coordinate pairs; keep it verbatim
+    payload = {key: value for key, value in payload.items() if key != "route"}
+    payload["route_polyline"] = {"points": points, "precision": ROUTE_PRECISION}
+    return payload
+
+
+def expand_payload(payload):
+    """Reverses ``compact_payload``, decoding the route back into a list."""
+    if not isinstance(payload, dict) or "route_polyline" not in payload:
+        return payload
+    payload = dict(payload)
+    encoded = payload.pop("route_polyline")
+    payload["route"] = decode_polyline(encoded["points"], encoded["precision"])
+    return payload
+
+
+# Summary column -> payload keys it is read from (frontend camelCase first)
+SUMMARY_KEYS = {
+    "total_miles": ("totalMiles", "total_miles"),
+    "pickup_location": ("pickupLocation", "pickup_location"),
+    "dropoff_location": ("dropoffLocation", "dropoff_location"),
+    "cycle_hours_used": ("currentCycleUsed", "current_cycle_hours", "cycle_hours_used"),
+}
+LOCATION_MAX_LENGTH = 255
+
+
+def _first(payload, keys):
+    return next(
+        (payload[key] for key in keys if payload.get(key) not in (None, "")), None
+    )
+
+
+def _number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return number if math.isfinite(number) else 0.0
+
+
+def payload_summary(payload):
+    """
+    Extracts the trip summary columns (see SUMMARY_KEYS) from a payload.
+    Missing or malformed values become 0 or "".
+    """
+    if not isinstance(payload, dict):
+        payload = {}
+    summary = {}
+    for column, keys in SUMMARY_KEYS.items():
+        value = _first(payload, keys)
+        if column.endswith("_location"):
+            summary[column] = (
+                str(value)[:LOCATION_MAX_LENGTH] if value is not None else ""
+            )
+        else:
+            summary[column] = _number(value)
+    return summary
+
+
+def payload_stop_points(payload):
+    """``[lat, lon]`` of every payload stop that has numeric ``coords``."""
+    stops = payload.get("stops") if isinstance(payload, dict) else None
+    return stop_points(stops)
+
+
+def stop_points(stops):
+    """``[lat, lon]`` of every stop in a list of stop dicts with numeric ``coords``."""
+    points = []
+    for stop in stops if isinstance(stops, list) else ():
+        coords = stop.get("coords") if isinstance(stop, dict) else None
+        if (
+            isinstance(coords, list)
+            and len(coords) == 2
+            and all(isinstance(value, (int, float)) and math.isfinite(value) for value in coords)
+        ):
+            points.append([float(coords[0]), float(coords[1])])
+    return points
+
+
+class DutyLogField(models.JSONField):
+    """
+    JSONField for a day's duty segments. Lists of ``{"type", "hours"}`` dicts
+    are loaded as compact DutyLog objects; any other JSON is left as is.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("encoder", DutyLogEncoder)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if kwargs.get("encoder") is DutyLogEncoder:
+            del kwargs["encoder"]
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        value = super().from_db_value(value, expression, connection)
+        return DutyLog.coerce(value)
+
+
+class RoutePayloadField(models.JSONField):
+    """
+    JSONField for trip payloads that stores the route as an encoded polyline
+    (see ``compact_payload``). Loaded payloads keep the encoded form; call
+    ``expand_payload`` when the full geometry is needed.
+    """
+
+    def get_prep_value(self, value):
+        return super().get_prep_value(compact_payload(value))
@@ -0,0 +1,51 @@
+from typing import ClassVar
+
+from django.utils.dateparse import parse_datetime
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+def _parse_float(value):
+    return float(value)
+
+
+def _parse_datetime(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+class TripSummaryFilter(BaseFilterBackend):
+    """
+    Filters trips on their indexed summary columns:
+    ``?min_miles=&max_miles=&pickup=&dropoff=&min_cycle_hours=&max_cycle_hours=``
+    plus ``?created_after=&created_before=`` (ISO 8601).
+    """
+
+    # query parameter -> (ORM lookup, parser)
+    params: ClassVar[dict] = {
+        "min_miles": ("total_miles__gte", _parse_float),
+        "max_miles": ("total_miles__lte", _parse_float),
+        "pickup": ("pickup_location", str),
+        "dropoff": ("dropoff_location", str),
+        "min_cycle_hours": ("cycle_hours_used__gte", _parse_float),
+        "max_cycle_hours": ("cycle_hours_used__lte", _parse_float),
+        "created_after": ("created_at__gte", _parse_datetime),
+        "created_before": ("created_at__lt", _parse_datetime),
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        lookups = {}
+        errors = {}
+        for param, (lookup, parse) in self.params.items():
+            if param not in request.query_params:
+                continue
+            try:
+                lookups[lookup] = parse(request.query_params[param])
+            except ValueError:
+                errors[param] = "Invalid value."
+        if errors:
+            raise ValidationError(errors)
+        return queryset.filter(**lookups)
@@ -0,0 +1,135 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from spotter_app.db import SQLITE_PRAGMAS
+
+
+# name -> (pragmas, BEGIN mode, busy timeout in seconds)
+PROFILES = {
+    # What the project ran with before: rollback journal, sqlite3's 5 s
+    # default timeout and deferred transactions
+    "baseline": ({"journal_mode": "DELETE", "synchronous": "FULL"}, "DEFERRED", 5.0),
+    "tuned": (SQLITE_PRAGMAS, "IMMEDIATE", 20.0),
+}
+
+PAYLOAD = json.dumps({"route_polyline": {"points": "x" * 2000, "precision": 6}})
+
+
+def _connect(path, profile):
+    pragmas, _, timeout = PROFILES[profile]
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def _writer(path, profile, deadline, results):
+    conn = _connect(path, profile)
+    begin = f"BEGIN {PROFILES[profile][1]}"
+    done = errors = 0
+    while time.monotonic() < deadline:
+        try:
+            # Read-then-write, like a view that validates before saving
+            conn.execute(begin)
+            conn.execute(
+                "SELECT COUNT(*) FROM bench_trip WHERE client_id = ?", (str(done),)
+            )
+            conn.execute(
+                "INSERT INTO bench_trip (client_id, payload, created_at) VALUES (?, ?, ?)",
+                (str(done), PAYLOAD, time.time()),
+            )
+            conn.execute("COMMIT")
+            done += 1
+        except sqlite3.OperationalError:  # "database is locked"
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            errors += 1
+    results.put(("write", done, errors))
+
+
+def _reader(path, profile, deadline, results):
+    conn = _connect(path, profile)
+    done = errors = 0
+    while time.monotonic() < deadline:
+        try:
+            conn.execute(
+                "SELECT id, client_id, created_at FROM bench_trip ORDER BY id DESC LIMIT 50"
+            ).fetchall()
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    results.put(("read", done, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures SQLite read/write throughput with concurrent worker processes, "
+        "before (baseline) and after (tuned) the spotter_app.db profile. Runs "
+        "against a scratch database, never the project one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=5.0)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--profile", choices=[*PROFILES, "all"], default="all")
+
+    def handle(self, *args, **options):
+        profiles = (
+            list(PROFILES) if options["profile"] == "all" else [options["profile"]]
+        )
+        self.stdout.write(
+            f"{options['writers']} writer / {options['readers']} reader processes, "
+            f"{options['seconds']:g} s per profile"
+        )
+        self.stdout.write(
+            f"{'profile':<10}{'writes/s':>10}{'reads/s':>10}{'write errors':>14}{'read errors':>13}"
+        )
+        for profile in profiles:
+            writes, reads = self.run_profile(profile, options)
+            self.stdout.write(
+                f"{profile:<10}{writes[0] / options['seconds']:>10.0f}"
+                f"{reads[0] / options['seconds']:>10.0f}{writes[1]:>14}{reads[1]:>13}"
+            )
+
+    def run_profile(self, profile, options):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.sqlite3")
+            with _connect(path, profile) as conn:
+                conn.execute(
+                    "CREATE TABLE bench_trip (id INTEGER PRIMARY KEY, client_id TEXT, "
+                    "payload TEXT, created_at REAL)"
+                )
+                conn.executemany(
+                    "INSERT INTO bench_trip (client_id, payload, created_at) VALUES (?, ?, ?)",
+                    [(str(i), PAYLOAD, time.time()) for i in range(1000)],
+                )
+
+            results = multiprocessing.Queue()
+            deadline = time.monotonic() + options["seconds"]
+            workers = [
+                multiprocessing.Process(
+                    target=target, args=(path, profile, deadline, results)
+                )
+                for target, count in (
+                    (_writer, options["writers"]),
+                    (_reader, options["readers"]),
+                )
+                for _ in range(count)
+            ]
+            for worker in workers:
+                worker.start()
+            totals = {"write": [0, 0], "read": [0, 0]}
+            for _ in workers:
+                kind, done, errors = results.get()
+                totals[kind][0] += done
+                totals[kind][1] += errors
+            for worker in workers:
+                worker.join()
+        return totals["write"], totals["read"]
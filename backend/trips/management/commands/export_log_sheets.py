@@ -0,0 +1,36 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from api.log_sheet import FORMATS
+
+from trips.export import EXPORT_CHUNK_SIZE, iter_log_sheets_zip
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes a ZIP of rendered ELD log sheets for the trips created between "
+        "two dates (inclusive)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("start", type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument("end", type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument("-o", "--output", required=True, help="ZIP file to write.")
+        parser.add_argument("--type", choices=list(FORMATS), default="png")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help="Trips read per database round trip.",
+        )
+
+    def handle(self, *args, **options):
+        chunks = iter_log_sheets_zip(
+            options["start"],
+            options["end"],
+            options["type"],
+            chunk_size=options["chunk_size"],
+        )
+        with open(options["output"], "wb") as out:
+            out.writelines(chunks)
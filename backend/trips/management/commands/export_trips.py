@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from trips.export import EXPORT_CHUNK_SIZE, iter_trips_ndjson
+
+
+class Command(BaseCommand):
+    help = "Writes every trip with its daily logs as NDJSON (one trip per line)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-o", "--output", help="File to write to (default: standard output)."
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help="Trips read per database round trip.",
+        )
+
+    def handle(self, *args, **options):
+        lines = iter_trips_ndjson(chunk_size=options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as out:
+                out.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:54
+
+import trips.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0005_alter_trip_payload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailylog',
+            name='log_data',
+            field=trips.fields.DutyLogField(blank=True, default=dict, null=True),
+        ),
+    ]
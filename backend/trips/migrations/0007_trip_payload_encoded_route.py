@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:00
+
+import django.core.serializers.json
+import trips.fields
+from django.db import migrations
+
+
+def encode_routes(apps, schema_editor):
+    Trip = apps.get_model("trips", "Trip")
+    for trip in Trip.objects.only("id", "payload").iterator(chunk_size=200):
+        payload = trips.fields.compact_payload(trip.payload)
+        if payload is not trip.payload:
+            Trip.objects.filter(pk=trip.pk).update(payload=payload)
+
+
+def decode_routes(apps, schema_editor):
+    Trip = apps.get_model("trips", "Trip")
+    for trip in Trip.objects.only("id", "payload").iterator(chunk_size=200):
+        payload = trips.fields.expand_payload(trip.payload)
+        if payload is not trip.payload:
+            Trip.objects.filter(pk=trip.pk).update(payload=payload)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0006_dailylog_log_data_duty_log'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, decode_routes),
+        migrations.AlterField(
+            model_name='trip',
+            name='payload',
+            field=trips.fields.RoutePayloadField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder),
+        ),
+        migrations.RunPython(encode_routes, migrations.RunPython.noop),
+    ]
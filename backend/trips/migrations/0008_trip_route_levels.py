@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:02
+
+import django.db.models.deletion
+import trips.fields
+from api.geometry import route_levels
+from django.db import migrations, models
+
+
+def build_route_levels(apps, schema_editor):
+    Trip = apps.get_model("trips", "Trip")
+    TripRouteLevel = apps.get_model("trips", "TripRouteLevel")
+    for trip in Trip.objects.only("id", "payload").iterator(chunk_size=200):
+        payload = trips.fields.compact_payload(trip.payload)
+        if not isinstance(payload, dict) or "route_polyline" not in payload:
+            continue
+        route = trips.fields.expand_payload(payload)["route"]
+        TripRouteLevel.objects.bulk_create(
+            TripRouteLevel(trip_id=trip.pk, zoom=zoom, tolerance=tolerance, points=points, vertex_count=count)
+            for zoom, tolerance, points, count in route_levels(route, trips.fields.ROUTE_PRECISION)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0007_trip_payload_encoded_route'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripRouteLevel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField()),
+                ('tolerance', models.FloatField()),
+                ('points', models.TextField()),
+                ('vertex_count', models.PositiveIntegerField()),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='route_levels', to='trips.trip')),
+            ],
+            options={
+                'ordering': ['zoom'],
+                'constraints': [models.UniqueConstraint(fields=('trip', 'zoom'), name='unique_trip_route_level')],
+            },
+        ),
+        migrations.RunPython(build_route_levels, migrations.RunPython.noop),
+    ]
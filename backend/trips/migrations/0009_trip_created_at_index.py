@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0008_trip_route_levels'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trip',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:08
+
+import trips.fields
+from django.db import migrations, models
+
+
+def fill_summary_columns(apps, schema_editor):
+    Trip = apps.get_model("trips", "Trip")
+    batch = []
+    for trip in Trip.objects.only("id", "payload").iterator(chunk_size=200):
+        for column, value in trips.fields.payload_summary(trip.payload).items():
+            setattr(trip, column, value)
+        batch.append(trip)
+        if len(batch) == 200:
+            Trip.objects.bulk_update(batch, list(trips.fields.SUMMARY_KEYS))
+            batch = []
+    Trip.objects.bulk_update(batch, list(trips.fields.SUMMARY_KEYS))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0010_sync_updated_at_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='cycle_hours_used',
+            field=models.FloatField(db_index=True, default=0.0),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='dropoff_location',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='pickup_location',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='total_miles',
+            field=models.FloatField(db_index=True, default=0.0),
+        ),
+        migrations.RunPython(fill_summary_columns, migrations.RunPython.noop),
+    ]
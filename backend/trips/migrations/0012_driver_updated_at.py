@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0011_trip_summary_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='driver',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:50
+
+import django.db.models.deletion
+import trips.fields
+from api.geometry import route_cells
+from django.db import migrations, models
+
+
+def build_cells(apps, schema_editor):
+    Trip = apps.get_model("trips", "Trip")
+    TripCell = apps.get_model("trips", "TripCell")
+    for trip in Trip.objects.only("id", "payload").iterator(chunk_size=200):
+        payload = trips.fields.compact_payload(trip.payload)
+        has_route = isinstance(payload, dict) and "route_polyline" in payload
+        route = trips.fields.expand_payload(payload)["route"] if has_route else []
+        cells = {
+            tuple(cell)
+            for points in (route, trips.fields.payload_stop_points(payload))
+            if points
+            for cell in route_cells(points).tolist()
+        }
+        TripCell.objects.bulk_create(
+            TripCell(trip_id=trip.pk, lat_index=lat, lon_index=lon) for lat, lon in sorted(cells)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0013_planningjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lat_index', models.SmallIntegerField()),
+                ('lon_index', models.SmallIntegerField()),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cells', to='trips.trip')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['lat_index', 'lon_index'], name='trip_cell_lat_lon')],
+                'constraints': [models.UniqueConstraint(fields=('trip', 'lat_index', 'lon_index'), name='unique_trip_cell')],
+            },
+        ),
+        migrations.RunPython(build_cells, migrations.RunPython.noop),
+    ]
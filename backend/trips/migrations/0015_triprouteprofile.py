@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:10
+
+import django.db.models.deletion
+import trips.fields
+from api.geometry import RouteProfile
+from django.db import migrations, models
+
+
+def build_route_profiles(apps, schema_editor):
+    Trip = apps.get_model("trips", "Trip")
+    TripRouteProfile = apps.get_model("trips", "TripRouteProfile")
+    for trip in Trip.objects.only("id", "payload").iterator(chunk_size=200):
+        payload = trips.fields.compact_payload(trip.payload)
+        if not isinstance(payload, dict) or "route_polyline" not in payload:
+            continue
+        route = trips.fields.expand_payload(payload)["route"]
+        if not route:
+            continue
+        profile = RouteProfile(route)
+        points, miles = profile.pack()
+        TripRouteProfile.objects.create(
+            trip_id=trip.pk, points=points, miles=miles, vertex_count=len(route), total_miles=profile.total_miles
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0014_tripcell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripRouteProfile',
+            fields=[
+                ('trip', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='route_profile', serialize=False, to='trips.trip')),
+                ('points', models.BinaryField()),
+                ('miles', models.BinaryField()),
+                ('vertex_count', models.PositiveIntegerField()),
+                ('total_miles', models.FloatField()),
+            ],
+        ),
+        migrations.RunPython(build_route_profiles, migrations.RunPython.noop),
+    ]
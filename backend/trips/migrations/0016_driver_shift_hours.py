@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0015_triprouteprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='driver',
+            name='current_driving_hours',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='driver',
+            name='current_on_duty_hours',
+            field=models.FloatField(default=0.0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:55
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0016_driver_shift_hours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripProgress',
+            fields=[
+                ('trip', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='progress', serialize=False, to='trips.trip')),
+                ('position', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('reported_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,7 +1,30 @@
-from django.db import models
+import uuid
+from typing import ClassVar
+
+from django.db import models, transaction
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db.models import JSONField
-from django.db.models.deletion import CASCADE
+from django.db.models.deletion import CASCADE, SET_NULL
+from django.utils import timezone
+
+from api.duty_log import DutyLogEncoder
+from api.geometry import RouteProfile, route_cells, route_levels
+
+from .fields import (
+    LOCATION_MAX_LENGTH, ROUTE_PRECISION, DutyLogField, RoutePayloadField,
+    SUMMARY_KEYS, compact_payload, expand_payload, payload_stop_points, payload_summary,
+)
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def soft_delete(self):
+        """Marks the rows deleted, leaving them as tombstones for sync clients."""
+        now = timezone.now()
+        return self.filter(deleted_at__isnull=True).update(deleted_at=now, updated_at=now)
+
+class LiveManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """Default manager that hides soft-deleted rows."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
 
 class Driver(models.Model):
     """
@@ -11,7 +34,11 @@ class Driver(models.Model):
     name = models.CharField(max_length=255)
     employee_id = models.CharField(max_length=50, unique=True)
     current_cycle_hours = models.FloatField(default=0.0)
+    # Hours in the current shift, i.e. since the last 10 consecutive hours off
+    current_driving_hours = models.FloatField(default=0.0)
+    current_on_duty_hours = models.FloatField(default=0.0)  # driving included
     current_location = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)  # ETag / Last-Modified
 
     def __str__(self):
         return self.name
@@ -22,19 +49,255 @@ class Trip(models.Model):
     """
 
     client_id = models.CharField(max_length=64, db_index=True)  # id from frontend
-    payload = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)  # Use a default value to prevent errors
-    created_at = models.DateTimeField(auto_now_add=True)
+    payload = RoutePayloadField(default=dict, blank=True, encoder=DjangoJSONEncoder)  # Use a default value to prevent errors
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)  # cursor pagination key
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # sync cursor
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)  # tombstone
+
+    # Copied out of payload on save (see fields.payload_summary) for filtering
+    total_miles = models.FloatField(default=0.0, db_index=True)
+    pickup_location = models.CharField(max_length=LOCATION_MAX_LENGTH, blank=True, default="", db_index=True)
+    dropoff_location = models.CharField(max_length=LOCATION_MAX_LENGTH, blank=True, default="", db_index=True)
+    cycle_hours_used = models.FloatField(default=0.0, db_index=True)
+
+    objects = LiveManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.client_id} - {self.created_at:%Y-%m-%d %H:%M}"
 
+    @transaction.atomic  # route levels, profile and cells are part of the saved state
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        payload_changed = update_fields is None or "payload" in update_fields
+        if payload_changed:
+            self.update_summary()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, *SUMMARY_KEYS}
+        super().save(*args, **kwargs)
+        if payload_changed:
+            # A replan keeps the route, so its levels and profile stay valid
+            route_key = self.route_key()
+            if getattr(self, "_saved_route", self) != route_key:
+                self.build_route_levels()
+                self.build_route_profile()
+                self._saved_route = route_key
+            self.build_cells()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        trip = super().from_db(db, field_names, values)
+        if "payload" in trip.__dict__:  # not deferred
+            trip._saved_route = trip.route_key()
+        return trip
+
+    def route_key(self):
+        """The encoded route the derived route rows are built from (None without one)."""
+        payload = compact_payload(self.payload)
+        return payload.get("route_polyline") if isinstance(payload, dict) else None
+
+    def route_points(self):
+        """The payload's route as ``[[lat, lon], ...]`` (empty without one)."""
+        payload = compact_payload(self.payload)
+        if not isinstance(payload, dict) or "route_polyline" not in payload:
+            return []
+        return expand_payload(payload)["route"]
+
+    def update_summary(self):
+        """Refreshes the summary columns from the payload."""
+        for column, value in payload_summary(self.payload).items():
+            setattr(self, column, value)
+
+    @transaction.atomic
+    def soft_delete(self):
+        """Soft-deletes the trip and its daily logs."""
+        DailyLog.objects.filter(trip=self).soft_delete()
+        self.deleted_at = timezone.now()
+        self.save(update_fields=["deleted_at", "updated_at"])
+
+    def build_route_levels(self):
+        """
+        Replaces the stored simplified copies of the route, one per zoom in
+        ``api.geometry.ROUTE_LEVEL_ZOOMS``, so map views can fetch only the
+        vertices they can draw.
+        """
+        self.route_levels.all().delete()
+        TripRouteLevel.objects.bulk_create(self.make_route_levels())
+
+    def make_route_levels(self):
+        """Unsaved TripRouteLevel rows for the current payload's route."""
+        route = self.route_points()
+        if not route:
+            return []
+        return [
+            TripRouteLevel(trip=self, zoom=zoom, tolerance=tolerance, points=points, vertex_count=count)
+            for zoom, tolerance, points, count in route_levels(route, ROUTE_PRECISION)
+        ]
+
+    def build_route_profile(self):
+        """Replaces the trip's TripRouteProfile (none if it has no route)."""
+        TripRouteProfile.objects.filter(trip=self).delete()
+        profile = self.make_route_profile()
+        if profile is not None:
+            profile.save()
+
+    def make_route_profile(self):
+        """An unsaved TripRouteProfile for the current payload's route, or None."""
+        route = self.route_points()
+        if not route:
+            return None
+        profile = RouteProfile(route)
+        points, miles = profile.pack()
+        return TripRouteProfile(
+            trip=self, points=points, miles=miles, vertex_count=len(route), total_miles=profile.total_miles
+        )
+
+    def build_cells(self):
+        """Replaces the trip's TripCell rows (its spatial index entries)."""
+        self.cells.all().delete()
+        TripCell.objects.bulk_create(self.make_cells())
+
+    def make_cells(self):
+        """Unsaved TripCell rows for the current payload's route and stops."""
+        cells = {
+            tuple(cell)
+            for points in (self.route_points(), payload_stop_points(self.payload))
+            if points
+            for cell in route_cells(points).tolist()
+        }
+        return [TripCell(trip=self, lat_index=lat, lon_index=lon) for lat, lon in sorted(cells)]
+
+class TripRouteLevel(models.Model):
+    """
+    A Douglas-Peucker simplified copy of a trip's route for one map zoom level
+    (tolerance in degrees, about one pixel at that zoom).
+    """
+
+    trip = models.ForeignKey(Trip, on_delete=CASCADE, related_name="route_levels")
+    zoom = models.PositiveSmallIntegerField()
+    tolerance = models.FloatField()
+    points = models.TextField()  # encoded polyline, ROUTE_PRECISION decimals
+    vertex_count = models.PositiveIntegerField()
+
+    class Meta:
+        ordering: ClassVar[list] = ["zoom"]
+        constraints: ClassVar[list] = [
+            models.UniqueConstraint(fields=["trip", "zoom"], name="unique_trip_route_level"),
+        ]
+
+    def __str__(self):
+        return f"Route of Trip ID: {self.trip_id} at zoom {self.zoom}"
+
+class TripRouteProfile(models.Model):
+    """
+    A trip's route with the cumulative mileage at each vertex, computed once
+    on save and packed by ``api.geometry.RouteProfile.pack``. Position and
+    mile lookups on a saved trip load it instead of decoding the polyline
+    and measuring it again.
+    """
+
+    trip = models.OneToOneField(Trip, on_delete=CASCADE, primary_key=True, related_name="route_profile")
+    points = models.BinaryField()  # int32 microdegree [lat, lon] pairs
+    miles = models.BinaryField()  # float32 cumulative miles at each vertex
+    vertex_count = models.PositiveIntegerField()
+    total_miles = models.FloatField()
+
+    def __str__(self):
+        return f"Route profile of Trip ID: {self.trip_id}"
+
+    def as_profile(self):
+        return RouteProfile.unpack(self.points, self.miles)
+
+class TripProgress(models.Model):
+    """
+    A trip's last reported position (see trips.push.report_progress), kept
+    in the database so every worker process sees it: websocket subscribers
+    get it on subscribe and position lookups search near it.
+    """
+
+    trip = models.OneToOneField(Trip, on_delete=CASCADE, primary_key=True, related_name="progress")
+    position = models.JSONField(encoder=DjangoJSONEncoder)  # mile, coords, remaining_miles, ...
+    reported_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Progress of Trip ID: {self.trip_id}"
+
+class TripCell(models.Model):
+    """
+    A grid cell (``api.geometry.SPATIAL_CELL_DEGREES`` on a side) that a
+    trip's route or one of its stops passes through. Corridor queries look
+    up the cells around a point or box here instead of scanning every route.
+    """
+
+    trip = models.ForeignKey(Trip, on_delete=CASCADE, related_name="cells")
+    lat_index = models.SmallIntegerField()  # floor(lat / SPATIAL_CELL_DEGREES)
+    lon_index = models.SmallIntegerField()  # floor(lon / SPATIAL_CELL_DEGREES)
+
+    class Meta:
+        indexes: ClassVar[list] = [models.Index(fields=["lat_index", "lon_index"], name="trip_cell_lat_lon")]
+        constraints: ClassVar[list] = [
+            models.UniqueConstraint(fields=["trip", "lat_index", "lon_index"], name="unique_trip_cell"),
+        ]
+
+    def __str__(self):
+        return f"Cell ({self.lat_index}, {self.lon_index}) of Trip ID: {self.trip_id}"
+
 class DailyLog(models.Model):
     """
     Stores the daily log sheet entries for a specific trip.
     """
 
     trip = models.ForeignKey(Trip, on_delete=CASCADE, related_name="daily_logs")
-    log_data = JSONField(default=dict, blank=True, null=True) # Added default=dict
+    log_data = DutyLogField(default=dict, blank=True, null=True) # Added default=dict
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # sync cursor
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)  # tombstone
+
+    objects = LiveManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+
+    def __str__(self):
+        return f"Daily Log for Trip ID: {self.trip_id}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        log = super().from_db(db, field_names, values)
+        # Lets the save signal also invalidate the trip a log is moved off
+        log._saved_trip_id = log.__dict__.get("trip_id")
+        return log
+
+    def soft_delete(self):
+        self.deleted_at = timezone.now()
+        self.save(update_fields=["deleted_at", "updated_at"])
+
+
+class PlanningJob(models.Model):
+    """
+    A trip plan (route, stops and daily logs) computed in the background by
+    ``trips.tasks.run_planning_job``. Clients poll it by id until it has
+    succeeded or failed.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES: ClassVar[list] = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    params = models.JSONField()  # validated PlanningJobRequestSerializer data
+    result = models.JSONField(null=True, blank=True, encoder=DutyLogEncoder)  # total_miles, stops, daily_logs
+    error = models.TextField(blank=True, default="")
+    # Trip the plan was saved to (created, or replanned in place)
+    trip = models.ForeignKey(Trip, null=True, blank=True, on_delete=SET_NULL, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
-        return f"Daily Log for Trip ID: {self.trip.id}"
+        return f"Planning job {self.id} ({self.status})"
@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Newest-first cursor pagination. Pages are found with an indexed
+    ``created_at`` comparison instead of an OFFSET, so deep pages cost the
+    same as the first one and rows added meanwhile don't shift the pages.
+    """
+
+    ordering = "-created_at"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
@@ -0,0 +1,100 @@
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from .availability import driver_availability
+from .models import TripProgress
+from .serializers import TripSerializer
+
+
+logger = logging.getLogger(__name__)
+
+# Every driver's HOS changes, for fleet-wide dispatch boards
+FLEET_GROUP = "drivers"
+
+# How long a trip's last reported position is served to new subscribers
+PROGRESS_TIMEOUT = 24 * 60 * 60  # seconds
+
+
+def trip_group(pk):
+    return f"trip.{pk}"
+
+
+def driver_group(pk):
+    return f"driver.{pk}"
+
+
+def job_group(pk):
+    return f"job.{pk}"
+
+
+def push(groups, event):
+    """
+    Sends ``event`` to the websocket clients subscribed to any of ``groups``
+    (see trips.consumers) once the current transaction commits. A failing
+    channel layer is logged, never raised: the change is saved either way.
+    """
+    transaction.on_commit(lambda: _send(groups, event))
+
+
+def _send(groups, event):
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    try:
+        for group in groups:
+            async_to_sync(layer.group_send)(group, {"type": "push.event", "event": event})
+    except Exception:
+        logger.exception("Could not push %s to %s", event["type"], ", ".join(groups))
+
+
+def trip_event(trip):
+    if trip.deleted_at is not None:
+        return {"type": "trip.deleted", "trip": {"id": trip.pk}}
+    return {"type": "trip.updated", "trip": TripSerializer(trip, exclude=("payload", "daily_logs")).data}
+
+
+def driver_event(driver):
+    return {"type": "driver.hos", "driver": driver_availability(driver)}
+
+
+def job_event(job):
+    return {
+        "type": "job.status",
+        "job": {"id": str(job.pk), "status": job.status, "trip": job.trip_id, "error": job.error},
+    }
+
+
+def _progress_event(trip_id, position, reported_at):
+    return {"type": "trip.progress", "trip": trip_id, **position, "reported_at": reported_at.isoformat()}
+
+
+def _recent_progress():
+    return TripProgress.objects.filter(reported_at__gte=timezone.now() - timedelta(seconds=PROGRESS_TIMEOUT))
+
+
+def progress_events(trip_ids):
+    """The trips' last reported positions as ``trip.progress`` events, by trip id, in one query."""
+    rows = _recent_progress().filter(trip_id__in=trip_ids)
+    return {row.trip_id: _progress_event(row.trip_id, row.position, row.reported_at) for row in rows}
+
+
+def report_progress(trip_id, position):
+    """
+    Records a trip's position (``mile``, ``coords``, ``remaining_miles``,
+    ...) as its latest and pushes it to the trip's subscribers.
+    """
+    reported_at = timezone.now()
+    TripProgress.objects.update_or_create(
+        trip_id=trip_id, defaults={"position": position, "reported_at": reported_at}
+    )
+    push([trip_group(trip_id)], _progress_event(trip_id, position, reported_at))
+
+
+def last_progress_mile(trip_id):
+    return _recent_progress().filter(trip_id=trip_id).values_list("position__mile", flat=True).first()
@@ -1,10 +1,52 @@
 from rest_framework import serializers
-from .models import Trip, Driver, DailyLog
+from api.hos_calculator import HOSCalculator
+from api.routing import MAX_WAYPOINTS, check_waypoints
+from .fields import SUMMARY_KEYS, compact_payload, expand_payload
+from .models import Trip, Driver, DailyLog, PlanningJob
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer that takes a ``fields`` argument naming the subset of its
+    fields to keep (None keeps them all) and an ``exclude`` argument naming
+    fields to drop.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        exclude = kwargs.pop("exclude", ())
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            exclude = {*exclude, *(set(self.fields) - set(fields))}
+        for name in exclude:
+            self.fields.pop(name, None)
+
+class TripDailyLogSerializer(serializers.ModelSerializer):
+    """A daily log embedded in its trip."""
+
+    class Meta:
+        model = DailyLog
+        fields = ("id", "log_data", "updated_at")
+
+class TripSerializer(DynamicFieldsModelSerializer):
+    # Read-only; prefetch it (see DAILY_LOGS_PREFETCH) when serializing many trips
+    daily_logs = TripDailyLogSerializer(many=True, read_only=True)
 
-class TripSerializer(serializers.ModelSerializer):
     class Meta:
         model = Trip
-        fields = "__all__"
+        exclude = ("deleted_at",)  # deleted trips are only reported by id
+        read_only_fields = tuple(SUMMARY_KEYS)  # derived from payload on save
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if "payload" not in data:
+            return data
+        # The route stays an encoded polyline unless ?geometry=full is asked for
+        request = self.context.get("request")
+        if request is not None and request.query_params.get("geometry") == "full":
+            data["payload"] = expand_payload(data["payload"])
+        else:
+            data["payload"] = compact_payload(data["payload"])
+        return data
 
 class DriverSerializer(serializers.ModelSerializer):
     class Meta:
@@ -14,5 +56,66 @@ class DriverSerializer(serializers.ModelSerializer):
 class DailyLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = DailyLog
-        fields = "__all__"
+        exclude = ("deleted_at",)
 
+class BulkDailyLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DailyLog
+        fields = ("log_data",)
+
+class BulkTripSerializer(serializers.ModelSerializer):
+    """One item of a bulk upload: a trip with its daily logs nested."""
+
+    daily_logs = BulkDailyLogSerializer(many=True, required=False)
+
+    class Meta:
+        model = Trip
+        fields = ("client_id", "payload", "daily_logs")
+
+class PlanningJobRequestSerializer(serializers.Serializer):
+    """
+    Input of a background planning job. The route comes from exactly one of
+    ``waypoints`` (routed through OpenRouteService), ``route`` (already
+    ``[[lat, lon], ...]``) or ``trip``, whose stored route is replanned.
+    The plan is saved to ``trip`` if given, otherwise to a new trip.
+    """
+
+    waypoints = serializers.ListField(
+        child=serializers.DictField(), min_length=2, max_length=MAX_WAYPOINTS, required=False
+    )
+    route = serializers.ListField(
+        child=serializers.ListField(child=serializers.FloatField(), min_length=2, max_length=2),
+        min_length=2,
+        required=False,
+    )
+    trip = serializers.PrimaryKeyRelatedField(queryset=Trip.objects.all(), required=False)
+    current_cycle_hours = serializers.FloatField(
+        default=0.0, min_value=0.0, max_value=HOSCalculator.MAX_CYCLE_HOURS
+    )
+    cycle_history = serializers.ListField(
+        child=serializers.FloatField(min_value=0.0, max_value=HOSCalculator.MAX_CYCLE_HOURS), required=False
+    )
+    pickup_location = serializers.CharField(default="", allow_blank=True)
+    dropoff_location = serializers.CharField(default="", allow_blank=True)
+    client_id = serializers.CharField(max_length=64, required=False)
+
+    def validate_waypoints(self, value):
+        try:
+            return check_waypoints(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e)) from e
+
+    def validate(self, attrs):
+        sources = [name for name in ("waypoints", "route") if name in attrs]
+        if len(sources) > 1:
+            raise serializers.ValidationError("Send waypoints or route, not both.")
+        if not sources and "trip" not in attrs:
+            raise serializers.ValidationError("Send waypoints, route or trip.")
+        if "trip" in attrs:
+            attrs["trip"] = attrs["trip"].pk  # stored as JSON on the job
+        return attrs
+
+class PlanningJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PlanningJob
+        fields = ("id", "status", "trip", "result", "error", "created_at", "started_at", "finished_at")
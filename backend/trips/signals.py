@@ -0,0 +1,53 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .availability import invalidate_fleet_availability
+from .cache import get_response_cache, invalidate_trips
+from .models import DailyLog, Driver, Trip
+from .push import FLEET_GROUP, driver_event, driver_group, push, trip_event, trip_group
+
+
+def _invalidate(func, *args):
+    func(*args)
+    # Again after commit: a read racing the open transaction may have cached
+    # the old rows under the new generation
+    transaction.on_commit(lambda: func(*args))
+
+
+@receiver([post_save, post_delete], sender=Trip)
+def trip_changed(sender, instance, **kwargs):
+    _invalidate(invalidate_trips, instance.pk)
+
+
+@receiver(post_save, sender=Trip)
+def push_trip(sender, instance, **kwargs):
+    push([trip_group(instance.pk)], trip_event(instance))
+
+
+@receiver(post_delete, sender=Trip)
+def push_trip_deleted(sender, instance, **kwargs):
+    push([trip_group(instance.pk)], {"type": "trip.deleted", "trip": {"id": instance.pk}})
+
+
+@receiver([post_save, post_delete], sender=DailyLog)
+def daily_log_changed(sender, instance, **kwargs):
+    trip_ids = {instance.trip_id, getattr(instance, "_saved_trip_id", None)} - {None}
+    _invalidate(invalidate_trips, *trip_ids)
+    instance._saved_trip_id = instance.trip_id
+
+
+@receiver([post_save, post_delete], sender=Driver)
+def driver_changed(sender, instance, **kwargs):
+    _invalidate(get_response_cache().invalidate, "drivers")
+    _invalidate(invalidate_fleet_availability)
+
+
+@receiver(post_save, sender=Driver)
+def push_driver(sender, instance, **kwargs):
+    push([driver_group(instance.pk), FLEET_GROUP], driver_event(instance))
+
+
+@receiver(post_delete, sender=Driver)
+def push_driver_deleted(sender, instance, **kwargs):
+    push([driver_group(instance.pk), FLEET_GROUP], {"type": "driver.deleted", "driver": {"id": instance.pk}})
@@ -0,0 +1,66 @@
+from api.geometry import (
+    cell_range,
+    decode_polyline,
+    distance_to_route,
+    radius_bbox,
+    route_intersects_bbox,
+)
+
+from .fields import ROUTE_PRECISION, stop_points
+from .models import Trip, TripCell, TripRouteLevel
+
+
+# Route level used to check candidate trips: a one-pixel tolerance at zoom
+# 10 is ~0.1 mile, far cheaper to decode than the full route
+CORRIDOR_ZOOM = 10
+
+
+def candidate_trip_ids(min_lat, min_lon, max_lat, max_lon):
+    """Ids of live trips with a TripCell near the box; a superset of the matches."""
+    lat_lo, lat_hi, lon_lo, lon_hi = cell_range(min_lat, min_lon, max_lat, max_lon)
+    return list(
+        TripCell.objects.filter(
+            lat_index__range=(lat_lo, lat_hi),
+            lon_index__range=(lon_lo, lon_hi),
+            trip__deleted_at__isnull=True,
+        )
+        .values_list("trip_id", flat=True)
+        .distinct()
+    )
+
+
+def trip_geometries(trip_ids):
+    """
+    Yields ``(trip_id, route, stops)`` for ``trip_ids`` in two queries: the
+    route from its CORRIDOR_ZOOM level and the stop coordinates read
+    straight out of the payload JSON.
+    """
+    routes = dict(
+        TripRouteLevel.objects.filter(trip_id__in=trip_ids, zoom=CORRIDOR_ZOOM).values_list("trip_id", "points")
+    )
+    for trip_id, stops in Trip.objects.filter(pk__in=trip_ids).values_list("pk", "payload__stops"):
+        route = decode_polyline(routes[trip_id], ROUTE_PRECISION) if trip_id in routes else []
+        yield trip_id, route, stop_points(stops)
+
+
+def trips_near(lat, lon, miles):
+    """
+    ``(trip_id, distance_miles)`` of the trips whose route or stops pass
+    within ``miles`` of ``(lat, lon)``, nearest first.
+    """
+    matches = []
+    for trip_id, route, stops in trip_geometries(candidate_trip_ids(*radius_bbox(lat, lon, miles))):
+        distance = min(distance_to_route(lat, lon, route), distance_to_route(lat, lon, stops))
+        if distance <= miles:
+            matches.append((trip_id, distance))
+    return sorted(matches, key=lambda match: (match[1], match[0]))
+
+
+def trips_in_bbox(min_lat, min_lon, max_lat, max_lon):
+    """Ids of the trips whose route or stops cross the box."""
+    box = (min_lat, min_lon, max_lat, max_lon)
+    return [
+        trip_id
+        for trip_id, route, stops in trip_geometries(candidate_trip_ids(*box))
+        if route_intersects_bbox(route, *box) or route_intersects_bbox(stops, *box)
+    ]
@@ -0,0 +1,108 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import DailyLog, Trip
+from .serializers import DailyLogSerializer, TripSerializer
+
+
+# Changed rows returned per table in one sync page
+SYNC_PAGE_SIZE = 200
+
+# updated_at is set before the write commits, so a row can become visible
+# after rows stamped later. Rows younger than this are sent but the cursor
+# stays behind them, and the next sync sends them again.
+SYNC_LAG = timedelta(seconds=30)
+
+# Table -> (model, serializer, serializer options)
+SYNC_TABLES = {
+    "trips": (Trip, TripSerializer, {"exclude": ["daily_logs"]}),  # synced on their own
+    "daily_logs": (DailyLog, DailyLogSerializer, {}),
+}
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(positions):
+    """Opaque cursor for ``{table: (updated_at, pk) or None}``."""
+    data = {
+        table: [position[0].isoformat(), position[1]] if position else None
+        for table, position in positions.items()
+    }
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Reverses ``encode_cursor``; an empty cursor starts from the beginning."""
+    if not cursor:
+        return dict.fromkeys(SYNC_TABLES)
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return {
+            table: (datetime.fromisoformat(data[table][0]), int(data[table][1]))
+            if data.get(table)
+            else None
+            for table in SYNC_TABLES
+        }
+    except (
+        binascii.Error,
+        ValueError,
+        TypeError,
+        KeyError,
+        IndexError,
+        AttributeError,
+    ) as e:
+        raise InvalidCursorError("Invalid sync cursor.") from e
+
+
+def changes_since(cursor, page_size=SYNC_PAGE_SIZE, context=None):
+    """
+    Returns the trips and daily logs created, changed or soft-deleted after
+    ``cursor``. Each table is read in ``(updated_at, pk)`` keyset order, so a
+    page boundary can fall between rows with the same timestamp without
+    losing any. Live rows are serialized; deleted ones come back as ids
+    under ``"deleted"``.
+
+    The cursor never moves past rows changed within ``SYNC_LAG``, so one
+    committed late with an earlier timestamp is still picked up. Those rows
+    can come back in the next sync too; clients apply changes by pk.
+    """
+    positions = decode_cursor(cursor)
+    settled_before = timezone.now() - SYNC_LAG
+    result = {"deleted": {}}
+    has_more = False
+    for table, (model, serializer_class, options) in SYNC_TABLES.items():
+        rows = model.all_objects.order_by("updated_at", "pk")
+        if positions[table]:
+            updated_at, pk = positions[table]
+            rows = rows.filter(
+                Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, pk__gt=pk)
+            )
+        rows = list(rows[: page_size + 1])
+        full = len(rows) > page_size
+        rows = rows[:page_size]
+        settled = [row for row in rows if row.updated_at <= settled_before]
+        if settled:
+            positions[table] = (settled[-1].updated_at, settled[-1].pk)
+        # A page ending in unsettled rows would not move the cursor; the
+        # rest of them come once they settle
+        if full and len(settled) == len(rows):
+            has_more = True
+
+        live = [row for row in rows if row.deleted_at is None]
+        result[table] = serializer_class(
+            live, many=True, context=context or {}, **options
+        ).data
+        result["deleted"][table] = [
+            row.pk for row in rows if row.deleted_at is not None
+        ]
+
+    result["cursor"] = encode_cursor(positions)
+    result["has_more"] = has_more
+    return result
@@ -0,0 +1,97 @@
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from api.fuel_stations import get_fuel_stations
+from api.planner import plan_trip
+from api.routing import fetch_route
+from asgiref.sync import async_to_sync
+from spotter_app import celery_app
+
+from .models import DailyLog, PlanningJob, Trip, TripRouteProfile
+from .push import job_event, job_group, push
+
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task
+def run_planning_job(job_id):
+    """
+    Routes, plans and saves the trip of a pending PlanningJob. A job that is
+    no longer pending (e.g. a duplicate delivery) is left alone.
+    """
+    claimed = PlanningJob.objects.filter(pk=job_id, status=PlanningJob.PENDING).update(
+        status=PlanningJob.RUNNING, started_at=timezone.now()
+    )
+    if not claimed:
+        return
+    job = PlanningJob.objects.get(pk=job_id)
+    push([job_group(job.pk)], job_event(job))
+    try:
+        trip, plan = execute_plan(job.params)
+    except Exception as e:
+        logger.exception("Planning job %s failed", job_id)
+        job.status = PlanningJob.FAILED
+        job.error = str(e) or type(e).__name__
+    else:
+        job.status = PlanningJob.SUCCEEDED
+        job.trip = trip
+        job.result = plan
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "trip", "result", "finished_at"])
+    push([job_group(job.pk)], job_event(job))
+
+
+def execute_plan(params):
+    """
+    Builds the plan described by validated PlanningJobRequestSerializer data
+    and saves it with its daily logs. Returns ``(trip, plan)``; the plan
+    leaves the route out since it is stored on the trip.
+    """
+    trip = Trip.objects.get(pk=params["trip"]) if "trip" in params else None
+    total_miles = None
+    if "waypoints" in params:
+        routed = async_to_sync(fetch_route)(params["waypoints"])  # legs in parallel
+        route, total_miles = routed["route"], routed["total_miles"]
+    elif "route" in params:
+        route = params["route"]
+    else:
+        # The stored profile already has the mileage; the route stays as saved
+        stored = TripRouteProfile.objects.filter(trip=trip).first()
+        if stored is None:
+            raise ValueError(f"Trip {trip.pk} has no stored route to replan.")
+        route = stored.as_profile()
+        total_miles = trip.total_miles or None
+
+    plan = plan_trip(
+        route,
+        params["current_cycle_hours"],
+        total_miles=total_miles,
+        pickup_location=params["pickup_location"],
+        dropoff_location=params["dropoff_location"],
+        cycle_history=params.get("cycle_history"),
+        stations=get_fuel_stations(),
+    )
+
+    if trip is None:
+        trip = Trip(client_id=params["client_id"])
+    # Same keys as the frontend's TripPlan, so the saved trip reads the same
+    trip.payload = {
+        **(trip.payload if isinstance(trip.payload, dict) else {}),
+        "pickupLocation": params["pickup_location"],
+        "dropoffLocation": params["dropoff_location"],
+        "currentCycleUsed": params["current_cycle_hours"],
+        "stops": plan["stops"],
+        "totalMiles": plan["total_miles"],
+        "dailyLogs": [log.tolist() for log in plan["daily_logs"]],
+    }
+    if isinstance(route, list):
+        trip.payload["route"] = route  # replaces any stored route_polyline when compacted
+    with transaction.atomic():
+        if trip.pk is not None:
+            DailyLog.objects.filter(trip=trip).soft_delete()  # a replan replaces them
+        trip.save()  # its post_save signal invalidates the cached responses
+        DailyLog.objects.bulk_create(DailyLog(trip=trip, log_data=log) for log in plan["daily_logs"])
+    return trip, plan
@@ -1,4 +1,1220 @@
-from django.test import TestCase
+import io
+import json
+import math
+import tempfile
+import zipfile
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import ClassVar
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse, reverse_lazy
 
+from api.duty_log import DutyLog
+from api.geometry import ROUTE_LEVEL_ZOOMS
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from rest_framework.exceptions import PermissionDenied
+from spotter_app.db import SQLITE_PRAGMAS, ReadReplicaRouter
+from spotter_app.routing import application
+
+from .cache import get_response_cache
+from .export import iter_trips_ndjson
+from .fields import compact_payload, expand_payload, payload_summary
+from .models import DailyLog, Driver, PlanningJob, Trip, TripCell, TripProgress, TripRouteProfile
+from .push import last_progress_mile
+from .serializers import TripSerializer
+from .sync import SYNC_LAG, changes_since
+from .tasks import run_planning_job
+from .views import DriverListCreateView
+
+
+class TripsTestCase(TestCase):
+    def setUp(self):
+        # Rolled-back rows from earlier tests sent no invalidation signals
+        get_response_cache().clear()
+        cache.clear()  # fleet availability snapshot
+
+
+class DailyLogDutyLogFieldTest(TripsTestCase):
+    segments: ClassVar[list] = [
+        {"type": "On Duty (not driving)", "hours": 1.0},
+        {"type": "Driving", "hours": 8.0},
+        {"type": "Sleeper Berth", "hours": 15.0},
+    ]
+
+    def test_segment_lists_load_as_duty_log(self):
+        log = DailyLog.objects.create(
+            trip=Trip.objects.create(), log_data=self.segments
+        )
+
+        log.refresh_from_db()
+
+        self.assertIsInstance(log.log_data, DutyLog)
+        self.assertEqual(log.log_data, self.segments)
+
+    def test_other_json_is_left_alone(self):
+        log = DailyLog.objects.create(trip=Trip.objects.create(), log_data={"day": 1})
+
+        log.refresh_from_db()
+
+        self.assertEqual(log.log_data, {"day": 1})
+
+    def test_api_returns_segment_list(self):
+        log = DailyLog.objects.create(
+            trip=Trip.objects.create(), log_data=self.segments
+        )
+
+        response = self.client.get(reverse("dailylog-detail", args=[log.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["log_data"], self.segments)
+
+
+class TripRouteStorageTest(TripsTestCase):
+    route: ClassVar[list] = [[40.712776, -74.005974], [40.713, -74.0061], [39.952583, -75.165222]]
+
+    def test_route_is_stored_as_polyline(self):
+        trip = Trip.objects.create(client_id="a", payload={"route": self.route, "x": 1})
+
+        stored = Trip.objects.get(pk=trip.pk).payload
+
+        self.assertNotIn("route", stored)
+        self.assertEqual(stored["x"], 1)
+        self.assertEqual(expand_payload(stored)["route"], self.route)
+
+    def test_compact_payload_leaves_other_json_alone(self):
+        for payload in (
+            {"route": "not a list of points"},
+            {"route": [1.0, 2.0, 3.0, 4.0]},
+            {"route": [[1.0, 2.0, 3.0]]},
+            {"route": [[float("inf"), 0.0]]},
+            {"route": [[1e300, 0.0]]},
+            {"stops": []},
+            [1, 2],
+        ):
+            self.assertIs(compact_payload(payload), payload)
+
+    def test_api_decodes_route_only_on_request(self):
+        trip = Trip.objects.create(client_id="a", payload={"route": self.route})
+        url = reverse("trip-detail", args=[trip.pk])
+
+        compact = self.client.get(url).json()["payload"]
+        full = self.client.get(url, {"geometry": "full"}).json()["payload"]
+
+        self.assertIn("route_polyline", compact)
+        self.assertNotIn("route", compact)
+        self.assertEqual(full["route"], self.route)
+
+
+class TripRouteLevelTest(TripsTestCase):
+    # ~20k vertices across 15 degrees of longitude with gentle bends
+    route: ClassVar[list] = [
+        [round(35.0 + 2 * math.sin(i / 3000), 6), round(-105.0 + i * 0.00075, 6)]
+        for i in range(20000)
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.trip = Trip.objects.create(client_id="a", payload={"route": self.route})
+        self.url = reverse("trip-detail", args=[self.trip.pk])
+
+    def test_levels_are_built_on_save(self):
+        counts = list(self.trip.route_levels.values_list("vertex_count", flat=True))
+
+        self.assertEqual(len(counts), len(ROUTE_LEVEL_ZOOMS))
+        self.assertEqual(counts, sorted(counts))
+        self.assertLess(counts[0], len(self.route) // 100)
+
+    def test_levels_are_rebuilt_when_payload_changes(self):
+        self.trip.payload = {"route": self.route[:2]}
+        self.trip.save()
+
+        counts = set(self.trip.route_levels.values_list("vertex_count", flat=True))
+
+        self.assertEqual(counts, {2})
+
+    def test_zoom_returns_simplified_route(self):
+        data = self.client.get(self.url, {"zoom": 4, "geometry": "full"}).json()
+
+        self.assertEqual(data["route_level"]["zoom"], 4)
+        self.assertEqual(
+            len(data["payload"]["route"]), data["route_level"]["vertex_count"]
+        )
+        self.assertEqual(data["payload"]["route"][0], self.route[0])
+        self.assertEqual(data["payload"]["route"][-1], self.route[-1])
+
+    def test_tolerance_picks_coarsest_level_within_it(self):
+        data = self.client.get(self.url, {"tolerance": 0.02}).json()
+        level = self.trip.route_levels.get(zoom=7)
+
+        self.assertEqual(data["route_level"]["zoom"], 7)
+        self.assertEqual(data["payload"]["route_polyline"]["points"], level.points)
+
+    def test_finer_than_every_level_returns_full_route(self):
+        data = self.client.get(self.url, {"zoom": 18, "geometry": "full"}).json()
+
+        self.assertNotIn("route_level", data)
+        self.assertEqual(data["payload"]["route"], self.route)
+
+    def test_invalid_zoom_is_rejected(self):
+        for zoom in ("street", "-1", "-2000", "-1e6", "31", "1e6", "nan"):
+            with self.subTest(zoom=zoom):
+                self.assertEqual(self.client.get(self.url, {"zoom": zoom}).status_code, 400)
+
+    def test_non_positive_tolerance_is_rejected(self):
+        for tolerance in ("-1", "0", "-inf"):
+            with self.subTest(tolerance=tolerance):
+                self.assertEqual(self.client.get(self.url, {"tolerance": tolerance}).status_code, 400)
+
+
+class TripRouteProfileTest(TripsTestCase):
+    route: ClassVar[list] = [[30.0 + i * 0.01, -97.0] for i in range(3001)]  # ~2070 miles
+
+    def setUp(self):
+        super().setUp()
+        self.trip = Trip.objects.create(client_id="a", payload={"route": self.route})
+        self.url = reverse("trip-position", args=[self.trip.pk])
+
+    def test_profile_is_stored_on_save(self):
+        stored = self.trip.route_profile
+
+        self.assertEqual(stored.vertex_count, len(self.route))
+        self.assertAlmostEqual(stored.total_miles, 2072.3, delta=1.0)
+        self.assertEqual(stored.as_profile().coord_at_mile(0.0), self.route[0])
+
+    def test_profile_is_kept_when_only_the_stops_change(self):
+        trip = Trip.objects.get(pk=self.trip.pk)
+        trip.payload = {**trip.payload, "stops": [{"name": "Fuel", "coords": [31.0, -97.0]}]}
+
+        with CaptureQueriesContext(connection) as queries:
+            trip.save()
+
+        self.assertFalse(any("trips_triprouteprofile" in q["sql"] for q in queries.captured_queries))
+        self.assertEqual(trip.cells.filter(lat_index=124).count(), 1)
+
+        trip.payload = {"route": self.route[:2]}
+        trip.save()
+        self.assertEqual(TripRouteProfile.objects.get(trip=trip).vertex_count, 2)
+
+    def test_position_at_mile(self):
+        data = self.client.get(self.url, {"mile": 69.1}).json()
+
+        self.assertAlmostEqual(data["coords"][0], 31.0, delta=0.01)
+        self.assertAlmostEqual(data["remaining_miles"], 2072.3 - 69.1, delta=1.0)
+        self.assertEqual(self.client.get(self.url, {"mile": -5}).json()["coords"], self.route[0])
+
+    def test_mile_at_nearest_point(self):
+        data = self.client.get(self.url, {"lat": 31.0, "lng": -96.99, "near_mile": 60}).json()
+
+        self.assertAlmostEqual(data["mile"], 69.1, delta=0.2)
+        self.assertAlmostEqual(data["offset_miles"], 0.59, delta=0.02)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"mile": "nan"}).status_code, 400)
+        self.trip.soft_delete()
+        self.assertEqual(self.client.get(self.url, {"mile": 1}).status_code, 404)
+
+
+class FleetAvailabilityTest(TripsTestCase):
+    url = reverse_lazy("driver-availability")
+
+    def setUp(self):
+        super().setUp()
+        hours = [  # (cycle, driving, on duty) used
+            ("Ann", 10.0, 0.0, 0.0),  # a fresh shift: 11 hours to drive
+            ("Bob", 65.0, 0.0, 0.0),  # the cycle leaves 5
+            ("Cal", 20.0, 8.0, 12.0),  # the 14-hour window leaves 2
+            ("Dee", 70.0, 3.0, 3.0),  # out of hours
+        ]
+        self.drivers = Driver.objects.bulk_create(
+            Driver(
+                name=name, employee_id=f"E{i}", current_location="Dallas" if i % 2 else "Austin",
+                current_cycle_hours=cycle, current_driving_hours=driving, current_on_duty_hours=on_duty,
+            )
+            for i, (name, cycle, driving, on_duty) in enumerate(hours)
+        )
+
+    def get(self, **params):
+        return self.client.get(self.url, params)
+
+    def test_remaining_hours_take_every_limit(self):
+        results = self.get().json()["results"]
+
+        remaining = {
+            r["name"]: (r["remaining_drive_hours"], r["remaining_on_duty_hours"], r["remaining_cycle_hours"])
+            for r in results
+        }
+        self.assertEqual([r["name"] for r in results], ["Ann", "Bob", "Cal", "Dee"])
+        self.assertEqual(remaining["Ann"], (11.0, 14.0, 60.0))
+        self.assertEqual(remaining["Bob"], (5.0, 5.0, 5.0))
+        self.assertEqual(remaining["Cal"], (2.0, 2.0, 50.0))
+        self.assertEqual(remaining["Dee"], (0.0, 0.0, 0.0))
+
+    def test_filters_and_ordering(self):
+        self.assertEqual([r["name"] for r in self.get(min_drive_hours=9).json()["results"]], ["Ann"])
+        self.assertEqual(
+            [r["name"] for r in self.get(location="Dallas", ordering="name").json()["results"]], ["Bob", "Dee"]
+        )
+        data = self.get(search="e2", ordering="-remaining_cycle_hours").json()
+        self.assertEqual((data["count"], data["results"][0]["name"]), (1, "Cal"))
+        data = self.get(ordering="remaining_cycle_hours", limit=2).json()
+        self.assertEqual((data["count"], [r["name"] for r in data["results"]]), (4, ["Dee", "Bob"]))
+
+    def test_snapshot_is_cached_until_a_driver_changes(self):
+        self.get()
+        with CaptureQueriesContext(connection) as queries:
+            self.get(min_drive_hours=1)
+        self.assertEqual(len(queries), 0)
+
+        driver = self.drivers[3]
+        driver.current_cycle_hours = 0.0
+        driver.current_driving_hours = driver.current_on_duty_hours = 0.0
+        driver.save()
+
+        self.assertEqual(self.get(min_drive_hours=9).json()["count"], 2)
+
+    def test_invalid_parameters_are_rejected(self):
+        response = self.get(min_drive_hours="nine", ordering="age")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {"min_drive_hours", "ordering"})
+
+
+class DispatchPushTest(TripsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.driver = Driver.objects.create(
+            name="Ann", employee_id="E1", current_location="Dallas", current_cycle_hours=60.0
+        )
+        self.trip = Trip.objects.create(
+            client_id="a", payload={"route": [[30.0 + i * 0.01, -97.0] for i in range(101)]}
+        )
+
+    async def connect(self, origin=b"http://localhost"):
+        communicator = WebsocketCommunicator(application, "/ws/dispatch/", headers=[(b"origin", origin)])
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def request(self, communicator, action="subscribe", **targets):
+        """Sends an action; returns the events before its acknowledgement."""
+        await communicator.send_json_to({"action": action, **targets})
+        events = []
+        while (event := await communicator.receive_json_from())["type"] != f"{action}d":
+            events.append(event)
+        return events
+
+    @database_sync_to_async
+    def on_commit(self, func, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return func(*args, **kwargs)
+
+    def update_driver(self, **hours):
+        for name, value in hours.items():
+            setattr(self.driver, name, value)
+        self.driver.save()
+
+    def test_other_origins_are_refused(self):
+        async def scenario():
+            communicator = WebsocketCommunicator(
+                application, "/ws/dispatch/", headers=[(b"origin", b"https://evil.example")]
+            )
+            connected, _ = await communicator.connect()
+            self.assertFalse(connected)
+
+        async_to_sync(scenario)()
+
+    def test_subscribers_get_the_state_then_each_change(self):
+        async def scenario():
+            communicator = await self.connect()
+            events = await self.request(communicator, trips=[self.trip.pk], drivers=[self.driver.pk])
+
+            self.assertEqual([e["type"] for e in events], ["trip.updated", "driver.hos"])
+            self.assertEqual(events[1]["driver"]["remaining_cycle_hours"], 10.0)
+
+            await self.on_commit(self.update_driver, current_cycle_hours=65.0, current_driving_hours=2.0)
+            event = await communicator.receive_json_from()
+            self.assertEqual(event["type"], "driver.hos")
+            self.assertEqual(event["driver"]["remaining_drive_hours"], 5.0)
+
+            await self.on_commit(self.trip.soft_delete)
+            event = await communicator.receive_json_from()
+            self.assertEqual(event, {"type": "trip.deleted", "trip": {"id": self.trip.pk}})
+
+            await self.request(communicator, "unsubscribe", drivers=[self.driver.pk])
+            await self.on_commit(self.update_driver, current_cycle_hours=0.0)
+            self.assertTrue(await communicator.receive_nothing())
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_fleet_subscription_follows_every_driver(self):
+        async def scenario():
+            communicator = await self.connect()
+            (snapshot,) = await self.request(communicator, fleet=True)
+            self.assertEqual([d["name"] for d in snapshot["drivers"]], ["Ann"])
+
+            await self.on_commit(Driver.objects.create, name="Bob", employee_id="E2", current_location="Reno")
+            event = await communicator.receive_json_from()
+            self.assertEqual((event["type"], event["driver"]["name"]), ("driver.hos", "Bob"))
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_reported_progress_is_pushed_and_kept_for_new_subscribers(self):
+        url = reverse("trip-position", args=[self.trip.pk])
+
+        async def scenario():
+            communicator = await self.connect()
+            await self.request(communicator, trips=[self.trip.pk])
+
+            response = await self.on_commit(
+                self.client.post, url, {"lat": 30.5, "lng": -97.01}, content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 200)
+            event = await communicator.receive_json_from()
+            self.assertEqual(event["type"], "trip.progress")
+            self.assertAlmostEqual(event["mile"], 34.5, delta=0.2)
+            await communicator.disconnect()
+
+            late = await self.connect()
+            events = await self.request(late, trips=[self.trip.pk])
+            self.assertEqual([e["type"] for e in events], ["trip.updated", "trip.progress"])
+            self.assertEqual(events[1]["mile"], event["mile"])
+            await late.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_reported_progress_is_kept_in_the_database(self):
+        url = reverse("trip-position", args=[self.trip.pk])
+        self.client.post(url, {"lat": 30.5, "lng": -97.01}, content_type="application/json")
+        cache.clear()  # other worker processes share only the database
+
+        self.assertAlmostEqual(last_progress_mile(self.trip.pk), 34.5, delta=0.2)
+        self.assertEqual(TripProgress.objects.get(trip=self.trip).position["mile"], last_progress_mile(self.trip.pk))
+
+    def test_planning_job_status_is_pushed(self):
+        job = PlanningJob.objects.create(
+            params={
+                "route": [[30.0, -97.0], [31.0, -97.0]],
+                "current_cycle_hours": 0, "pickup_location": "", "dropoff_location": "", "client_id": "job",
+            }
+        )
+
+        async def scenario():
+            communicator = await self.connect()
+            (pending,) = await self.request(communicator, jobs=[str(job.pk)])
+            self.assertEqual(pending["job"]["status"], "pending")
+
+            await self.on_commit(run_planning_job, job.pk)
+            running = await communicator.receive_json_from()
+            finished = await communicator.receive_json_from()
+            self.assertEqual([running["job"]["status"], finished["job"]["status"]], ["running", "succeeded"])
+            self.assertIsNotNone(finished["job"]["trip"])
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_bad_messages_get_an_error(self):
+        async def scenario():
+            communicator = await self.connect()
+            messages = [
+                {"action": "poll"},
+                {"action": "subscribe", "trips": "all"},
+                {"action": "subscribe", "jobs": ["x"]},
+            ]
+            for message in messages:
+                await communicator.send_json_to(message)
+                self.assertEqual((await communicator.receive_json_from())["type"], "error")
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+
+class TripListTest(TripsTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            Trip.objects.create(client_id=f"trip-{i}", payload={"stops": [i]})
+        self.url = reverse("trip-list")
+
+    def test_list_is_cursor_paginated_newest_first(self):
+        first = self.client.get(self.url, {"page_size": 3}).json()
+        second = self.client.get(first["next"]).json()
+
+        ids = [t["client_id"] for t in first["results"] + second["results"]]
+        self.assertEqual(ids, [f"trip-{i}" for i in range(4, -1, -1)])
+        self.assertIsNone(second["next"])
+
+    def test_payload_is_left_out_and_deferred_by_default(self):
+        with CaptureQueriesContext(connection) as queries:
+            results = self.client.get(self.url).json()["results"]
+
+        self.assertEqual(
+            set(results[0]), set(TripSerializer().fields) - {"payload", "daily_logs"}
+        )
+        self.assertNotIn("payload", queries[-1]["sql"])
+
+    def test_fields_selects_columns(self):
+        results = self.client.get(self.url, {"fields": "id,payload"}).json()["results"]
+
+        self.assertEqual(
+            results[0], {"id": results[0]["id"], "payload": {"stops": [4]}}
+        )
+
+    def test_exclude_drops_fields(self):
+        results = self.client.get(self.url, {"exclude": "client_id"}).json()["results"]
+
+        self.assertEqual(
+            set(results[0]),
+            set(TripSerializer().fields) - {"payload", "daily_logs", "client_id"},
+        )
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(self.url, {"fields": "id,driver"})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_create_returns_full_trip(self):
+        response = self.client.post(
+            self.url,
+            {"client_id": "new", "payload": {"stops": []}},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["payload"], {"stops": []})
+
+
+class TripExportTest(TripsTestCase):
+    segments: ClassVar[list] = [{"type": "Driving", "hours": 11.0}]
+
+    def setUp(self):
+        super().setUp()
+        for i in range(3):
+            trip = Trip.objects.create(client_id=f"trip-{i}", payload={"stops": [i]})
+            DailyLog.objects.create(trip=trip, log_data=self.segments)
+
+    def test_endpoint_streams_one_trip_per_line(self):
+        response = self.client.get(reverse("trip-export"))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [r["client_id"] for r in records], ["trip-0", "trip-1", "trip-2"]
+        )
+        self.assertEqual(records[0]["daily_logs"][0]["log_data"], self.segments)
+
+    def test_logs_are_prefetched_per_chunk(self):
+        with self.assertNumQueries(3):  # one trip cursor, one log query per chunk
+            lines = list(iter_trips_ndjson(chunk_size=2))
+
+        self.assertEqual(len(lines), 3)
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "trips.ndjson"
+            call_command("export_trips", output=str(path), chunk_size=1)
+            records = [json.loads(line) for line in path.read_text().splitlines()]
+
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[2]["payload"], {"stops": [2]})
+
+
+class TripBulkCreateTest(TripsTestCase):
+    url = reverse_lazy("trip-bulk")
+    segments: ClassVar[list] = [{"type": "Driving", "hours": 11.0}]
+
+    def post(self, trips):
+        return self.client.post(
+            self.url, {"trips": trips}, content_type="application/json"
+        )
+
+    def test_creates_trips_and_logs_in_few_queries(self):
+        trips = [
+            {
+                "client_id": f"trip-{i}",
+                "payload": {
+                    "route": [[40.0, -74.0], [39.9, -75.1]],
+                    "totalMiles": 80 + i,
+                },
+                "daily_logs": [{"log_data": self.segments}] * 2,
+            }
+            for i in range(100)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(trips)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 100)
+        self.assertLess(len(queries), 11)
+        self.assertEqual(DailyLog.objects.count(), 200)
+        trip = Trip.objects.get(client_id="trip-7")
+        self.assertEqual(trip.daily_logs.first().log_data, self.segments)
+        self.assertEqual(trip.route_levels.count(), len(ROUTE_LEVEL_ZOOMS))
+        self.assertEqual(trip.route_profile.vertex_count, 2)
+        self.assertEqual(trip.total_miles, 87)
+
+    def test_reports_invalid_items_and_keeps_valid_ones(self):
+        response = self.post(
+            [{"client_id": "ok"}, {"payload": {}}, {"client_id": "also ok"}]
+        )
+
+        self.assertEqual(response.status_code, 207)
+        results = response.json()["results"]
+        self.assertEqual(
+            [r["status"] for r in results], ["created", "invalid", "created"]
+        )
+        self.assertIn("client_id", results[1]["errors"])
+        self.assertEqual(Trip.objects.count(), 2)
+
+    def test_nothing_valid_is_a_bad_request(self):
+        response = self.post([{"payload": {}}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Trip.objects.exists())
+
+    def test_rejects_body_without_trip_list(self):
+        response = self.client.post(
+            self.url, {"client_id": "x"}, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
+class SyncTest(TripsTestCase):
+    url = reverse_lazy("sync")
+
+    def setUp(self):
+        super().setUp()
+        # Every row counts as committed; test_late_commits_are_not_skipped
+        # puts the lag back
+        patcher = mock.patch("trips.sync.SYNC_LAG", timedelta(0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sync(self, cursor=None, **params):
+        if cursor:
+            params["cursor"] = cursor
+        return self.client.get(self.url, params).json()
+
+    def test_first_sync_returns_everything(self):
+        trip = Trip.objects.create(client_id="a")
+        DailyLog.objects.create(trip=trip, log_data=[])
+
+        changes = self.sync()
+
+        self.assertEqual([t["client_id"] for t in changes["trips"]], ["a"])
+        self.assertEqual(len(changes["daily_logs"]), 1)
+        self.assertFalse(changes["has_more"])
+
+    def test_later_sync_returns_only_changes_and_tombstones(self):
+        kept = Trip.objects.create(client_id="kept")
+        gone = Trip.objects.create(client_id="gone")
+        log = DailyLog.objects.create(trip=gone, log_data=[])
+        cursor = self.sync()["cursor"]
+
+        kept.client_id = "renamed"
+        kept.save()
+        self.client.delete(reverse("trip-detail", args=[gone.pk]))
+        changes = self.sync(cursor)
+
+        self.assertEqual([t["client_id"] for t in changes["trips"]], ["renamed"])
+        self.assertEqual(
+            changes["deleted"], {"trips": [gone.pk], "daily_logs": [log.pk]}
+        )
+        self.assertEqual(self.sync(changes["cursor"])["trips"], [])
+
+    def test_deleted_rows_are_hidden_from_other_views(self):
+        trip = Trip.objects.create(client_id="a")
+
+        self.client.delete(reverse("trip-detail", args=[trip.pk]))
+
+        self.assertTrue(Trip.all_objects.filter(pk=trip.pk).exists())
+        response = self.client.get(reverse("trip-detail", args=[trip.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_pages_split_rows_with_equal_timestamps(self):
+        trip = Trip.objects.create(client_id="a")
+        DailyLog.objects.bulk_create(DailyLog(trip=trip) for _ in range(5))
+        DailyLog.objects.filter(trip=trip).soft_delete()  # one shared timestamp
+
+        seen = []
+        cursor = None
+        while True:
+            changes = changes_since(cursor, page_size=2)
+            seen += changes["deleted"]["daily_logs"]
+            cursor = changes["cursor"]
+            if not changes["has_more"]:
+                break
+
+        self.assertEqual(
+            sorted(seen), list(DailyLog.all_objects.values_list("pk", flat=True))
+        )
+
+    def test_late_commits_are_not_skipped(self):
+        with mock.patch("trips.sync.SYNC_LAG", SYNC_LAG):
+            first = Trip.objects.create(client_id="first")
+            cursor = self.sync()["cursor"]
+            # Stamped before ``first`` but committed after the sync above
+            late = Trip.objects.create(client_id="late")
+            Trip.all_objects.filter(pk=late.pk).update(updated_at=first.updated_at - timedelta(seconds=1))
+
+            changes = self.sync(cursor)
+
+        self.assertEqual(sorted(t["client_id"] for t in changes["trips"]), ["first", "late"])
+        self.assertFalse(changes["has_more"])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class TripSummaryColumnsTest(TripsTestCase):
+    url = reverse_lazy("trip-list")
+
+    def create(self, client_id, miles, pickup="Dallas, TX", cycle="12"):
+        return Trip.objects.create(
+            client_id=client_id,
+            payload={
+                "totalMiles": miles,
+                "pickupLocation": pickup,
+                "dropoffLocation": "Denver, CO",
+                "currentCycleUsed": cycle,
+            },
+        )
+
+    def list(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [trip["client_id"] for trip in response.json()["results"]]
+
+    def test_columns_are_extracted_on_save(self):
+        trip = self.create("a", 1520.5)
+
+        trip.refresh_from_db()
+
+        self.assertEqual(trip.total_miles, 1520.5)
+        self.assertEqual(trip.pickup_location, "Dallas, TX")
+        self.assertEqual(trip.dropoff_location, "Denver, CO")
+        self.assertEqual(trip.cycle_hours_used, 12.0)
+
+    def test_columns_follow_payload_updates(self):
+        trip = self.create("a", 100)
+
+        trip.payload = {"total_miles": 200}
+        trip.save(update_fields=["payload"])
+        trip.refresh_from_db()
+
+        self.assertEqual((trip.total_miles, trip.pickup_location), (200.0, ""))
+
+    def test_malformed_values_fall_back_to_empty(self):
+        self.assertEqual(
+            payload_summary({"totalMiles": "far", "currentCycleUsed": None}),
+            {
+                "total_miles": 0.0,
+                "pickup_location": "",
+                "dropoff_location": "",
+                "cycle_hours_used": 0.0,
+            },
+        )
+
+    def test_filters_use_summary_columns(self):
+        self.create("long", 1600)
+        self.create("short", 300)
+        self.create("elsewhere", 2000, pickup="Austin, TX")
+
+        self.assertEqual(self.list(min_miles=1500, pickup="Dallas, TX"), ["long"])
+        self.assertEqual(self.list(max_miles=500), ["short"])
+
+    def test_ordering_by_miles_pages_through_all_trips(self):
+        for i, miles in enumerate([500, 100, 900, 100, 300]):
+            self.create(f"trip-{i}", miles)
+
+        first = self.client.get(self.url, {"ordering": "-total_miles", "page_size": 2})
+        second = self.client.get(first.json()["next"]).json()
+        third = self.client.get(second["next"]).json()
+
+        miles = [
+            t["total_miles"]
+            for page in (first.json(), second, third)
+            for t in page["results"]
+        ]
+        self.assertEqual(miles, [900, 500, 300, 100, 100])
+
+    def test_invalid_filter_is_rejected(self):
+        response = self.client.get(self.url, {"min_miles": "lots"})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_summary_lookup_uses_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "EXPLAIN QUERY PLAN "
+                + str(Trip.objects.filter(total_miles__gte=1500).query)
+            )
+            plan = " ".join(str(row) for row in cursor.fetchall())
+
+        self.assertIn("INDEX", plan)
+
+
+class TripDailyLogEmbeddingTest(TripsTestCase):
+    segments: ClassVar[list] = [{"type": "Driving", "hours": 11.0}]
+
+    def setUp(self):
+        super().setUp()
+        for i in range(10):
+            trip = Trip.objects.create(client_id=f"trip-{i}")
+            for _ in range(3):
+                DailyLog.objects.create(trip=trip, log_data=self.segments)
+        self.trip = trip
+
+    def test_detail_embeds_daily_logs_in_constant_queries(self):
+        url = reverse("trip-detail", args=[self.trip.pk])
+
+        with self.assertNumQueries(4):  # 2 ETag aggregates, trip, its logs
+            data = self.client.get(url).json()
+
+        self.assertEqual(len(data["daily_logs"]), 3)
+        self.assertEqual(data["daily_logs"][0]["log_data"], self.segments)
+
+    def test_list_with_logs_stays_within_query_budget(self):
+        params = {"fields": "id,client_id,daily_logs"}
+
+        with self.assertNumQueries(4):  # 2 ETag aggregates, trips, their logs
+            results = self.client.get(reverse("trip-list"), params).json()["results"]
+
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(len(trip["daily_logs"]) == 3 for trip in results))
+
+    def test_daily_log_list_does_not_load_trips(self):
+        with self.assertNumQueries(2):  # ETag aggregate, logs
+            response = self.client.get(reverse("dailylog-list"))
+
+        self.assertEqual(len(response.json()), 30)
+
+    def test_daily_log_str_does_not_load_trip(self):
+        log = DailyLog.objects.only("id", "trip_id").get(
+            pk=self.trip.daily_logs.first().pk
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(str(log), f"Daily Log for Trip ID: {self.trip.pk}")
+
+    def test_sync_does_not_embed_logs(self):
+        with self.assertNumQueries(2):
+            changes = changes_since(None)
+
+        self.assertNotIn("daily_logs", changes["trips"][0])
+
+
+class ConditionalGetTest(TripsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.trip = Trip.objects.create(client_id="a", payload={"totalMiles": 10})
+        self.log = DailyLog.objects.create(trip=self.trip, log_data=[])
+        self.driver = Driver.objects.create(name="Ann", employee_id="1")
+
+    def revalidate(self, url, response, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_unchanged_list_is_not_modified_without_serializing(self):
+        url = reverse("trip-list")
+        first = self.client.get(url)
+        get_response_cache().clear()  # exercise the uncached path
+
+        with mock.patch.object(TripSerializer, "to_representation") as serialize:
+            with self.assertNumQueries(1):  # the ETag aggregate
+                second = self.revalidate(url, first)
+
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second["ETag"], first["ETag"])
+        serialize.assert_not_called()
+
+    def test_etag_is_strong_and_last_modified_is_set(self):
+        response = self.client.get(reverse("trip-detail", args=[self.trip.pk]))
+
+        self.assertRegex(response["ETag"], r'^"[0-9a-f]+"$')
+        self.assertIn("GMT", response["Last-Modified"])
+
+    def test_changes_invalidate_the_etag(self):
+        changes = {
+            "trip-list": lambda: Trip.objects.create(client_id="b"),
+            "trip-detail": lambda: self.log.soft_delete(),
+            "driver-list": lambda: self.driver.delete(),
+            "dailylog-list": lambda: DailyLog.objects.create(trip=self.trip),
+        }
+        for name, change in changes.items():
+            with self.subTest(name):
+                args = [self.trip.pk] if name == "trip-detail" else []
+                url = reverse(name, args=args)
+                first = self.client.get(url)
+
+                change()
+
+                self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_query_string_is_part_of_the_etag(self):
+        url = reverse("trip-list")
+        first = self.client.get(url)
+
+        response = self.revalidate(url, first, fields="id,payload")
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since(self):
+        url = reverse("trip-detail", args=[self.trip.pk])
+        first = self.client.get(url)
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_hard_deleted_drivers_are_not_hidden_by_if_modified_since(self):
+        other = Driver.objects.create(name="Bob", employee_id="2")
+        url = reverse("driver-list")
+        first = self.client.get(url)
+        self.assertNotIn("Last-Modified", first)
+
+        self.client.delete(reverse("driver-detail", args=[other.pk]))
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+
+class ResponseCacheTest(TripsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.trip = Trip.objects.create(client_id="a", payload={"totalMiles": 10})
+        self.driver = Driver.objects.create(name="Ann", employee_id="1")
+        self.cache = get_response_cache()
+
+    def test_repeat_get_is_served_from_cache_without_queries(self):
+        url = reverse("trip-detail", args=[self.trip.pk])
+        first = self.client.get(url)
+        before = self.cache.stats()
+
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second["Content-Type"], first["Content-Type"])
+        self.assertEqual(self.cache.stats()["hits"], before["hits"] + 1)
+
+    def test_cached_response_honours_if_none_match(self):
+        url = reverse("driver-list")
+        first = self.client.get(url)
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_invalidate_only_their_scopes(self):
+        other = Trip.objects.create(client_id="b")
+        trip_url = reverse("trip-detail", args=[self.trip.pk])
+        urls = [trip_url, reverse("trip-list"), reverse("driver-list")]
+        for url in urls:
+            self.client.get(url)
+
+        DailyLog.objects.create(trip=other, log_data=[])
+
+        with self.assertNumQueries(0):
+            self.client.get(trip_url)
+            self.client.get(reverse("driver-list"))
+        response = self.client.get(reverse("trip-list"), {"fields": "id,daily_logs"})
+        self.assertEqual(len(response.json()["results"][0]["daily_logs"]), 1)
+
+    def test_moving_a_daily_log_invalidates_both_trips(self):
+        other = Trip.objects.create(client_id="b")
+        log = DailyLog.objects.create(trip=self.trip, log_data=[])
+        urls = [reverse("trip-detail", args=[pk]) for pk in (self.trip.pk, other.pk)]
+        for url in urls:
+            self.client.get(url)
+
+        self.client.patch(
+            reverse("dailylog-detail", args=[log.pk]), {"trip": other.pk}, content_type="application/json"
+        )
+
+        self.assertEqual(self.client.get(urls[0]).json()["daily_logs"], [])
+        self.assertEqual([d["id"] for d in self.client.get(urls[1]).json()["daily_logs"]], [log.pk])
+
+    def test_save_and_delete_show_up_on_next_get(self):
+        url = reverse("trip-detail", args=[self.trip.pk])
+        self.client.get(url)
+
+        self.trip.client_id = "renamed"
+        self.trip.save()
+        self.assertEqual(self.client.get(url).json()["client_id"], "renamed")
+
+        self.client.delete(url)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_driver_changes_invalidate_driver_list(self):
+        url = reverse("driver-list")
+        self.client.get(url)
+
+        Driver.objects.create(name="Bob", employee_id="2")
+
+        self.assertEqual(len(self.client.get(url).json()), 2)
+
+    def test_cached_responses_still_check_permissions(self):
+        url = reverse("driver-list")
+        self.client.get(url)
+
+        with mock.patch.object(DriverListCreateView, "check_permissions", side_effect=PermissionDenied):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(ALLOWED_HOSTS=["a.example", "b.example"])
+    def test_host_and_scheme_are_part_of_the_key(self):
+        url = reverse("trip-list")
+        self.client.get(url, HTTP_HOST="a.example")
+        before = self.cache.stats()["hits"]
+
+        self.client.get(url, HTTP_HOST="b.example")
+        self.client.get(url, HTTP_HOST="a.example", secure=True)
+
+        self.assertEqual(self.cache.stats()["hits"], before)
+
+    def test_bulk_upload_invalidates_trip_list(self):
+        url = reverse("trip-list")
+        self.client.get(url)
+
+        self.client.post(
+            reverse("trip-bulk"),
+            {"trips": [{"client_id": "bulk"}]},
+            content_type="application/json",
+        )
+
+        self.assertEqual(len(self.client.get(url).json()["results"]), 2)
+
+    def test_stats_endpoint(self):
+        response = self.client.get(reverse("response-cache-stats"))
+
+        self.assertEqual(set(response.json()), {"hits", "misses", "invalidations"})
+
+
+class SQLiteProfileTest(TripsTestCase):
+    def test_pragmas_are_applied_to_new_connections(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            busy_timeout = cursor.fetchone()[0]
+            cursor.execute("PRAGMA synchronous")
+            synchronous = cursor.fetchone()[0]
+
+        self.assertEqual(busy_timeout, SQLITE_PRAGMAS["busy_timeout"])
+        self.assertEqual(synchronous, 1)  # NORMAL
+
+    def test_router_reads_from_replica_outside_transactions(self):
+        router = ReadReplicaRouter()
+
+        with mock.patch.object(connection, "in_atomic_block", False):
+            self.assertEqual(router.db_for_read(Trip), "replica")
+        self.assertEqual(router.db_for_read(Trip), "default")  # TestCase atomic
+        self.assertEqual(router.db_for_write(Trip), "default")
+        self.assertFalse(router.allow_migrate("replica", "trips"))
+
+    def test_benchmark_command_reports_both_profiles(self):
+        out = io.StringIO()
+
+        call_command("benchmark_sqlite", seconds=0.2, readers=1, writers=1, stdout=out)
+
+        self.assertIn("baseline", out.getvalue())
+        self.assertIn("tuned", out.getvalue())
+
+
+class PlanningJobTest(TripsTestCase):
+    route: ClassVar[list] = [[30.0 + i * 0.01, -97.0] for i in range(3001)]  # ~2070 miles
+
+    def submit(self, body):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("planning-job-list"), body, content_type="application/json")
+        return response
+
+    def test_job_is_accepted_and_saves_the_trip(self):
+        response = self.submit({"route": self.route, "current_cycle_hours": 20, "pickup_location": "Austin"})
+
+        self.assertEqual(response.status_code, 202)
+        job = self.client.get(response["Location"]).json()
+        self.assertEqual(job["status"], "succeeded")
+        trip = Trip.objects.get(pk=job["trip"])
+        self.assertEqual(trip.pickup_location, "Austin")
+        self.assertEqual(trip.total_miles, job["result"]["total_miles"])
+        self.assertEqual(trip.daily_logs.count(), len(job["result"]["daily_logs"]))
+        self.assertGreater(trip.daily_logs.count(), 1)
+
+    def test_replanning_a_trip_replaces_its_daily_logs(self):
+        trip_id = self.client.get(self.submit({"route": self.route})["Location"]).json()["trip"]
+        old_logs = set(DailyLog.objects.filter(trip_id=trip_id).values_list("pk", flat=True))
+
+        job = self.client.get(self.submit({"trip": trip_id, "current_cycle_hours": 65})["Location"]).json()
+
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["trip"], trip_id)
+        live = set(DailyLog.objects.filter(trip_id=trip_id).values_list("pk", flat=True))
+        self.assertTrue(live and live.isdisjoint(old_logs))
+
+    def test_routing_failure_marks_the_job_failed(self):
+        waypoints = [{"lat": 30.0, "lng": -97.0}, {"lat": 32.0, "lng": -97.0}]
+        with mock.patch("trips.tasks.fetch_route", new_callable=mock.AsyncMock, side_effect=RuntimeError("upstream down")):
+            response = self.submit({"waypoints": waypoints})
+
+        job = self.client.get(response["Location"]).json()
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["error"], "upstream down")
+        self.assertIsNone(job["trip"])
+
+    def test_invalid_waypoints_are_rejected(self):
+        for waypoints in (
+            [{"lat": 30.0, "lng": -97.0}] * 26,
+            [{"lat": 30.0}, {"lat": 32.0, "lng": -97.0}],
+            [{"lat": 30.0, "lng": -197.0}, {"lat": 32.0, "lng": -97.0}],
+        ):
+            with self.subTest(waypoints=waypoints[:2]):
+                self.assertEqual(self.submit({"waypoints": waypoints}).status_code, 400)
+        self.assertFalse(PlanningJob.objects.exists())
+
+    def test_a_route_source_is_required(self):
+        response = self.submit({"current_cycle_hours": 10})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_cycle_hours_over_the_limit_are_rejected(self):
+        for body in ({"current_cycle_hours": 500}, {"cycle_history": [10, 71]}):
+            with self.subTest(body=body):
+                self.assertEqual(self.submit({"route": self.route, **body}).status_code, 400)
+        self.assertFalse(PlanningJob.objects.exists())
+
+
+class LogSheetTest(TripsTestCase):
+    segments: ClassVar[list] = [
+        {"type": "Off Duty", "hours": 10.0},
+        {"type": "Driving", "hours": 11.0},
+        {"type": "On Duty (not driving)", "hours": 3.0},
+    ]
+
+    def make_trip(self, created_at, days=2):
+        trip = Trip.objects.create(client_id=f"trip-{created_at:%d}")
+        Trip.objects.filter(pk=trip.pk).update(created_at=created_at)
+        for _ in range(days):
+            DailyLog.objects.create(trip=trip, log_data=self.segments)
+        return trip
+
+    def test_sheet_is_served_with_its_content_hash_as_etag(self):
+        log = self.make_trip(datetime(2026, 3, 1, tzinfo=UTC)).daily_logs.first()
+        url = reverse("dailylog-sheet", args=[log.pk, "png"])
+
+        response = self.client.get(url, HTTP_ACCEPT="image/png")
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertTrue(response.content.startswith(b"\x89PNG"))
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(self.client.get(reverse("dailylog-sheet", args=[log.pk, "gif"])).status_code, 404)
+
+    def test_zip_export_streams_sheets_for_trips_in_range(self):
+        inside = self.make_trip(datetime(2026, 3, 5, 12, tzinfo=UTC))
+        self.make_trip(datetime(2026, 4, 2, 12, tzinfo=UTC))
+        DailyLog.objects.create(trip=inside, log_data={"not": "segments"})
+
+        response = self.client.get(
+            reverse("dailylog-sheet-export"), {"start": "2026-03-01", "end": "2026-03-31", "type": "svg"}
+        )
+
+        self.assertTrue(response.streaming)
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        folder = f"2026-03-05-trip-{inside.pk}"
+        self.assertEqual(archive.namelist(), [f"{folder}/day-1-2026-03-05.svg", f"{folder}/day-2-2026-03-06.svg"])
+        self.assertIn(b"<polyline", archive.read(archive.namelist()[0]))
+
+    def test_zip_export_requires_a_date_range(self):
+        response = self.client.get(reverse("dailylog-sheet-export"), {"start": "2026-03-01"})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class TripCorridorTest(TripsTestCase):
+    def setUp(self):
+        super().setUp()
+        # Two vertices 5 degrees apart: only the segment passes most cells
+        self.north = Trip.objects.create(client_id="north", payload={"route": [[30.0, -97.0], [35.0, -97.0]]})
+        self.east = Trip.objects.create(client_id="east", payload={"route": [[32.0, -95.0], [32.0, -90.0]]})
+        self.stop_only = Trip.objects.create(
+            client_id="stop", payload={"stops": [{"name": "Fuel", "coords": [40.0, -100.0]}, {"name": "x"}]}
+        )
+
+    def near(self, **params):
+        return self.client.get(reverse("trip-near"), params)
+
+    def test_cells_are_built_on_save(self):
+        self.assertEqual(self.north.cells.count(), 21)  # 5 degrees of 0.25-degree cells
+        self.assertEqual(self.stop_only.cells.count(), 1)
+
+    def test_point_query_returns_trips_within_range_nearest_first(self):
+        response = self.near(lat=32.0, lng=-96.2, miles=80)
+
+        results = response.json()["results"]
+        self.assertEqual([r["client_id"] for r in results], ["north", "east"])
+        self.assertAlmostEqual(results[0]["distance_miles"], 46.9, delta=0.5)
+        self.assertNotIn("payload", results[0])
+        self.assertEqual(self.near(lat=32.0, lng=-96.2, miles=40).json()["results"], [])
+
+    def test_stops_are_indexed(self):
+        results = self.near(lat=40.01, lng=-100.0, miles=2).json()["results"]
+
+        self.assertEqual([r["client_id"] for r in results], ["stop"])
+
+    def test_bbox_query_matches_segments_crossing_the_box(self):
+        response = self.near(bbox="32.4,-97.2,32.6,-96.8")
+
+        self.assertEqual([r["client_id"] for r in response.json()["results"]], ["north"])
+
+    def test_deleted_and_bulk_created_trips(self):
+        self.north.soft_delete()
+        self.client.post(
+            reverse("trip-bulk"),
+            {"trips": [{"client_id": "bulk", "payload": {"route": [[33.0, -98.0], [33.0, -96.0]]}}]},
+            content_type="application/json",
+        )
+
+        results = self.near(lat=33.0, lng=-97.0, miles=1).json()["results"]
+
+        self.assertEqual([r["client_id"] for r in results], ["bulk"])
+        self.assertTrue(TripCell.objects.filter(trip__client_id="bulk").exists())
+
+    def test_requires_a_point_or_box(self):
+        self.assertEqual(self.near(lat=32.0).status_code, 400)
+        self.assertEqual(self.near(bbox="1,2,3").status_code, 400)
+
+    def test_out_of_range_numbers_return_400(self):
+        for params in (
+            {"bbox": "-inf,0,1,1"},
+            {"bbox": "0,0,1,1e308"},
+            {"bbox": "nan,0,1,1"},
+            {"bbox": "-91,0,1,1"},
+            {"bbox": "0,-180,60,180"},  # larger than max_bbox_area
+            {"lat": 0, "lng": 0, "miles": 1e300},
+            {"lat": 0, "lng": 0, "miles": 501},
+            {"lat": 32.0, "lng": -97.0, "miles": 10, "limit": -1},
+            {"lat": 32.0, "lng": -97.0, "miles": 10, "limit": 0},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.near(**params).status_code, 400)
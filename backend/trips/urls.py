@@ -3,15 +3,29 @@
 from django.urls import path
 from .views import (
     TripListCreate, TripRetrieveDestroy,
-    DriverListCreateView, DriverDetailView,
+    DriverListCreateView, DriverDetailView, FleetAvailabilityView,
     DailyLogListCreateView, DailyLogDetailView,
+    DailyLogSheetView, LogSheetExportView,
+    TripCorridorView, TripPositionView, TripExportView, TripBulkCreateView, SyncView,
+    PlanningJobCreateView, PlanningJobDetailView, ResponseCacheStatsView,
 )
 
 urlpatterns = [
     path("trips/", TripListCreate.as_view(), name="trip-list"),
     path("trips/<int:pk>/", TripRetrieveDestroy.as_view(), name="trip-detail"),
+    path("trips/<int:pk>/position/", TripPositionView.as_view(), name="trip-position"),
+    path("trips/near/", TripCorridorView.as_view(), name="trip-near"),
+    path("trips/export/", TripExportView.as_view(), name="trip-export"),
+    path("trips/bulk/", TripBulkCreateView.as_view(), name="trip-bulk"),
     path("drivers/", DriverListCreateView.as_view(), name="driver-list"),
+    path("drivers/availability/", FleetAvailabilityView.as_view(), name="driver-availability"),
     path("drivers/<int:pk>/", DriverDetailView.as_view(), name="driver-detail"),
     path("daily-logs/", DailyLogListCreateView.as_view(), name="dailylog-list"),
     path("daily-logs/<int:pk>/", DailyLogDetailView.as_view(), name="dailylog-detail"),
+    path("daily-logs/<int:pk>/sheet.<str:fmt>", DailyLogSheetView.as_view(), name="dailylog-sheet"),
+    path("daily-logs/sheets.zip", LogSheetExportView.as_view(), name="dailylog-sheet-export"),
+    path("plan-jobs/", PlanningJobCreateView.as_view(), name="planning-job-list"),
+    path("plan-jobs/<uuid:pk>/", PlanningJobDetailView.as_view(), name="planning-job-detail"),
+    path("sync/", SyncView.as_view(), name="sync"),
+    path("response-cache/stats/", ResponseCacheStatsView.as_view(), name="response-cache-stats"),
 ]
@@ -1,38 +1,656 @@
+import hashlib
+import math
+from datetime import date
+from typing import ClassVar
+
+from django.db import transaction
+from django.db.models import Count, Max, Prefetch
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date, parse_http_date_safe
+from django.views import View
 from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import DailyLog, Driver, Trip
-from .serializers import DailyLogSerializer, DriverSerializer, TripSerializer
+from api.geometry import decode_polyline, zoom_tolerance
+from api.log_sheet import FORMATS, render_log_sheet
+
+from .availability import HOURS_LIMITS, ORDERING_FIELDS, fleet_availability
+from .cache import get_response_cache, invalidate_trips
+from .export import iter_log_sheets_zip, iter_trips_ndjson
+from .fields import ROUTE_PRECISION, SUMMARY_KEYS
+from .filters import TripSummaryFilter
+from .models import DailyLog, Driver, PlanningJob, Trip, TripCell, TripRouteLevel, TripRouteProfile
+from .pagination import CreatedAtCursorPagination
+from .push import last_progress_mile, report_progress
+from .serializers import (
+    BulkTripSerializer, DailyLogSerializer, DriverSerializer, PlanningJobRequestSerializer,
+    PlanningJobSerializer, TripSerializer,
+)
+from .spatial import trips_in_bbox, trips_near
+from .sync import InvalidCursorError, changes_since
+from .tasks import run_planning_job
+
+
+# Embedded daily logs for a page of trips in one query
+DAILY_LOGS_PREFETCH = Prefetch("daily_logs", queryset=DailyLog.objects.order_by("pk"))
+
+
+class SparseFieldsetMixin:
+    """
+    Lets GET requests pick the serialized fields with ``?fields=a,b`` or drop
+    some with ``?exclude=c``. Fields in ``default_exclude`` are left out
+    unless ``?fields=`` asks for them. Model columns that won't be serialized
+    are deferred, so they are never read from the database, and related
+    fields in ``field_prefetches`` are prefetched only when serialized.
+    """
+
+    default_exclude = ()
+    # Columns loaded even when not serialized (e.g. the pagination key)
+    required_columns = ()
+    # Field name -> Prefetch applied when that field is serialized
+    field_prefetches: ClassVar[dict] = {}
+
+    def get_fieldset(self):
+        """Names of the fields to serialize, or None for all of them."""
+        if self.request.method != "GET":
+            return None
+        if not hasattr(self, "_fieldset"):
+            self._fieldset = self.parse_fieldset(self.request.query_params)
+        return self._fieldset
+
+    def parse_fieldset(self, params):
+        available = list(self.get_serializer_class()().fields)
+        fields = [name for name in params.get("fields", "").split(",") if name]
+        excluded = {name for name in params.get("exclude", "").split(",") if name}
+        unknown = (set(fields) | excluded) - set(available)
+        if unknown:
+            raise ValidationError({"detail": f"Unknown fields: {', '.join(sorted(unknown))}."})
+        if not fields:
+            if not excluded and not self.default_exclude:
+                return None
+            fields = available
+            excluded.update(self.default_exclude)
+        return [name for name in fields if name not in excluded]
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self.get_fieldset())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method != "GET":
+            return queryset
+        fieldset = self.get_fieldset()
+        prefetches = [
+            prefetch for name, prefetch in self.field_prefetches.items() if fieldset is None or name in fieldset
+        ]
+        queryset = queryset.prefetch_related(*prefetches)
+        if fieldset is None:
+            return queryset
+        columns = {field.name for field in queryset.model._meta.concrete_fields}
+        return queryset.only("pk", *self.required_columns, *(name for name in fieldset if name in columns))
+
+
+class ConditionalGetMixin:
+    """
+    Adds a strong ETag and Last-Modified to GET responses and answers
+    If-None-Match / If-Modified-Since with 304 before the queryset is read or
+    anything is serialized.
+
+    Both validators come from one ``Max("updated_at")``/``Count`` aggregate
+    per queryset in ``get_validator_querysets()`` (by default just
+    ``get_queryset()``). Soft-deleting a row bumps its ``updated_at`` and
+    hard-deleting one lowers the count, so any change to what the view would
+    render changes the ETag. The request path, query string and Accept
+    header are hashed in too.
+
+    A hard delete leaves ``Max("updated_at")`` where it was, so views whose
+    rows are hard-deleted set ``send_last_modified = False`` and revalidate
+    on the ETag alone.
+    """
+
+    send_last_modified = True
+
+    def get_validator_querysets(self):
+        """Querysets covering every row the response is rendered from."""
+        return [self.get_queryset()]
+
+    def get_validators(self):
+        """
+        Returns ``(etag, last_modified)`` for the current request;
+        ``last_modified`` is None if ``send_last_modified`` is off.
+        """
+        digest = hashlib.sha256()
+        digest.update(self.request.get_full_path().encode())
+        digest.update(self.request.headers.get("Accept", "").encode())
+        last_modified = None
+        for queryset in self.get_validator_querysets():
+            stats = queryset.order_by().aggregate(last=Max("updated_at"), count=Count("pk"))
+            digest.update(f"|{stats['last']}|{stats['count']}".encode())
+            if stats["last"] is not None and (last_modified is None or stats["last"] > last_modified):
+                last_modified = stats["last"]
+        return quote_etag(digest.hexdigest()[:40]), last_modified if self.send_last_modified else None
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        timestamp = int(last_modified.timestamp()) if last_modified else None  # HTTP dates are whole seconds
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response.headers["ETag"] = etag
+            if timestamp is not None:
+                response.headers["Last-Modified"] = http_date(timestamp)
+        return response
+
+
+class CachedResponseMixin:
+    """
+    Serves GET requests from the response cache (trips/cache.py) and stores
+    rendered 200 responses in it. ``cache_scopes`` names what the response
+    depends on; the model signals in trips/signals.py invalidate them. A hit
+    costs no database queries and still honours If-None-Match and
+    If-Modified-Since against the stored validators.
+
+    The lookup happens in ``get()``, after DRF's ``initial()``, so hits go
+    through authentication, permissions and throttling like any request.
+    """
 
+    cache_scopes = ()
+    cache_key = None  # set on a miss, for finalize_response to store under
 
-class DriverListCreateView(generics.ListCreateAPIView):
+    def get_cache_scopes(self):
+        return [scope.format(**self.kwargs) for scope in self.cache_scopes]
+
+    def get(self, request, *args, **kwargs):
+        cache = get_response_cache()
+        key = cache.key(request, self.get_cache_scopes())
+        response = cache.get(key)
+        if response is None:
+            self.cache_key = key
+            return super().get(request, *args, **kwargs)
+
+        last_modified = parse_http_date_safe(response.headers.get("Last-Modified", ""))
+        not_modified = get_conditional_response(
+            request, etag=response.headers.get("ETag"), last_modified=last_modified
+        )
+        if not_modified is not None:
+            for name in ("ETag", "Last-Modified"):
+                if name in response.headers:
+                    not_modified.headers[name] = response.headers[name]
+            return not_modified
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.cache_key is not None and response.status_code == 200:
+            response.render()
+            get_response_cache().set(self.cache_key, response)
+        return response
+
+
+class DriverListCreateView(CachedResponseMixin, ConditionalGetMixin, generics.ListCreateAPIView):
     queryset = Driver.objects.all()
     serializer_class = DriverSerializer
+    cache_scopes = ("drivers",)
+    send_last_modified = False  # drivers are hard-deleted
 
 
-class DriverDetailView(generics.RetrieveUpdateDestroyAPIView):
+class DriverDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Driver.objects.all()
     serializer_class = DriverSerializer
+    send_last_modified = False  # drivers are hard-deleted
+
+    def get_validator_querysets(self):
+        return [Driver.objects.filter(pk=self.kwargs["pk"])]
+
+
+class FleetAvailabilityView(APIView):
+    """
+    Remaining driving, on-duty and cycle hours for every driver (see
+    trips.availability), e.g. ``?min_drive_hours=9`` for who can still
+    drive nine hours in this shift. Also filters on ``?min_on_duty_hours=``,
+    ``?min_cycle_hours=``, ``?location=`` and ``?search=`` (name or employee
+    id); ``?ordering=`` takes a remaining-hours column, ``name`` or
+    ``employee_id`` (default ``-remaining_drive_hours``); ``?limit=`` caps
+    the results. Figures can be up to ``FLEET_AVAILABILITY["TIMEOUT"]``
+    seconds old, as of ``generated_at``.
+    """
+
+    hours_params = ("min_drive_hours", "min_on_duty_hours", "min_cycle_hours")
+
+    def get(self, request):
+        params = request.query_params
+        options = {}
+        errors = {}
+        for param in self.hours_params:
+            if param in params:
+                try:
+                    options[param] = float(params[param])
+                except ValueError:
+                    errors[param] = "Invalid value."
+        if "limit" in params:
+            try:
+                options["limit"] = int(params["limit"])
+                if options["limit"] < 0:
+                    raise ValueError
+            except ValueError:
+                errors["limit"] = "Invalid value."
+        ordering = params.get("ordering", "-remaining_drive_hours")
+        if ordering.lstrip("-") not in ORDERING_FIELDS:
+            errors["ordering"] = f"Expected one of: {', '.join(ORDERING_FIELDS)}."
+        if errors:
+            raise ValidationError(errors)
+
+        generated_at, count, results = fleet_availability(
+            location=params.get("location"), search=params.get("search"), ordering=ordering, **options
+        )
+        return Response(
+            {"generated_at": generated_at, "limits": HOURS_LIMITS, "count": count, "results": results}
+        )
 
 
-class TripListCreate(generics.ListCreateAPIView):
+class TripListCreate(CachedResponseMixin, ConditionalGetMixin, SparseFieldsetMixin, generics.ListCreateAPIView):
+    """
+    Cursor-paginated, newest first. ``payload`` is only listed when asked for
+    with ``?fields=``. Filters are in TripSummaryFilter; ``?ordering=`` takes
+    ``created_at`` or a summary column, prefixed with ``-`` for descending.
+    """
+
     queryset = Trip.objects.order_by("-created_at")
     serializer_class = TripSerializer
+    pagination_class = CreatedAtCursorPagination
+    filter_backends: ClassVar[list] = [TripSummaryFilter, OrderingFilter]
+    ordering_fields: ClassVar[list] = ["created_at", *SUMMARY_KEYS]
+    default_exclude = ("payload", "daily_logs")
+    field_prefetches: ClassVar[dict] = {"daily_logs": DAILY_LOGS_PREFETCH}
+    cache_scopes = ("trips",)
+    # The pagination cursor reads the ordering column of the last row
+    required_columns = ("created_at", *SUMMARY_KEYS)
+
+    def get_validator_querysets(self):
+        fieldset = self.get_fieldset()
+        if fieldset is not None and "daily_logs" not in fieldset:
+            return [Trip.all_objects.all()]
+        return [Trip.all_objects.all(), DailyLog.all_objects.all()]
+
 
+class TripRetrieveDestroy(
+    CachedResponseMixin, ConditionalGetMixin, SparseFieldsetMixin, generics.RetrieveDestroyAPIView
+):
+    """
+    ``?zoom=<map zoom>`` (0 to 30) or ``?tolerance=<degrees>`` (positive)
+    swaps the route for the coarsest precomputed simplification that is
+    still accurate to a pixel at that zoom (or within that tolerance). Finer
+    requests get the full route.
+    """
 
-class TripRetrieveDestroy(generics.RetrieveDestroyAPIView):
     queryset = Trip.objects.all()
     serializer_class = TripSerializer
+    field_prefetches: ClassVar[dict] = {"daily_logs": DAILY_LOGS_PREFETCH}
+    cache_scopes = ("trip:{pk}",)
+    max_zoom = 30
+
+    def get_validator_querysets(self):
+        pk = self.kwargs["pk"]
+        return [Trip.all_objects.filter(pk=pk), DailyLog.all_objects.filter(trip_id=pk)]
+
+    def perform_destroy(self, instance):
+        instance.soft_delete()
+
+    def retrieve(self, request, *args, **kwargs):
+        trip = self.get_object()
+        data = self.get_serializer(trip).data
+        tolerance = self.requested_tolerance()
+        if tolerance is not None and isinstance(data.get("payload"), dict):
+            level = trip.route_levels.filter(tolerance__lte=tolerance).order_by("-tolerance").first()
+            if level is not None:
+                self.use_route_level(data, level)
+        return Response(data)
 
+    def requested_tolerance(self):
+        params = self.request.query_params
+        try:
+            if "tolerance" in params:
+                tolerance = float(params["tolerance"])
+            elif "zoom" in params:
+                zoom = float(params["zoom"])
+                # Past either end 2**zoom under- or overflows
+                tolerance = zoom_tolerance(zoom) if 0 <= zoom <= self.max_zoom else math.nan
+            else:
+                return None
+        except ValueError:
+            tolerance = math.nan
+        if not (math.isfinite(tolerance) and tolerance > 0):
+            raise ValidationError(
+                {"detail": f"zoom must be a number from 0 to {self.max_zoom} and tolerance a positive number."}
+            )
+        return tolerance
 
-class DailyLogListCreateView(generics.ListCreateAPIView):
+    def use_route_level(self, data, level):
+        payload = data["payload"] = dict(data["payload"])
+        if "route" in payload:
+            payload["route"] = decode_polyline(level.points, ROUTE_PRECISION)
+        else:
+            payload["route_polyline"] = {"points": level.points, "precision": ROUTE_PRECISION}
+        data["route_level"] = {
+            "zoom": level.zoom,
+            "tolerance": level.tolerance,
+            "vertex_count": level.vertex_count,
+        }
+
+
+class DailyLogListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     queryset = DailyLog.objects.all()
     serializer_class = DailyLogSerializer
 
+    def get_validator_querysets(self):
+        return [DailyLog.all_objects.all()]
+
 
-class DailyLogDetailView(generics.RetrieveUpdateDestroyAPIView):
+class DailyLogDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = DailyLog.objects.all()
     serializer_class = DailyLogSerializer
 
+    def get_validator_querysets(self):
+        return [DailyLog.all_objects.filter(pk=self.kwargs["pk"])]
+
+    def perform_destroy(self, instance):
+        instance.soft_delete()
+
+
+class DailyLogSheetView(View):
+    """
+    The daily log drawn as an ELD grid sheet, ``sheet.svg`` or ``sheet.png``.
+    The ETag is the sheet's content hash, which is also its render cache key.
+    A plain Django view (as is LogSheetExportView), since DRF content
+    negotiation would turn away clients that only accept images.
+    """
+
+    def get(self, request, pk, fmt):
+        if fmt not in FORMATS:
+            raise Http404
+        log = get_object_or_404(DailyLog, pk=pk)
+        try:
+            content, digest = render_log_sheet(log.log_data, fmt)
+        except ValueError as e:
+            return JsonResponse({"detail": str(e)}, status=400)
+        etag = quote_etag(digest)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type=FORMATS[fmt])
+        response.headers["ETag"] = etag
+        return response
+
+
+class LogSheetExportView(View):
+    """
+    Streams a ZIP of log sheets for the trips created in
+    ``?start=YYYY-MM-DD&end=YYYY-MM-DD`` (inclusive), as ``?type=png``
+    (default) or ``svg``. See trips.export.iter_log_sheets_zip.
+    """
+
+    def get(self, request):
+        params = request.GET
+        fmt = params.get("type", "png")
+        try:
+            start = date.fromisoformat(params.get("start", ""))
+            end = date.fromisoformat(params.get("end", ""))
+        except ValueError:
+            return JsonResponse({"detail": "start and end must be YYYY-MM-DD dates."}, status=400)
+        if fmt not in FORMATS:
+            return JsonResponse({"detail": f"type must be one of: {', '.join(FORMATS)}."}, status=400)
+        if end < start:
+            return JsonResponse({"detail": "end is before start."}, status=400)
+
+        response = StreamingHttpResponse(iter_log_sheets_zip(start, end, fmt), content_type="application/zip")
+        response["Content-Disposition"] = f'attachment; filename="log-sheets-{start}-{end}.zip"'
+        return response
+
+
+class TripCorridorView(APIView):
+    """
+    Trips whose route or stops pass near a place, found through the TripCell
+    grid index (see trips.spatial):
+
+    - ``?lat=&lng=&miles=``: within ``miles`` of the point, nearest first,
+      each with its ``distance_miles``
+    - ``?bbox=min_lat,min_lng,max_lat,max_lng``: crossing the box, newest first
+
+    At most ``?limit=`` trips (default 100, at most 1000) are returned,
+    without payloads. ``miles`` is capped at ``max_miles`` and the box at
+    ``max_bbox_area`` square degrees, about the contiguous US.
+    """
+
+    default_limit = 100
+    max_limit = 1000
+    max_miles = 500.0
+    max_bbox_area = 2000.0
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            limit = min(int(params.get("limit", self.default_limit)), self.max_limit)
+            if limit < 1:
+                raise ValueError
+            if "bbox" in params:
+                box = [float(value) for value in params["bbox"].split(",")]
+                if len(box) != 4:
+                    raise ValueError
+                min_lat, min_lng, max_lat, max_lng = box
+                # Comparisons are False for NaN, so it is rejected too
+                if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lng <= max_lng <= 180):
+                    raise ValueError
+                if (max_lat - min_lat) * (max_lng - min_lng) > self.max_bbox_area:
+                    raise ValueError
+                ids, distances = trips_in_bbox(*box), None
+            else:
+                lat, lng, miles = (float(params[name]) for name in ("lat", "lng", "miles"))
+                if not (-90 <= lat <= 90 and -180 <= lng <= 180 and 0 <= miles <= self.max_miles):
+                    raise ValueError
+                distances = dict(trips_near(lat, lng, miles))
+                ids = list(distances)
+        except (KeyError, ValueError):
+            return Response(
+                {
+                    "detail": "Pass lat, lng and miles, or bbox=min_lat,min_lng,max_lat,max_lng, "
+                    f"with miles up to {self.max_miles:g}, a box of at most {self.max_bbox_area:g} "
+                    "square degrees and a positive limit."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if distances is None:
+            trips = Trip.objects.filter(pk__in=ids).order_by("-created_at", "-pk")[:limit]
+        else:
+            by_id = Trip.objects.in_bulk(ids[:limit])
+            trips = [by_id[pk] for pk in ids[:limit] if pk in by_id]
+        results = TripSerializer(trips, many=True, exclude=("payload", "daily_logs"), context={"request": request}).data
+        if distances is not None:
+            for data in results:
+                data["distance_miles"] = round(distances[data["id"]], 2)
+        return Response({"count": len(ids), "results": results})
+
+
+class TripPositionView(APIView):
+    """
+    A position along a saved trip's route, looked up in its stored
+    TripRouteProfile:
+
+    - ``?mile=``: the coordinates that far along the route
+    - ``?lat=&lng=``: the nearest point on the route and its mile, with
+      ``offset_miles`` from the route; pass the last known ``near_mile`` to
+      search only the stretch around it
+
+    POST takes the same fields in its body and pushes the result to the
+    trip's websocket subscribers as its latest ``trip.progress`` (see
+    trips.push). Without ``near_mile``, a reported ``lat``/``lng`` is
+    searched for around the previous report.
+    """
+
+    def get(self, request, pk):
+        return self.respond(pk, request.query_params)
+
+    def post(self, request, pk):
+        params = request.data if isinstance(request.data, dict) else {}
+        return self.respond(pk, params, report=True)
+
+    def respond(self, pk, params, report=False):
+        stored = get_object_or_404(TripRouteProfile, trip_id=pk, trip__deleted_at__isnull=True)
+        profile = stored.as_profile()
+        try:
+            if "mile" in params:
+                mile = float(params["mile"])
+                if not math.isfinite(mile):
+                    raise ValueError
+                mile = min(max(mile, 0.0), profile.total_miles)
+                data = {"mile": mile, "coords": profile.coord_at_mile(mile)}
+            else:
+                lat, lng = float(params["lat"]), float(params["lng"])
+                if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+                    raise ValueError
+                near_mile = float(params["near_mile"]) if "near_mile" in params else None
+                if near_mile is None and report:
+                    near_mile = last_progress_mile(pk)
+                mile, coords, offset = profile.locate(lat, lng, near_mile=near_mile)
+                data = {"mile": mile, "coords": coords, "offset_miles": round(offset, 3)}
+        except (KeyError, TypeError, ValueError):
+            return Response({"detail": "Pass mile, or lat and lng."}, status=status.HTTP_400_BAD_REQUEST)
+        data["mile"] = round(data["mile"], 3)
+        data["remaining_miles"] = round(profile.total_miles - data["mile"], 3)
+        if report:
+            report_progress(pk, data)
+        return Response(data)
+
+
+class TripExportView(APIView):
+    """Streams every trip with its daily logs as NDJSON, one trip per line."""
+
+    def get(self, request):
+        response = StreamingHttpResponse(iter_trips_ndjson(), content_type="application/x-ndjson")
+        response["Content-Disposition"] = 'attachment; filename="trips.ndjson"'
+        return response
+
+
+class TripBulkCreateView(APIView):
+    """
+    Uploads many trips with nested daily logs in one request:
+    ``{"trips": [{"client_id", "payload", "daily_logs": [{"log_data"}, ...]}, ...]}``.
+
+    Every item is validated first; the valid ones are then written with a
+    few ``bulk_create`` calls inside one transaction. The response lists a
+    result per item, in request order.
+    """
+
+    max_items = 1000
+
+    def post(self, request):
+        items = request.data.get("trips") if isinstance(request.data, dict) else None
+        if not isinstance(items, list):
+            return Response({"detail": "Expected a \"trips\" list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_items:
+            return Response(
+                {"detail": f"At most {self.max_items} trips per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = []
+        valid = []
+        for index, item in enumerate(items):
+            serializer = BulkTripSerializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+                results.append(None)
+            else:
+                results.append({"index": index, "status": "invalid", "errors": serializer.errors})
+
+        trips = [Trip(client_id=data["client_id"], payload=data.get("payload", {})) for _, data in valid]
+        for trip in trips:
+            trip.update_summary()  # bulk_create skips Trip.save()
+        with transaction.atomic():
+            Trip.objects.bulk_create(trips)
+            DailyLog.objects.bulk_create(
+                DailyLog(trip=trip, **log)
+                for trip, (_, data) in zip(trips, valid, strict=True)
+                for log in data.get("daily_logs", [])
+            )
+            TripRouteLevel.objects.bulk_create(level for trip in trips for level in trip.make_route_levels())
+            TripRouteProfile.objects.bulk_create(
+                profile for profile in (trip.make_route_profile() for trip in trips) if profile is not None
+            )
+            TripCell.objects.bulk_create(cell for trip in trips for cell in trip.make_cells())
+        invalidate_trips(*(trip.pk for trip in trips))  # bulk_create sends no signals
+
+        for trip, (index, data) in zip(trips, valid, strict=True):
+            results[index] = {
+                "index": index,
+                "status": "created",
+                "id": trip.pk,
+                "client_id": trip.client_id,
+                "daily_logs": len(data.get("daily_logs", [])),
+            }
+
+        if not trips and items:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif len(trips) < len(items):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({"created": len(trips), "failed": len(items) - len(trips), "results": results}, status=response_status)
+
+
+class SyncView(APIView):
+    """
+    Incremental sync: ``GET ?cursor=<cursor from the last response>`` returns
+    the trips and daily logs changed since then, ids of the ones deleted, a
+    new ``cursor`` and ``has_more``. Omit the cursor for a full first sync.
+    """
+
+    def get(self, request):
+        try:
+            changes = changes_since(request.query_params.get("cursor"), context={"request": request})
+        except InvalidCursorError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(changes)
+
+
+class PlanningJobCreateView(APIView):
+    """
+    Queues a trip plan (see PlanningJobRequestSerializer) and answers 202
+    with the job right away; routing, HOS planning and saving the trip and
+    its daily logs run in a Celery worker. Poll ``status_url`` until the
+    job has ``succeeded`` (its ``trip`` and ``result`` are set) or
+    ``failed`` (see ``error``).
+    """
+
+    def post(self, request):
+        serializer = PlanningJobRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = PlanningJob()
+        job.params = {"client_id": str(job.id), **serializer.validated_data}
+        job.save()
+        # The worker must be able to see the row
+        transaction.on_commit(lambda: run_planning_job.delay(str(job.id)))
+        job.refresh_from_db()  # already finished if the task ran eagerly
+
+        url = reverse("planning-job-detail", args=[job.id])
+        data = {**PlanningJobSerializer(job).data, "status_url": request.build_absolute_uri(url)}
+        return Response(data, status=status.HTTP_202_ACCEPTED, headers={"Location": url})
+
+
+class PlanningJobDetailView(generics.RetrieveAPIView):
+    queryset = PlanningJob.objects.all()
+    serializer_class = PlanningJobSerializer
+
+
+class ResponseCacheStatsView(APIView):
+    """Hit/miss/invalidation counters of this process's response cache."""
+
+    def get(self, request):
+        return Response(get_response_cache().stats())
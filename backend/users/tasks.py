@@ -1,8 +1,8 @@
 from django.core import management
-from {{project_name}} import celery_app
+
+from spotter_app import celery_app
 
 
 @celery_app.task
 def clearsessions():
     management.call_command("clearsessions")
-